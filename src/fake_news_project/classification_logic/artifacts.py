@@ -0,0 +1,171 @@
+import os
+import json
+import importlib
+
+import numpy as np
+from scipy import sparse
+
+ARTIFACT_MANIFEST_FILENAME = 'manifest.json'
+ARTIFACT_FORMAT_VERSION = 1
+
+ALLOWED_ESTIMATORS = {
+    'sklearn.feature_extraction.text.TfidfVectorizer',
+    'sklearn.feature_extraction.text.TfidfTransformer',
+    'sklearn.svm._classes.SVC',
+}
+
+VOCABULARY_ATTRIBUTES = {'vocabulary_'}
+
+
+class ArtifactFormatError(ValueError):
+    pass
+
+
+def _qualified_name(cls) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _resolve_estimator_class(qualified_name: str):
+    if qualified_name not in ALLOWED_ESTIMATORS:
+        raise ArtifactFormatError(f"Estimator class {qualified_name} is not allowed in array artifacts.")
+    module_name, class_name = qualified_name.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class _ArtifactWriter:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._written_arrays = {}
+
+    def save_array(self, name: str, array: np.ndarray) -> str:
+        if id(array) in self._written_arrays:
+            return self._written_arrays[id(array)]
+        filename = f"{name}.npy"
+        np.save(os.path.join(self.directory, filename), np.ascontiguousarray(array), allow_pickle=False)
+        self._written_arrays[id(array)] = filename
+        return filename
+
+    def encode(self, name: str, value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, np.ndarray):
+            if value.dtype == object:
+                raise ArtifactFormatError(f"{name} is an object array and cannot be stored without pickle.")
+            return {'__ndarray__': self.save_array(name, value)}
+        if sparse.issparse(value):
+            matrix = value.tocsr()
+            return {'__sparse__': 'csr', 'shape': list(matrix.shape),
+                    'data': self.save_array(f"{name}.data", matrix.data),
+                    'indices': self.save_array(f"{name}.indices", matrix.indices),
+                    'indptr': self.save_array(f"{name}.indptr", matrix.indptr)}
+        if isinstance(value, np.generic):
+            return {'__scalar__': value.dtype.name, 'value': value.item()}
+        if isinstance(value, type) and issubclass(value, np.generic):
+            return {'__dtype__': np.dtype(value).name}
+        if isinstance(value, tuple):
+            return {'__tuple__': [self.encode(f"{name}.{index}", item) for index, item in enumerate(value)]}
+        if isinstance(value, (set, frozenset)):
+            return {'__set__': sorted(self.encode(name, item) for item in value)}
+        if isinstance(value, list):
+            return [self.encode(f"{name}.{index}", item) for index, item in enumerate(value)]
+        if isinstance(value, dict):
+            return {'__items__': [[self.encode(name, key), self.encode(f"{name}.{index}", item)]
+                                  for index, (key, item) in enumerate(value.items())]}
+        if _qualified_name(type(value)) in ALLOWED_ESTIMATORS:
+            return self.encode_estimator(name, value)
+        raise ArtifactFormatError(f"{name} of type {type(value).__name__} cannot be stored without pickle.")
+
+    def encode_estimator(self, name: str, estimator) -> dict:
+        attributes = {}
+        for attribute, value in vars(estimator).items():
+            if attribute in VOCABULARY_ATTRIBUTES and isinstance(value, dict):
+                attributes[attribute] = {'__vocabulary__': self.save_vocabulary(f"{name}.{attribute}", value)}
+            else:
+                attributes[attribute] = self.encode(f"{name}.{attribute}", value)
+        return {'__estimator__': _qualified_name(type(estimator)), 'attributes': attributes}
+
+    def save_vocabulary(self, name: str, vocabulary: dict) -> str:
+        terms = [None] * len(vocabulary)
+        for term, index in vocabulary.items():
+            if '\n' in term:
+                raise ArtifactFormatError(f"Vocabulary term {term!r} contains a newline.")
+            terms[index] = term
+        filename = f"{name}.txt"
+        with open(os.path.join(self.directory, filename), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(terms))
+        return filename
+
+
+class _ArtifactReader:
+    def __init__(self, directory: str, mmap_mode: str = None):
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+        self._loaded_arrays = {}
+
+    def load_array(self, filename: str) -> np.ndarray:
+        if filename not in self._loaded_arrays:
+            self._loaded_arrays[filename] = np.load(os.path.join(self.directory, filename),
+                                                    mmap_mode=self.mmap_mode, allow_pickle=False)
+        return self._loaded_arrays[filename]
+
+    def decode(self, node):
+        if isinstance(node, list):
+            return [self.decode(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        if '__ndarray__' in node:
+            return self.load_array(node['__ndarray__'])
+        if '__sparse__' in node:
+            return sparse.csr_matrix((self.load_array(node['data']), self.load_array(node['indices']),
+                                      self.load_array(node['indptr'])), shape=tuple(node['shape']), copy=False)
+        if '__scalar__' in node:
+            return np.dtype(node['__scalar__']).type(node['value'])
+        if '__dtype__' in node:
+            return np.dtype(node['__dtype__']).type
+        if '__tuple__' in node:
+            return tuple(self.decode(item) for item in node['__tuple__'])
+        if '__set__' in node:
+            return set(self.decode(item) for item in node['__set__'])
+        if '__items__' in node:
+            return {self.decode(key): self.decode(item) for key, item in node['__items__']}
+        if '__vocabulary__' in node:
+            with open(os.path.join(self.directory, node['__vocabulary__']), encoding='utf-8') as f:
+                content = f.read()
+            return {term: index for index, term in enumerate(content.split('\n'))} if content else {}
+        if '__estimator__' in node:
+            estimator_class = _resolve_estimator_class(node['__estimator__'])
+            estimator = estimator_class.__new__(estimator_class)
+            estimator.__dict__.update({attribute: self.decode(value)
+                                       for attribute, value in node['attributes'].items()})
+            return estimator
+        raise ArtifactFormatError(f"Unknown artifact node {sorted(node)}.")
+
+
+def export_estimators(directory: str, estimators: dict, metadata: dict = None) -> str:
+    os.makedirs(directory, exist_ok=True)
+    writer = _ArtifactWriter(directory)
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'metadata': metadata or {},
+        'estimators': {name: writer.encode_estimator(name, estimator) for name, estimator in estimators.items()},
+    }
+    manifest_path = os.path.join(directory, ARTIFACT_MANIFEST_FILENAME)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest_path
+
+
+def read_artifact_metadata(directory: str) -> dict:
+    with open(os.path.join(directory, ARTIFACT_MANIFEST_FILENAME), encoding='utf-8') as f:
+        return json.load(f).get('metadata', {})
+
+
+def load_estimators(directory: str, mmap_mode: str = 'r'):
+    with open(os.path.join(directory, ARTIFACT_MANIFEST_FILENAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ArtifactFormatError(f"Unsupported artifact format version {manifest.get('format_version')}.")
+
+    reader = _ArtifactReader(directory, mmap_mode=mmap_mode)
+    estimators = {name: reader.decode(node) for name, node in manifest['estimators'].items()}
+    return estimators, manifest['metadata']
@@ -0,0 +1,104 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .conf import get_setting
+
+
+class MicroBatcher:
+    def __init__(self, classify_batch, max_batch_size: int = 32, max_wait: float = 0.005,
+                 max_queue: int = 1000, workers: int = 1):
+        self.classify_batch = classify_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.max_observed_batch_size = 0
+        self.batch_size_counts = {}
+
+    @classmethod
+    def from_settings(cls, classify_batch):
+        config = get_setting('CLASSIFIER_MICRO_BATCH', {})
+        return cls(classify_batch,
+                   max_batch_size=config.get('MAX_BATCH_SIZE', 32),
+                   max_wait=config.get('MAX_WAIT_MS', 5) / 1000,
+                   max_queue=config.get('MAX_QUEUE', 1000),
+                   workers=config.get('WORKERS', 1))
+
+    def submit(self, text: str) -> Future:
+        self._ensure_workers()
+        future = Future()
+        try:
+            self._queue.put_nowait((text, future))
+        except queue.Full:
+            self.rejected += 1
+            raise
+        self.submitted += 1
+        return future
+
+    def stats(self) -> dict:
+        return {
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'workers': len(self._threads),
+            'submitted': self.submitted,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_items / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_observed_batch_size,
+            'batch_size_counts': dict(self.batch_size_counts),
+        }
+
+    def _ensure_workers(self):
+        if len(self._threads) >= self.workers:
+            return
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f'micro-batcher-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _collect_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            with self._lock:
+                self.batches += 1
+                self.batched_items += len(batch)
+                self.max_observed_batch_size = max(self.max_observed_batch_size, len(batch))
+                self.batch_size_counts[len(batch)] = self.batch_size_counts.get(len(batch), 0) + 1
+
+            try:
+                results = self.classify_batch([text for text, _ in batch])
+            except Exception as e:
+                print(f"MicroBatcher: Error while classifying a batch of {len(batch)} - {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,334 @@
+import os
+import sys
+import json
+import time
+import pickle
+import platform
+from contextlib import contextmanager, ExitStack
+from unittest import mock
+
+import numpy as np
+import spacy
+from spacy.language import Language
+
+from . import emotions, facade, hybrid, model_loaders, near_duplicates, preprocessors, registry
+from .corpus import detect_format, iter_corpus_rows
+
+BENCHMARK_LENGTHS = {'short': 80, 'medium': 600, 'long': 4000}
+STAND_IN_SPACY_DIRNAME = 'spacy_ro_stand_in'
+
+COMMON_WORDS = (
+    'guvernul', 'ministrul', 'președintele', 'românia', 'bucurești', 'europa', 'uniunea', 'europeană', 'parlamentul',
+    'legea', 'proiectul', 'măsuri', 'economice', 'sprijin', 'firmele', 'mici', 'oamenii', 'cetățenii', 'autoritățile',
+    'poliția', 'spitalul', 'medicii', 'vaccinul', 'pandemia', 'studiul', 'cercetătorii', 'universitatea', 'școala',
+    'elevii', 'profesorii', 'primăria', 'orașul', 'județul', 'satul', 'drumul', 'autostrada', 'lucrările', 'banii',
+    'prețurile', 'inflația', 'dobânda', 'banca', 'națională', 'energia', 'gazele', 'petrolul', 'facturile', 'pensiile',
+    'salariile', 'taxele', 'impozitul', 'alegerile', 'partidul', 'opoziția', 'coaliția', 'premierul', 'declarația',
+    'conferința', 'presa', 'jurnaliștii', 'sursele', 'internetul', 'rețelele', 'sociale', 'videoclipul', 'imaginile',
+    'adevărul', 'minciuna', 'secretul', 'complotul', 'pericolul', 'criza', 'războiul', 'armata', 'securitatea',
+    'frontiera', 'vecinii', 'ucraina', 'rusia', 'america', 'china', 'lumea', 'întreaga', 'astăzi', 'ieri', 'mâine',
+    'anul', 'luna', 'săptămâna', 'ziua', 'ora', 'anunțat', 'declarat', 'afirmat', 'susține', 'arată', 'descoperit',
+    'ascund', 'vindecă', 'distruge', 'construiește', 'reabilitează', 'discută', 'negociază', 'aprobă', 'respinge',
+    'crește', 'scade', 'începe', 'termină', 'ajută', 'protejează', 'amenință', 'avertizează', 'confirmă', 'neagă',
+    'mare', 'mic', 'nou', 'vechi', 'bun', 'rău', 'important', 'grav', 'periculos', 'sigur', 'incredibil', 'șocant',
+    'oficial', 'anonim', 'public', 'privat', 'local', 'național', 'internațional', 'economic', 'politic', 'social',
+)
+SYLLABLES = ('ba', 'ca', 'da', 'fa', 'ga', 'la', 'ma', 'na', 'pa', 'ra', 'sa', 'ta', 'va', 'ce', 'de', 'le', 'me',
+             'ne', 're', 'se', 'te', 'ri', 'li', 'mi', 'ni', 'ti', 'co', 'lo', 'mo', 'no', 'ro', 'to', 'cu', 'lu',
+             'mu', 'nu', 'ru', 'tu', 'tă', 'ră', 'nă', 'să', 'ță', 'șa', 'și', 'ât', 'în', 'ea', 'ia', 'oa')
+
+
+@Language.component('benchmark_lemmatizer')
+def benchmark_lemmatizer(doc):
+    for token in doc:
+        token.lemma_ = token.lower_
+    return doc
+
+
+def build_vocabulary(size: int = 5000, seed: int = 7) -> list:
+    rng = np.random.default_rng(seed)
+    vocabulary = list(COMMON_WORDS)
+    seen = set(vocabulary)
+    while len(vocabulary) < size:
+        word = ''.join(rng.choice(SYLLABLES, size=rng.integers(2, 5)))
+        if word not in seen:
+            seen.add(word)
+            vocabulary.append(word)
+    return vocabulary
+
+
+def synthetic_article(rng, vocabulary: list, n_words: int, weights: np.ndarray = None) -> str:
+    words = rng.choice(vocabulary, size=n_words, p=weights)
+    sentences = [' '.join(words[start:start + 15]).capitalize() + '.' for start in range(0, n_words, 15)]
+    paragraphs = [' '.join(sentences[start:start + 5]) for start in range(0, len(sentences), 5)]
+    return '\n'.join(paragraphs)
+
+
+def build_synthetic_corpus(n_docs: int, n_words: int, seed: int = 42, vocabulary: list = None) -> list:
+    vocabulary = vocabulary or build_vocabulary()
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+    rng = np.random.default_rng(seed)
+    return [synthetic_article(rng, vocabulary, n_words, weights) for _ in range(n_docs)]
+
+
+def sample_corpus(path: str, n_docs: int, seed: int = 42, text_field: str = 'content') -> list:
+    rng = np.random.default_rng(seed)
+    sample = []
+    for seen, (_, _, text) in enumerate(iter_corpus_rows(path, detect_format(path), text_field)):
+        if len(sample) < n_docs:
+            sample.append(text)
+        else:
+            replace_at = rng.integers(0, seen + 1)
+            if replace_at < n_docs:
+                sample[replace_at] = text
+    return sample
+
+
+def summarize(samples, unit: str = 's', better: str = 'lower') -> dict:
+    samples = np.asarray(samples, dtype=float)
+    return {
+        'value': float(np.median(samples)),
+        'mean': float(samples.mean()),
+        'p50': float(np.percentile(samples, 50)),
+        'p95': float(np.percentile(samples, 95)),
+        'min': float(samples.min()),
+        'samples': int(len(samples)),
+        'unit': unit,
+        'better': better,
+    }
+
+
+def reset_model_singletons():
+    preprocessors.TextPreprocessor._instance = None
+    preprocessors.TextPreprocessor._pipelines = {}
+    model_loaders.TfidfSvmSingleton._instance = None
+    model_loaders.TfidfSvmSingleton._vectorizer = None
+    model_loaders.TfidfSvmSingleton._svm_model = None
+    model_loaders.TfidfSvmSingleton._model_version = None
+    model_loaders.Word2VecManagerSingleton._instance = None
+    model_loaders.Word2VecManagerSingleton._loaded_models = {}
+    model_loaders.Word2VecManagerSingleton._loaded_vectors = {}
+    model_loaders.Word2VecManagerSingleton._neighbour_indexes = {}
+    facade.NewsClassifierFacade._instance = None
+    registry.ModelRegistry._instance = None
+    near_duplicates.NearDuplicateIndex._instance = None
+    emotions.EmotionLexicon._instance = None
+    hybrid.HybridClassifier._instance = None
+
+
+@contextmanager
+def isolated_model_singletons():
+    saved = {
+        preprocessors.TextPreprocessor: ('_instance', '_pipelines'),
+        model_loaders.TfidfSvmSingleton: ('_instance', '_vectorizer', '_svm_model', '_model_version'),
+        model_loaders.Word2VecManagerSingleton: ('_instance', '_loaded_models', '_loaded_vectors',
+                                                 '_neighbour_indexes'),
+        facade.NewsClassifierFacade: ('_instance',),
+        registry.ModelRegistry: ('_instance',),
+        near_duplicates.NearDuplicateIndex: ('_instance',),
+        emotions.EmotionLexicon: ('_instance',),
+        hybrid.HybridClassifier: ('_instance',),
+    }
+    saved = {(cls, name): cls.__dict__[name] for cls, names in saved.items() for name in names}
+    reset_model_singletons()
+    try:
+        yield
+    finally:
+        for (cls, name), value in saved.items():
+            setattr(cls, name, value)
+
+
+def real_artifacts_available() -> bool:
+    return (spacy.util.is_package(preprocessors.SPACY_MODEL_NAME)
+            and os.path.exists(model_loaders.VECTORIZER_PATH) and os.path.exists(model_loaders.SVM_MODEL_PATH)
+            and all(os.path.exists(config['path']) for config in model_loaders.Word2VecManagerSingleton.MODEL_CONFIG.values()))
+
+
+class StandInArtifacts:
+    """Small, locally generated models with the production shapes so benchmarks run offline."""
+
+    def __init__(self, directory: str, seed: int = 42, n_training_docs: int = 600):
+        self.directory = directory
+        self.seed = seed
+        self.n_training_docs = n_training_docs
+        self.spacy_path = os.path.join(directory, STAND_IN_SPACY_DIRNAME)
+        self.vectorizer_path = os.path.join(directory, 'final_tfidf_vectorizer.pkl')
+        self.svm_model_path = os.path.join(directory, 'final_svm_model.pkl')
+        self.word2vec_paths = {dimension: os.path.join(directory, f'word2vec_{dimension}d.model')
+                               for dimension in model_loaders.Word2VecManagerSingleton.MODEL_CONFIG}
+
+    def build(self):
+        import warnings
+        from gensim.models import Word2Vec
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.svm import SVC
+
+        os.makedirs(self.directory, exist_ok=True)
+        nlp = spacy.blank('ro')
+        nlp.add_pipe('benchmark_lemmatizer')
+        nlp.to_disk(self.spacy_path)
+
+        documents = build_synthetic_corpus(self.n_training_docs, 200, seed=self.seed)
+        lemma_lists = [[token.lemma_ for token in doc if token.is_alpha and not token.is_stop]
+                       for doc in nlp.pipe(preprocessors.TextPreprocessor.clean_text(text) for text in documents)]
+        labels = np.random.default_rng(self.seed).integers(0, 5, size=len(documents))
+
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), max_df=0.95, min_df=5, max_features=10000)
+        features = vectorizer.fit_transform(' '.join(lemmas) for lemmas in lemma_lists)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            svm_model = SVC(random_state=42, probability=True).fit(features, labels)
+        with open(self.vectorizer_path, 'wb') as f:
+            pickle.dump(vectorizer, f)
+        with open(self.svm_model_path, 'wb') as f:
+            pickle.dump(svm_model, f)
+
+        for dimension, path in self.word2vec_paths.items():
+            Word2Vec(lemma_lists, vector_size=int(dimension), window=5, min_count=2, workers=1, seed=self.seed,
+                     epochs=2).save(path)
+        return self
+
+    @contextmanager
+    def activate(self):
+        model_config = {dimension: {**config, 'path': self.word2vec_paths[dimension],
+                                    'vectors_path': os.path.join(self.directory, f'word2vec_{dimension}d.kv'),
+                                    'index_path': os.path.join(self.directory, f'word2vec_{dimension}d.ivf'),
+                                    'quantized_path': os.path.join(self.directory, f'word2vec_{dimension}d.quantized'),
+                                    'normed_path': os.path.join(self.directory, f'word2vec_{dimension}d.normed')}
+                        for dimension, config in model_loaders.Word2VecManagerSingleton.MODEL_CONFIG.items()}
+        missing_dir = os.path.join(self.directory, 'missing')
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(preprocessors, 'SPACY_MODEL_NAME', self.spacy_path))
+            stack.enter_context(mock.patch.object(model_loaders, 'VECTORIZER_PATH', self.vectorizer_path))
+            stack.enter_context(mock.patch.object(model_loaders, 'SVM_MODEL_PATH', self.svm_model_path))
+            stack.enter_context(mock.patch.object(model_loaders, 'TFIDF_SVM_ARRAYS_DIR', missing_dir))
+            stack.enter_context(mock.patch.object(facade, 'DISTILLED_ENGINE_DIR', missing_dir))
+            stack.enter_context(mock.patch.dict(model_loaders.Word2VecManagerSingleton.MODEL_CONFIG, model_config))
+            stack.enter_context(isolated_model_singletons())
+            # Patched at the factory, so reset_model_singletons() in bench_cold_start rebuilds the stand-in.
+            stand_in_registry = registry.ModelRegistry(os.path.join(self.directory, 'registry'), poll_seconds=0)
+            stack.enter_context(mock.patch.object(registry.ModelRegistry, 'from_settings',
+                                                  return_value=stand_in_registry))
+            stack.enter_context(mock.patch.object(near_duplicates.NearDuplicateIndex, 'from_settings',
+                                                  return_value=None))
+            yield self
+
+
+class BenchmarkRunner:
+    def __init__(self, corpora: dict, repeat: int = 3, batch_size: int = 64, similarity_queries: int = 200,
+                 seed: int = 42, log=print):
+        self.corpora = corpora
+        self.repeat = repeat
+        self.batch_size = batch_size
+        self.similarity_queries = similarity_queries
+        self.seed = seed
+        self.log = log
+
+    def run(self) -> dict:
+        results = {}
+        results.update(self.bench_cold_start())
+        preprocessor = preprocessors.TextPreprocessor.get_instance()
+        classifier = facade.NewsClassifierFacade.get_instance()
+        classifier.result_cache = None
+        classifier.result_store = None
+        classifier.near_duplicate_index = None
+
+        for name, texts in self.corpora.items():
+            self.log(f"Benchmarking corpus '{name}' ({len(texts)} documents)...")
+            results[f'preprocess.{name}'] = self.time_each(preprocessor.get_processed_text_for_tfidf, texts)
+            results[f'classify.{name}'] = self.time_each(classifier.classify, texts)
+            results[f'classify_batch.{name}'] = self.bench_batch_throughput(classifier, texts)
+
+        results.update(self.bench_most_similar())
+        return results
+
+    def time_each(self, function, items) -> dict:
+        samples = []
+        for _ in range(self.repeat):
+            for item in items:
+                start_time = time.perf_counter()
+                function(item)
+                samples.append(time.perf_counter() - start_time)
+        return summarize(samples)
+
+    def bench_batch_throughput(self, classifier, texts) -> dict:
+        samples = []
+        for _ in range(self.repeat):
+            start_time = time.perf_counter()
+            classifier.classify_batch(texts, batch_size=self.batch_size)
+            samples.append(len(texts) / (time.perf_counter() - start_time))
+        return summarize(samples, unit='docs/s', better='higher')
+
+    def bench_cold_start(self) -> dict:
+        loaders = {
+            'preprocessor': preprocessors.TextPreprocessor.get_instance,
+            'tfidf_svm': model_loaders.TfidfSvmSingleton.get_instance,
+            'classifier': facade.NewsClassifierFacade.get_instance,
+        }
+        for dimension in model_loaders.Word2VecManagerSingleton.MODEL_CONFIG:
+            loaders[f'word2vec_{dimension}'] = (
+                lambda dimension=dimension: model_loaders.Word2VecManagerSingleton.get_instance()
+                .get_neighbour_index(dimension))
+
+        samples = {name: [] for name in loaders}
+        for _ in range(self.repeat):
+            reset_model_singletons()
+            for name, loader in loaders.items():
+                start_time = time.perf_counter()
+                loader()
+                samples[name].append(time.perf_counter() - start_time)
+        return {f'cold_start.{name}': summarize(values) for name, values in samples.items()}
+
+    def bench_most_similar(self) -> dict:
+        results = {}
+        manager = model_loaders.Word2VecManagerSingleton.get_instance()
+        rng = np.random.default_rng(self.seed)
+        for dimension in model_loaders.Word2VecManagerSingleton.MODEL_CONFIG:
+            index = manager.get_neighbour_index(dimension)
+            if index is None or not len(index.index_to_key):
+                self.log(f"Skipping most_similar for {dimension}D: no vectors available.")
+                continue
+            words = rng.choice(index.index_to_key, size=min(self.similarity_queries, len(index.index_to_key)),
+                               replace=False)
+            results[f'most_similar.{dimension}'] = self.time_each(lambda word: index.most_similar(word, topn=10),
+                                                                   words)
+        return results
+
+
+def benchmark_metadata(artifacts: str, corpora: dict, seed: int) -> dict:
+    import sklearn
+    import gensim
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'artifacts': artifacts,
+        'seed': seed,
+        'corpora': {name: len(texts) for name, texts in corpora.items()},
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': {'numpy': np.__version__, 'spacy': spacy.__version__, 'sklearn': sklearn.__version__,
+                     'gensim': gensim.__version__},
+    }
+
+
+def save_results(path: str, metadata: dict, results: dict) -> str:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'meta': metadata, 'results': results}, f, indent=2, sort_keys=True)
+    return path
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.2) -> list:
+    comparisons = []
+    for name, result in sorted(current['results'].items()):
+        reference = baseline['results'].get(name)
+        if reference is None or not reference['value']:
+            continue
+        if result['better'] == 'higher':
+            change = (reference['value'] - result['value']) / reference['value']
+        else:
+            change = (result['value'] - reference['value']) / reference['value']
+        comparisons.append({'name': name, 'baseline': reference['value'], 'current': result['value'],
+                            'unit': result['unit'], 'slowdown': change, 'regression': change > threshold})
+    return comparisons
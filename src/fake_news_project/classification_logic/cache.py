@@ -0,0 +1,181 @@
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from .conf import get_setting
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = None, max_bytes: int = None, sizeof=sys.getsizeof):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, size, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        size = self._sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+
+            while ((self.max_entries and len(self._entries) > self.max_entries)
+                   or (self.max_bytes and self._bytes > self.max_bytes)):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+        }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ClassificationResultCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600, shared_cache_alias: str = None,
+                 key_prefix: str = 'classification', normalizer=None):
+        self.normalizer = normalizer
+        self._local = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.ttl = ttl
+        self.shared_cache_alias = shared_cache_alias
+        self.key_prefix = key_prefix
+        self._model_version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls, normalizer=None):
+        config = get_setting('CLASSIFIER_RESULT_CACHE', {})
+        if not config.get('ENABLED', False):
+            return None
+        return cls(max_entries=config.get('MAX_ENTRIES', 10000),
+                   ttl=config.get('TTL', 3600),
+                   shared_cache_alias=config.get('SHARED_CACHE_ALIAS'),
+                   key_prefix=config.get('KEY_PREFIX', 'classification'),
+                   normalizer=normalizer)
+
+    def content_hash(self, text: str) -> str:
+        if self.normalizer:
+            text = self.normalizer(text)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def make_key(self, text: str, model_version) -> str:
+        return f"{self.key_prefix}:{model_version}:{self.content_hash(text)}"
+
+    def get(self, text: str, model_version):
+        self._check_model_version(model_version)
+        key = self.make_key(text, model_version)
+
+        result = self._local.get(key)
+        if result is not None:
+            self.hits += 1
+            return dict(result)
+
+        shared_cache = self._get_shared_cache()
+        if shared_cache is not None:
+            result = shared_cache.get(key)
+            if result is not None:
+                self._local.set(key, result)
+                self.hits += 1
+                self.shared_hits += 1
+                return dict(result)
+
+        self.misses += 1
+        return None
+
+    def set(self, text: str, model_version, result: dict):
+        self._check_model_version(model_version)
+        key = self.make_key(text, model_version)
+        result = dict(result)
+
+        self._local.set(key, result)
+        shared_cache = self._get_shared_cache()
+        if shared_cache is not None:
+            shared_cache.set(key, result, timeout=self.ttl)
+
+    def clear(self):
+        self._local.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'local_entries': len(self._local),
+            'model_version': self._model_version,
+        }
+
+    def _check_model_version(self, model_version):
+        if model_version == self._model_version:
+            return
+        with self._lock:
+            if model_version != self._model_version:
+                if self._model_version is not None:
+                    print(f"ResultCache: Model version changed to {model_version}. Clearing local cache.")
+                self._local.clear()
+                self._model_version = model_version
+
+    def _get_shared_cache(self):
+        if not self.shared_cache_alias:
+            return None
+        try:
+            from django.core.cache import caches
+            return caches[self.shared_cache_alias]
+        except Exception as e:
+            print(f"ResultCache: Shared cache '{self.shared_cache_alias}' unavailable - {e}")
+            return None
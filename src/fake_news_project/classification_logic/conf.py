@@ -0,0 +1,12 @@
+import os
+
+
+def get_setting(name: str, default=None):
+    try:
+        from django.conf import settings
+    except ImportError:
+        return default
+
+    if not settings.configured and not os.environ.get('DJANGO_SETTINGS_MODULE'):
+        return default
+    return getattr(settings, name, default)
@@ -0,0 +1,393 @@
+import os
+import ast
+import csv
+import json
+import shutil
+import sys
+from itertools import islice
+
+import numpy as np
+
+from .model_loaders import BASE_PROJECT_DIR
+
+PROCESSED_DATA_DIR = os.path.join(BASE_PROJECT_DIR, 'data', 'processed')
+CORPUS_MANIFEST_FILENAME = 'manifest.json'
+CORPUS_FORMAT_VERSION = 1
+COLUMN_KINDS = ('string', 'int', 'float', 'list')
+
+OFFSET_DTYPE = np.dtype('<i8')
+CODE_DTYPE = np.dtype('<u4')
+NUMERIC_DTYPES = {'int': np.dtype('<i8'), 'float': np.dtype('<f8')}
+
+
+class CorpusFormatError(ValueError):
+    pass
+
+
+def parse_list_literal(value):
+    try:
+        if isinstance(value, list):
+            return value
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError, TypeError):
+        return []
+
+
+class StringColumn:
+    """UTF-8 strings stored back to back, located through an offsets array of n_rows + 1 entries."""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return bytes(self.data[self.offsets[row]:self.offsets[row + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        return iter(self.slice(0, len(self)))
+
+    def slice(self, start: int, stop: int) -> list:
+        offsets = np.asarray(self.offsets[start:stop + 1]) - self.offsets[start]
+        raw = bytes(self.data[self.offsets[start]:self.offsets[stop]])
+        return [raw[begin:end].decode('utf-8') for begin, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+    def tolist(self) -> list:
+        return self.slice(0, len(self))
+
+
+class ListColumn:
+    """Lists of strings (or of fixed-width string tuples), dictionary-encoded.
+
+    Each token is a uint32 code into the column's vocabulary; row r holds codes[offsets[r]:offsets[r + 1]]."""
+
+    def __init__(self, vocabulary: list, codes: np.ndarray, offsets: np.ndarray, width: int = None):
+        self.vocabulary = np.empty(len(vocabulary), dtype=object)
+        for code, token in enumerate(vocabulary):
+            self.vocabulary[code] = token
+        self.codes = codes
+        self.offsets = offsets
+        self.width = width
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> list:
+        return self.slice(row, row + 1)[0]
+
+    def __iter__(self):
+        for start in range(0, len(self), 4096):
+            yield from self.slice(start, min(start + 4096, len(self)))
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(np.asarray(self.offsets))
+
+    def token_ids(self, row: int) -> np.ndarray:
+        return self.codes[self.offsets[row]:self.offsets[row + 1]]
+
+    def slice(self, start: int, stop: int) -> list:
+        offsets = (np.asarray(self.offsets[start:stop + 1]) - self.offsets[start]).tolist()
+        tokens = self.vocabulary[np.asarray(self.codes[self.offsets[start]:self.offsets[stop]])].tolist()
+        return [tokens[begin:end] for begin, end in zip(offsets[:-1], offsets[1:])]
+
+    def tolist(self) -> list:
+        return self.slice(0, len(self))
+
+    def documents(self, separator: str = ' '):
+        """Yields each row joined into one string, as the TF-IDF vectorizer expects."""
+        for tokens in self:
+            yield separator.join(tokens)
+
+
+class CorpusWriter:
+    """Appends rows column by column to flat files in a temporary directory, published atomically on close().
+
+    Column kinds are 'string', 'int', 'float' and 'list'; a list column stores tuples when its first
+    non-empty value holds tuples or lists."""
+
+    def __init__(self, directory: str, schema: dict):
+        unknown = {name: kind for name, kind in schema.items() if kind not in COLUMN_KINDS}
+        if unknown:
+            raise ValueError(f"Unknown column kinds {unknown}. Use one of {COLUMN_KINDS}.")
+        self.directory = os.path.abspath(directory)
+        self.schema = dict(schema)
+        self.n_rows = 0
+        self._temporary_directory = f"{self.directory}.tmp"
+        shutil.rmtree(self._temporary_directory, ignore_errors=True)
+        os.makedirs(self._temporary_directory)
+
+        self._files = {}
+        self._offsets = {}
+        self._vocabularies = {}
+        self._widths = {}
+        for name, kind in self.schema.items():
+            if kind == 'string':
+                self._files[name] = open(self._path(f'{name}.data.bin'), 'wb')
+            elif kind == 'list':
+                self._files[name] = open(self._path(f'{name}.codes.bin'), 'wb')
+                self._vocabularies[name] = {}
+                self._widths[name] = None
+            else:
+                self._files[name] = open(self._path(f'{name}.values.bin'), 'wb')
+            if kind in ('string', 'list'):
+                self._offsets[name] = open(self._path(f'{name}.offsets.bin'), 'wb')
+                self._offsets[name].write(np.zeros(1, dtype=OFFSET_DTYPE).tobytes())
+        self._positions = {name: 0 for name in self._offsets}
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self._temporary_directory, filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def append(self, rows: list):
+        """Appends a chunk of row dicts; missing values become '', NaN, 0 or []."""
+        if not rows:
+            return
+        for name, kind in self.schema.items():
+            values = [row.get(name) for row in rows]
+            if kind == 'string':
+                self._append_strings(name, values)
+            elif kind == 'list':
+                self._append_lists(name, values)
+            else:
+                self._append_numbers(name, kind, values)
+        self.n_rows += len(rows)
+
+    def _append_strings(self, name: str, values: list):
+        encoded = [('' if value is None else str(value)).encode('utf-8') for value in values]
+        self._files[name].write(b''.join(encoded))
+        self._write_offsets(name, [len(value) for value in encoded])
+
+    def _append_numbers(self, name: str, kind: str, values: list):
+        missing = 0 if kind == 'int' else np.nan
+        array = np.array([missing if value in (None, '') else value for value in values], dtype=NUMERIC_DTYPES[kind])
+        self._files[name].write(array.tobytes())
+
+    def _append_lists(self, name: str, values: list):
+        vocabulary = self._vocabularies[name]
+        codes = []
+        lengths = []
+        for tokens in values:
+            tokens = tokens or []
+            if self._widths[name] is None and tokens:
+                self._widths[name] = len(tokens[0]) if isinstance(tokens[0], (list, tuple)) else 0
+            width = self._widths[name]
+            for token in tokens:
+                if width:
+                    if not isinstance(token, (list, tuple)) or len(token) != width:
+                        raise ValueError(f"Column '{name}' holds tuples of {width} strings, got {token!r}.")
+                    token = tuple(str(part) for part in token)
+                else:
+                    token = str(token)
+                code = vocabulary.get(token)
+                if code is None:
+                    code = vocabulary[token] = len(vocabulary)
+                codes.append(code)
+            lengths.append(len(tokens))
+        self._files[name].write(np.array(codes, dtype=CODE_DTYPE).tobytes())
+        self._write_offsets(name, lengths)
+
+    def _write_offsets(self, name: str, lengths: list):
+        offsets = self._positions[name] + np.cumsum(lengths, dtype=OFFSET_DTYPE)
+        if len(offsets):
+            self._positions[name] = int(offsets[-1])
+        self._offsets[name].write(offsets.astype(OFFSET_DTYPE).tobytes())
+
+    def close(self):
+        columns = {}
+        for name, kind in self.schema.items():
+            self._files[name].close()
+            if name in self._offsets:
+                self._offsets[name].close()
+            column = {'kind': kind}
+            if kind == 'list':
+                vocabulary = list(self._vocabularies[name])
+                with open(self._path(f'{name}.vocabulary.json'), 'w', encoding='utf-8') as f:
+                    json.dump(vocabulary, f, ensure_ascii=False)
+                column.update(width=self._widths[name] or None, tokens=self._positions[name],
+                              vocabulary_size=len(vocabulary))
+            elif kind == 'string':
+                column['bytes'] = self._positions[name]
+            columns[name] = column
+
+        manifest = {'format_version': CORPUS_FORMAT_VERSION, 'n_rows': self.n_rows, 'columns': columns}
+        with open(self._path(CORPUS_MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(self._temporary_directory, self.directory)
+        print(f"CorpusWriter: Wrote {self.n_rows} rows with columns {list(columns)} to {self.directory}.")
+
+    def abort(self):
+        for handle in list(self._files.values()) + list(self._offsets.values()):
+            handle.close()
+        shutil.rmtree(self._temporary_directory, ignore_errors=True)
+
+
+class CorpusStore:
+    """Read side of the columnar corpus. Columns are memory-mapped and only opened when first requested."""
+
+    def __init__(self, directory: str, mmap: bool = True):
+        self.directory = directory
+        self.mmap = mmap
+        with open(os.path.join(directory, CORPUS_MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != CORPUS_FORMAT_VERSION:
+            raise ValueError(f"Corpus at {directory} has format version {self.manifest.get('format_version')}, "
+                             f"expected {CORPUS_FORMAT_VERSION}.")
+        self._columns = {}
+
+    def __len__(self):
+        return self.manifest['n_rows']
+
+    @property
+    def columns(self) -> list:
+        return list(self.manifest['columns'])
+
+    def _array(self, filename: str, dtype: np.dtype, count: int) -> np.ndarray:
+        path = os.path.join(self.directory, filename)
+        if not count:
+            return np.zeros(0, dtype=dtype)
+        if self.mmap:
+            return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+        return np.fromfile(path, dtype=dtype, count=count)
+
+    def column(self, name: str):
+        if name not in self._columns:
+            if name not in self.manifest['columns']:
+                raise KeyError(f"Corpus at {self.directory} has no column '{name}'. Columns: {self.columns}.")
+            self._columns[name] = self._open_column(name, self.manifest['columns'][name])
+        return self._columns[name]
+
+    def _open_column(self, name: str, column: dict):
+        kind = column['kind']
+        n_rows = len(self)
+        if kind in NUMERIC_DTYPES:
+            return self._array(f'{name}.values.bin', NUMERIC_DTYPES[kind], n_rows)
+
+        offsets = self._array(f'{name}.offsets.bin', OFFSET_DTYPE, n_rows + 1)
+        if kind == 'string':
+            return StringColumn(self._array(f'{name}.data.bin', np.dtype('u1'), column['bytes']), offsets)
+
+        with open(os.path.join(self.directory, f'{name}.vocabulary.json'), 'r', encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        if column.get('width'):
+            vocabulary = [tuple(token) for token in vocabulary]
+        return ListColumn(vocabulary, self._array(f'{name}.codes.bin', CODE_DTYPE, column['tokens']), offsets,
+                          width=column.get('width'))
+
+    def __getitem__(self, name: str):
+        return self.column(name)
+
+    def read(self, columns=None, start: int = 0, stop: int = None) -> dict:
+        """Materializes rows [start, stop) of the projected columns as lists (text) or numpy arrays (numbers)."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        chunk = {}
+        for name in (columns or self.columns):
+            column = self.column(name)
+            chunk[name] = np.array(column[start:stop]) if isinstance(column, np.ndarray) else column.slice(start, stop)
+        return chunk
+
+    def iter_chunks(self, columns=None, chunk_size: int = 1024):
+        for start in range(0, len(self), chunk_size):
+            yield self.read(columns, start, start + chunk_size)
+
+    def nbytes(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.directory, filename)) for filename in os.listdir(self.directory))
+
+
+def csv_rows(csv_path: str):
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def detect_format(path: str) -> str:
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def iter_corpus_rows(path: str, input_format: str, text_field: str, id_field: str = None):
+    """Yields (row number, id, text) from a raw CSV or JSONL corpus without loading it into memory."""
+    if input_format == 'csv':
+        records = csv_rows(path)
+    else:
+        records = iter_jsonl_records(path)
+
+    for row_number, record in enumerate(records):
+        if text_field not in record:
+            raise CorpusFormatError(f"Row {row_number} has no '{text_field}' field.")
+        yield row_number, record.get(id_field) if id_field else None, record[text_field] or ''
+
+
+def iter_jsonl_records(path: str):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def infer_csv_schema(csv_path: str, list_columns=None) -> dict:
+    """Classifies every CSV column as 'list' (Python list literals), 'int', 'float' or 'string'."""
+    candidates = None
+    for row in csv_rows(csv_path):
+        if candidates is None:
+            candidates = {name: {'list', 'int', 'float'} for name in row}
+        for name, value in row.items():
+            value = (value or '').strip()
+            if not value:
+                candidates[name].discard('int')
+                continue
+            if not candidates[name]:
+                continue
+            if not value.startswith('['):
+                candidates[name].discard('list')
+            if 'float' in candidates[name]:
+                try:
+                    float(value)
+                except ValueError:
+                    candidates[name] -= {'int', 'float'}
+            if 'int' in candidates[name]:
+                try:
+                    int(value)
+                except ValueError:
+                    candidates[name].discard('int')
+
+    schema = {}
+    for name, kinds in (candidates or {}).items():
+        if list_columns is not None:
+            kinds = kinds & {'list'} if name in list_columns else kinds - {'list'}
+        schema[name] = next((kind for kind in ('list', 'int', 'float') if kind in kinds), 'string')
+    return schema
+
+
+def convert_csv(csv_path: str, directory: str, list_columns=None, chunk_rows: int = 2048) -> CorpusStore:
+    """One-time conversion of a preprocessed CSV whose list columns hold Python literals."""
+    schema = infer_csv_schema(csv_path, list_columns)
+    with CorpusWriter(directory, schema) as writer:
+        chunk = []
+        for row in csv_rows(csv_path):
+            chunk.append({name: parse_list_literal(row[name]) if kind == 'list' and row[name] else row[name]
+                          for name, kind in schema.items()})
+            if len(chunk) >= chunk_rows:
+                writer.append(chunk)
+                chunk = []
+        writer.append(chunk)
+    return CorpusStore(directory)
@@ -0,0 +1,245 @@
+import os
+import csv
+import threading
+from itertools import chain, repeat
+
+import numpy as np
+from scipy import sparse
+
+from .conf import get_setting
+from .model_loaders import BASE_PROJECT_DIR
+
+ROEMOLEX_DIR = os.path.join(BASE_PROJECT_DIR, 'data', 'external', 'roemolex')
+ROEMOLEX_WORDS_PATH = os.path.join(ROEMOLEX_DIR, 'RoEmoLex_V3_pos (sept2021).csv')
+ROEMOLEX_EXPRESSIONS_PATH = os.path.join(ROEMOLEX_DIR, 'RoEmoLex_V3_expr (sept2021).csv')
+
+EMOTION_COLUMNS = ('Anger', 'Anticipation', 'Disgust', 'Fear', 'Joy', 'Sadness', 'Surprise', 'Trust')
+POLARITY_COLUMNS = ('Positivity', 'Negativity')
+SCORE_COLUMNS = EMOTION_COLUMNS + POLARITY_COLUMNS
+EMOTION_PRIORITY = ('Anger', 'Disgust', 'Fear', 'Sadness', 'Surprise', 'Anticipation', 'Joy', 'Trust')
+
+ROMANIAN_SCORE_COLUMNS = {
+    'Pozitivitate': 'Positivity', 'Negativitate': 'Negativity', 'Furie': 'Anger', 'Anticipare': 'Anticipation',
+    'Dezgust': 'Disgust', 'Frica': 'Fear', 'Bucurie': 'Joy', 'Tristete': 'Sadness', 'Surpriza': 'Surprise',
+    'Incredere': 'Trust',
+}
+
+MATCHED_COLUMN = 'matched_emotion_words'
+MEAN_COLUMNS = tuple(f'{emotion.lower()}_mean' for emotion in EMOTION_COLUMNS)
+SENTIMENT_COUNT_COLUMNS = ('num_positive_specific_words', 'num_negative_specific_words', 'num_neutral_sentiment_words')
+SENTIMENT_PERCENTAGE_COLUMNS = ('percentage_positive_specific', 'percentage_negative_specific',
+                                'percentage_neutral_sentiment')
+EXCLUSIVE_COLUMNS = tuple(f'{column}_exclusive' for column in SCORE_COLUMNS) + ('matched_exclusive_emotion_words',)
+
+FEATURE_COLUMNS = (SCORE_COLUMNS + (MATCHED_COLUMN,) + MEAN_COLUMNS + SENTIMENT_COUNT_COLUMNS
+                   + SENTIMENT_PERCENTAGE_COLUMNS + EXCLUSIVE_COLUMNS)
+
+
+def read_roemolex_csv(path: str):
+    with open(path, encoding='utf-8', newline='') as f:
+        reader = csv.reader(f, delimiter=';')
+        header = [ROMANIAN_SCORE_COLUMNS.get(column, column) for column in next(reader)]
+        word_index = header.index('word')
+        score_indices = [header.index(column) for column in SCORE_COLUMNS]
+        for row in reader:
+            if len(row) <= max(word_index, *score_indices) or not row[word_index].strip():
+                continue
+            scores = []
+            for index in score_indices:
+                try:
+                    scores.append(int(float(row[index])))
+                except ValueError:
+                    scores.append(0)
+            yield row[word_index].strip().lower(), scores
+
+
+class EmotionLexicon:
+    """RoEmoLex compiled into sorted token arrays and an array-backed trie for multi-word expressions.
+
+    ``score_batch`` reproduces the notebooks' ``calculate_emotion_scores``, ``get_article_sentiment_specific_counts``
+    and ``calculate_exclusive_emotion_counts_per_doc`` for a whole batch of lowercase lemma lists: lemmas are mapped to
+    token ids in one pass, expressions are matched leftmost-longest by walking the trie one level at a time for every
+    position at once, and per-document features come from a single sparse product of document/entry match counts with
+    the per-entry feature table.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls.from_settings()
+        return cls._instance
+
+    @classmethod
+    def from_settings(cls):
+        config = get_setting('EMOTION_LEXICON', {})
+        skip_tokens = None
+        if config.get('SKIP_STOP_WORDS', True):
+            from spacy.lang.ro.stop_words import STOP_WORDS
+            skip_tokens = STOP_WORDS
+        return cls.from_csv(config.get('WORDS_PATH', ROEMOLEX_WORDS_PATH),
+                            config.get('EXPRESSIONS_PATH', ROEMOLEX_EXPRESSIONS_PATH), skip_tokens=skip_tokens)
+
+    @classmethod
+    def from_csv(cls, words_path: str, expressions_path: str = None, skip_tokens=None):
+        entries = []
+        for path in (words_path, expressions_path):
+            if not path:
+                continue
+            if not os.path.exists(path):
+                print(f"EmotionLexicon: ERROR - RoEmoLex file not found at {path}.")
+                continue
+            entries.extend(read_roemolex_csv(path))
+        lexicon = cls(entries, skip_tokens=skip_tokens)
+        print(f"EmotionLexicon: Compiled {lexicon.n_entries} entries "
+              f"({lexicon.n_expressions} multi-word expressions).")
+        return lexicon
+
+    def __init__(self, entries, skip_tokens=None):
+        token_lists, scores, is_expression, seen = [], [], [], set()
+        for phrase, entry_scores in entries:
+            words = phrase.split()
+            tokens = tuple(token for token in words if not skip_tokens or token not in skip_tokens)
+            if tokens and tokens not in seen:
+                seen.add(tokens)
+                token_lists.append(tokens)
+                scores.append(entry_scores)
+                is_expression.append(len(words) > 1)
+
+        self.vocabulary = np.array(sorted({token for tokens in token_lists for token in tokens}), dtype=str)
+        self._token_index = token_ids = {token: index for index, token in enumerate(self.vocabulary.tolist())}
+        self.n_entries = len(token_lists)
+        self.scores = np.array(scores, dtype=np.int16).reshape(-1, len(SCORE_COLUMNS))
+        self.entry_is_expression = np.array(is_expression, dtype=bool)
+        self.entry_features = self._build_entry_features(self.scores)
+
+        self.word_entries = np.full(len(self.vocabulary), -1, dtype=np.int64)
+        transitions, node_entries = {}, [-1]
+        for entry_id, tokens in enumerate(token_lists):
+            if len(tokens) == 1:
+                self.word_entries[token_ids[tokens[0]]] = entry_id
+                continue
+            node = 0
+            for token in tokens:
+                node = transitions.setdefault((node, token_ids[token]), len(node_entries))
+                if node == len(node_entries):
+                    node_entries.append(-1)
+            node_entries[node] = entry_id
+
+        self.n_expressions = sum(1 for tokens in token_lists if len(tokens) > 1)
+        self.max_expression_length = max((len(tokens) for tokens in token_lists), default=0)
+        keys = np.array([node * len(self.vocabulary) + token for node, token in transitions], dtype=np.int64)
+        order = np.argsort(keys)
+        self._transition_keys = keys[order]
+        self._transition_children = np.array(list(transitions.values()), dtype=np.int64)[order]
+        self._node_entries = np.array(node_entries, dtype=np.int64)
+
+    @staticmethod
+    def _build_entry_features(scores: np.ndarray) -> np.ndarray:
+        emotions = scores[:, :len(EMOTION_COLUMNS)]
+        positive = scores[:, SCORE_COLUMNS.index('Positivity')] > 0
+        negative = scores[:, SCORE_COLUMNS.index('Negativity')] > 0
+
+        exclusive = np.zeros_like(emotions)
+        priority = [EMOTION_COLUMNS.index(emotion) for emotion in EMOTION_PRIORITY]
+        has_emotion = (emotions > 0).any(axis=1)
+        first_emotion = np.array(priority)[(emotions[:, priority] > 0).argmax(axis=1)]
+        exclusive[has_emotion, first_emotion[has_emotion]] = 1
+
+        return np.column_stack([
+            scores,
+            np.ones(len(scores)),
+            positive & ~negative, negative & ~positive, positive & negative,
+            exclusive, scores[:, len(EMOTION_COLUMNS):], has_emotion,
+        ]).astype(np.float64)
+
+    def _token_ids(self, lemmas: list) -> np.ndarray:
+        return np.fromiter(map(self._token_index.get, lemmas, repeat(-1)), dtype=np.int64, count=len(lemmas))
+
+    def _match_expressions(self, token_ids: np.ndarray, document_ids: np.ndarray):
+        starts = np.flatnonzero(token_ids >= 0)
+        if not len(self._transition_keys) or not len(starts):
+            return starts[:0], starts[:0], starts[:0]
+
+        nodes = np.zeros(len(starts), dtype=np.int64)
+        lengths = np.zeros(len(starts), dtype=np.int64)
+        entries = np.full(len(starts), -1, dtype=np.int64)
+        active = np.arange(len(starts))
+        for depth in range(self.max_expression_length):
+            positions = starts[active] + depth
+            inside = positions < len(token_ids)
+            active, positions = active[inside], positions[inside]
+            valid = (token_ids[positions] >= 0) & (document_ids[positions] == document_ids[starts[active]])
+            active, positions = active[valid], positions[valid]
+
+            keys = nodes[active] * len(self.vocabulary) + token_ids[positions]
+            found_at = np.searchsorted(self._transition_keys, keys)
+            found_at[found_at == len(self._transition_keys)] = 0
+            found = self._transition_keys[found_at] == keys
+            active = active[found]
+            if not len(active):
+                break
+            nodes[active] = self._transition_children[found_at[found]]
+
+            node_entries = self._node_entries[nodes[active]]
+            terminal = node_entries >= 0
+            lengths[active[terminal]] = depth + 1
+            entries[active[terminal]] = node_entries[terminal]
+
+        matched = np.flatnonzero(lengths)
+        chosen, covered_until = [], -1
+        for index in matched:
+            if starts[index] >= covered_until:
+                chosen.append(index)
+                covered_until = starts[index] + lengths[index]
+        chosen = np.array(chosen, dtype=np.int64)
+        return starts[chosen], lengths[chosen], entries[chosen]
+
+    def match_counts(self, lemma_lists, expressions: bool = True):
+        lemma_lists = [list(lemmas) if lemmas else [] for lemmas in lemma_lists]
+        document_lengths = [len(lemmas) for lemmas in lemma_lists]
+        token_ids = self._token_ids(list(chain.from_iterable(lemma_lists)))
+        document_ids = np.repeat(np.arange(len(lemma_lists), dtype=np.int64), document_lengths)
+
+        if expressions:
+            expression_starts, expression_lengths, expression_entries = self._match_expressions(token_ids, document_ids)
+        else:
+            expression_starts = expression_lengths = expression_entries = np.zeros(0, dtype=np.int64)
+        covered = np.zeros(len(token_ids), dtype=bool)
+        if len(expression_starts):
+            covered[np.repeat(expression_starts, expression_lengths)
+                    + np.arange(expression_lengths.sum())
+                    - np.repeat(np.cumsum(expression_lengths) - expression_lengths, expression_lengths)] = True
+
+        word_positions = np.flatnonzero((token_ids >= 0) & ~covered)
+        word_entries = self.word_entries[token_ids[word_positions]]
+        matched = word_entries >= 0
+        if not expressions:
+            matched[matched] = ~self.entry_is_expression[word_entries[matched]]
+        word_positions, word_entries = word_positions[matched], word_entries[matched]
+
+        rows = np.concatenate([document_ids[word_positions], document_ids[expression_starts]])
+        columns = np.concatenate([word_entries, expression_entries])
+        return sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(len(lemma_lists), self.n_entries))
+
+    def score_batch(self, lemma_lists, columns=FEATURE_COLUMNS, expressions: bool = True) -> np.ndarray:
+        totals = np.asarray(self.match_counts(lemma_lists, expressions=expressions) @ self.entry_features)
+        n_scores = len(SCORE_COLUMNS)
+        scores, matched = totals[:, :n_scores], totals[:, n_scores]
+        sentiment_counts = totals[:, n_scores + 1:n_scores + 4]
+        exclusive = totals[:, n_scores + 4:]
+
+        means = scores[:, :len(EMOTION_COLUMNS)] / np.maximum(matched, 1)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentages = np.where(matched[:, None] > 0, sentiment_counts / matched[:, None] * 100, 0.0)
+        features = np.column_stack([scores, matched, means, sentiment_counts, percentages, exclusive])
+        if columns is FEATURE_COLUMNS:
+            return features
+        return features[:, [FEATURE_COLUMNS.index(column) for column in columns]]
+
+    def score(self, lemmas) -> dict:
+        return dict(zip(FEATURE_COLUMNS, self.score_batch([lemmas])[0].tolist()))
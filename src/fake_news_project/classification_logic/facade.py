@@ -1,58 +1,409 @@
 import os
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
 
-from .model_loaders import TfidfSvmSingleton
+import numpy as np
+
+from .cache import ClassificationResultCache
+from .conf import get_setting
+from .hybrid import HybridClassifier
+from .inference import build_inference_engine, EngineUnavailableError, ExactSvcEngine
+from .metrics import classification_stage_seconds
+from .model_loaders import TfidfSvmSingleton, DISTILLED_ENGINE_DIR
+from .near_duplicates import NearDuplicateIndex
 
 from .preprocessors import TextPreprocessor
+from .store import ClassificationStore
+from .tfidf import CompiledTfidfTransform, StreamingTfidfAccumulator
 
 
 class NewsClassifierFacade:
-    def __init__(self):
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, model_singleton=None, record_metrics: bool = True):
         print("NewsClassifierFacade: Initializing...")
-        model_singleton = TfidfSvmSingleton.get_instance()
+        model_singleton = model_singleton or TfidfSvmSingleton.get_instance()
         self.vectorizer = model_singleton.get_vectorizer()
         self.svm_model = model_singleton.get_svm_model()
         self.label_mapping = model_singleton.get_label_mapping()
+        self.model_version = model_singleton.get_model_version()
+        engine_name = get_setting('CLASSIFIER_INFERENCE_ENGINE', 'exact')
+        self.hybrid_classifier = self._load_hybrid_classifier() if engine_name == HybridClassifier.name else None
+        if self.hybrid_classifier:
+            self.inference_engine = ExactSvcEngine(self.svm_model)
+            self.model_version = f"{self.hybrid_classifier.model_version}+{HybridClassifier.name}"
+        else:
+            self.inference_engine = self._build_inference_engine(engine_name)
+            if self.inference_engine.name != 'exact':
+                self.model_version = f"{self.model_version}+{self.inference_engine.name}"
+        self.tfidf_transform = self._compile_tfidf_transform() if get_setting('TFIDF_DIRECT_TRANSFORM', False) else None
         self.preprocessor = TextPreprocessor.get_instance()
+        streaming_config = get_setting('CLASSIFIER_STREAMING', {})
+        self.streaming_threshold = streaming_config.get('THRESHOLD_CHARS', 100000)
+        self.streaming_chunk_chars = streaming_config.get('CHUNK_CHARS', 20000)
+        self.max_text_chars = streaming_config.get('MAX_CHARS')
+        self.result_cache = ClassificationResultCache.from_settings(normalizer=TextPreprocessor.clean_text)
+        self.result_store = ClassificationStore.from_settings(normalizer=TextPreprocessor.clean_text)
+        self.near_duplicate_index = NearDuplicateIndex.get_instance()
+        self.shadow_scorer = None
+        self.record_metrics = record_metrics
 
-        if not self.vectorizer or not self.svm_model:
+        if not self._models_available():
             print("NewsClassifierFacade: WARNING - Vectorizer or SVM model not loaded.")
         print("NewsClassifierFacade: Initialization complete.")
 
-    def classify(self, text: str) -> dict:
+    def _build_inference_engine(self, engine_name: str):
+        if engine_name != 'exact' and self.svm_model:
+            try:
+                engine = build_inference_engine(engine_name, self.svm_model, model_version=self.model_version,
+                                                distilled_dir=DISTILLED_ENGINE_DIR)
+                print(f"NewsClassifierFacade: Using the '{engine.name}' inference engine.")
+                return engine
+            except EngineUnavailableError as e:
+                print(f"NewsClassifierFacade: WARNING - {e} Falling back to the exact SVC engine.")
+        return ExactSvcEngine(self.svm_model)
+
+    def _load_hybrid_classifier(self):
+        try:
+            hybrid_classifier = HybridClassifier.get_instance()
+            print("NewsClassifierFacade: Using the 'hybrid' Doc2Vec classifier.")
+            return hybrid_classifier
+        except EngineUnavailableError as e:
+            print(f"NewsClassifierFacade: WARNING - {e} Falling back to the exact SVC engine.")
+            return None
+
+    def _models_available(self) -> bool:
+        return bool(self.hybrid_classifier or (self.vectorizer and self.svm_model))
+
+    def _compile_tfidf_transform(self):
+        if not self.vectorizer:
+            return None
+        try:
+            return CompiledTfidfTransform.from_vectorizer(self.vectorizer)
+        except (ValueError, AttributeError, TypeError) as e:
+            print(f"NewsClassifierFacade: Direct TF-IDF transform unavailable ({e}). Using vectorizer.transform.")
+            return None
+
+    def _preprocess(self, text: str):
+        if self.tfidf_transform:
+            return self.preprocessor.get_lemmas_for_tfidf(text)
+        return self.preprocessor.get_processed_text_for_tfidf(text)
+
+    def _iter_preprocessed(self, texts, batch_size: int, n_process: int):
+        if self.tfidf_transform:
+            return self.preprocessor.iter_lemma_lists_for_tfidf(texts, batch_size=batch_size, n_process=n_process)
+        return self.preprocessor.iter_processed_texts_for_tfidf(texts, batch_size=batch_size, n_process=n_process)
+
+    def _vectorize(self, processed_texts: list):
+        if self.tfidf_transform:
+            return self.tfidf_transform.transform(processed_texts)
+        return self.vectorizer.transform(processed_texts)
+
+    def _uses_streaming(self, text: str) -> bool:
+        if self.hybrid_classifier:
+            return False
+        return bool(self.streaming_threshold) and len(text) > self.streaming_threshold and not self.vectorizer.binary
+
+    def _vectorize_streaming(self, text: str):
+        count_matrix = self.tfidf_transform.count_matrix if self.tfidf_transform else None
+        accumulator = StreamingTfidfAccumulator(self.vectorizer, count_matrix=count_matrix)
+        for lemmas in self.preprocessor.iter_lemma_chunks_for_tfidf(text, self.streaming_chunk_chars):
+            accumulator.add(lemmas)
+        return accumulator.transform()
+
+    def _input_error(self, text: str):
         if not text or not text.strip():
             return {'classification_result': "ERROR", 'message': "No content submitted."}
+        if self.max_text_chars and len(text) > self.max_text_chars:
+            return {'classification_result': "ERROR",
+                    'message': f"Text is too long to classify (limit is {self.max_text_chars} characters)."}
+        return None
+
+    def classify(self, text: str) -> dict:
+        input_error = self._input_error(text)
+        if input_error:
+            return input_error
 
-        if not self.vectorizer or not self.svm_model:
+        if not self._models_available():
             return {'classification_result': "ERROR", 'message': "Model components are not available."}
 
-        try:
-            processed_text = self.preprocessor.get_processed_text_for_tfidf(text)
-            if not processed_text:
-                return {'classification_result': 'MANUAL_VERIFICATION', 'confidence': 0.0,
-                        'message': 'Text has no content after preprocessing. Needs manual check.'}
+        cached_result = self._lookup_cached([text])[0]
+        if cached_result is not None:
+            self._observe_shadow([text], [cached_result])
+            return cached_result
 
-            text_vector = self.vectorizer.transform([processed_text])
+        timings = {}
+        with self._stage('total', 'single', timings):
+            result_data, probabilities = self._classify_text(text, timings)
+        self._cache_result(text, result_data)
+        self._record_result(text, result_data, probabilities, timings)
+        self._observe_shadow([text], [result_data])
+        return result_data
 
-            probabilities = self.svm_model.predict_proba(text_vector)[0]
+    def _classify_text(self, text: str, timings: dict = None):
+        try:
+            if self.hybrid_classifier:
+                with self._stage('hybrid', 'single', timings):
+                    probabilities, lemma_counts = self.hybrid_classifier.score([text], record_metrics=self.record_metrics)
+                if not lemma_counts[0]:
+                    return self._no_content_result(), None
+                return self._build_result(probabilities[0]), probabilities[0]
 
-            confidence = max(probabilities)
-            top_class_index = probabilities.argmax()
-            top_label = self.label_mapping.get(top_class_index, "UNKNOWN")
+            signature = None
+            if self._uses_streaming(text):
+                with self._stage('streaming', 'single', timings):
+                    text_vector = self._vectorize_streaming(text)
+            else:
+                with self._stage('preprocess', 'single', timings):
+                    processed_text = self._preprocess(text)
+                text_vector = None
+                if processed_text:
+                    with self._stage('near_duplicate', 'single', timings):
+                        signature = self._near_duplicate_signature(processed_text)
+                        duplicate_result, probabilities = self._near_duplicate_result(signature)
+                    if duplicate_result:
+                        return duplicate_result, probabilities
+                    with self._stage('tfidf', 'single', timings):
+                        text_vector = self._vectorize([processed_text])
 
-            result_data = {'confidence': confidence}
+            if text_vector is None:
+                return self._no_content_result(), None
 
-            if confidence > 0.80:
-                result_data['classification_result'] = top_label
-            elif 0.60 <= confidence <= 0.80:
-                result_data['classification_result'] = top_label
-                all_probs = {self.label_mapping.get(i, "UNKNOWN"): prob
-                             for i, prob in enumerate(probabilities)}
-                result_data['all_predictions'] = sorted(all_probs.items(), key=lambda item: item[1], reverse=True)
-            else:
-                result_data['classification_result'] = 'MANUAL_VERIFICATION'
+            with self._stage('inference', 'single', timings):
+                probabilities = self.inference_engine.predict_proba(text_vector)[0]
 
-            return result_data
+            self._remember_near_duplicate(text, signature, probabilities)
+            return self._build_result(probabilities), probabilities
 
         except Exception as e:
             print(f"Facade: Error during classification - {str(e)}")
-            return {'classification_result': "ERROR", 'message': f"An error occurred during processing."}
+            return {'classification_result': "ERROR", 'message': f"An error occurred during processing."}, None
+
+    def classify_batch(self, texts, batch_size: int = 64, n_process: int = 1) -> list:
+        return list(self.iter_classify_batch(texts, batch_size=batch_size, n_process=n_process))
+
+    def iter_classify_batch(self, texts, batch_size: int = 64, n_process: int = 1):
+        texts = list(texts)
+        if not self._models_available():
+            for _ in texts:
+                yield {'classification_result': "ERROR", 'message': "Model components are not available."}
+            return
+
+        results = [self._input_error(text) for text in texts]
+        lookup_indices = [index for index, result in enumerate(results) if result is None]
+        cached_results = self._lookup_cached([texts[index] for index in lookup_indices])
+        for index, cached_result in zip(lookup_indices, cached_results):
+            results[index] = cached_result
+
+        pending_indices = []
+        streamed_indices = set()
+        for index in lookup_indices:
+            if results[index] is None:
+                if self._uses_streaming(texts[index]):
+                    streamed_indices.add(index)
+                else:
+                    pending_indices.append(index)
+
+        processed_texts = self._iter_pending_preprocessed(texts, pending_indices, batch_size, n_process)
+        for start in range(0, len(texts), batch_size):
+            chunk_indices = range(start, min(start + batch_size, len(texts)))
+            self._classify_one_by_one(texts, sorted(streamed_indices.intersection(chunk_indices)), results)
+            chunk_pending = [index for index in chunk_indices if results[index] is None]
+            if chunk_pending:
+                try:
+                    if self.hybrid_classifier:
+                        self._score_hybrid_chunk(texts, chunk_pending, results)
+                    else:
+                        self._score_chunk(texts, chunk_pending, islice(processed_texts, len(chunk_pending)), results)
+                except Exception as e:
+                    print(f"Facade: Error during batch classification - {str(e)}. Retrying the chunk one text at a "
+                          f"time.")
+                    self._classify_one_by_one(texts, [index for index in chunk_pending if results[index] is None],
+                                              results)
+                    # The failure may have exhausted the shared spaCy pipe, so later chunks get a fresh one.
+                    processed_texts.close()
+                    processed_texts = self._iter_pending_preprocessed(
+                        texts, [index for index in pending_indices if index >= chunk_indices.stop], batch_size,
+                        n_process)
+
+            self._observe_shadow([texts[index] for index in chunk_indices], [results[index] for index in chunk_indices])
+            for index in chunk_indices:
+                yield results[index] or {'classification_result': "ERROR",
+                                         'message': "An error occurred during processing."}
+                results[index] = None
+
+    def _iter_pending_preprocessed(self, texts, indices, batch_size: int, n_process: int):
+        if self.hybrid_classifier:
+            yield from ()
+            return
+        yield from self._iter_preprocessed((texts[index] for index in indices), batch_size=batch_size,
+                                           n_process=n_process)
+
+    def _classify_one_by_one(self, texts, indices, results):
+        for index in indices:
+            timings = {}
+            results[index], probabilities = self._classify_text(texts[index], timings)
+            self._cache_result(texts[index], results[index])
+            self._record_result(texts[index], results[index], probabilities, timings)
+
+    def _score_chunk(self, texts, chunk_indices, processed_texts, results):
+        timings = {}
+        with self._stage('preprocess', 'batch', timings):
+            processed_texts = list(processed_texts)
+
+        scored = []
+        for index, processed_text in zip(chunk_indices, processed_texts):
+            if processed_text:
+                scored.append((index, processed_text))
+            else:
+                results[index] = self._no_content_result()
+
+        signatures = {}
+        if self.near_duplicate_index is not None and scored:
+            remaining = []
+            with self._stage('near_duplicate', 'batch', timings):
+                for index, processed_text in scored:
+                    signatures[index] = self._near_duplicate_signature(processed_text)
+                    duplicate_result, probabilities = self._near_duplicate_result(signatures[index])
+                    if duplicate_result:
+                        results[index] = duplicate_result
+                        self._cache_result(texts[index], duplicate_result)
+                        self._record_result(texts[index], duplicate_result, probabilities, {})
+                    else:
+                        remaining.append((index, processed_text))
+            scored = remaining
+        if not scored:
+            return
+
+        with self._stage('tfidf', 'batch', timings):
+            text_vectors = self._vectorize([processed_text for _, processed_text in scored])
+        with self._stage('inference', 'batch', timings):
+            probabilities = self.inference_engine.predict_proba(text_vectors)
+
+        self._finish_chunk(texts, [index for index, _ in scored], probabilities, timings, results)
+        for (index, _), row_probabilities in zip(scored, probabilities):
+            self._remember_near_duplicate(texts[index], signatures.get(index), row_probabilities)
+
+    def _score_hybrid_chunk(self, texts, chunk_indices, results):
+        timings = {}
+        with self._stage('hybrid', 'batch', timings):
+            probabilities, lemma_counts = self.hybrid_classifier.score([texts[index] for index in chunk_indices],
+                                                                       record_metrics=self.record_metrics)
+
+        scored = []
+        for position, (index, lemma_count) in enumerate(zip(chunk_indices, lemma_counts)):
+            if lemma_count:
+                scored.append(position)
+            else:
+                results[index] = self._no_content_result()
+        self._finish_chunk(texts, [chunk_indices[position] for position in scored], probabilities[scored], timings,
+                           results)
+
+    def _finish_chunk(self, texts, scored_indices, probabilities, timings, results):
+        if not scored_indices:
+            return
+        document_timings = {stage: seconds / len(scored_indices) for stage, seconds in timings.items()}
+        for index, row_probabilities in zip(scored_indices, probabilities):
+            results[index] = self._build_result(row_probabilities)
+            self._cache_result(texts[index], results[index])
+            self._record_result(texts[index], results[index], row_probabilities, document_timings,
+                                batch_size=len(scored_indices))
+
+    def _near_duplicate_signature(self, processed_text):
+        if self.near_duplicate_index is None:
+            return None
+        lemmas = processed_text if isinstance(processed_text, list) else processed_text.split()
+        return self.near_duplicate_index.signature(lemmas)
+
+    def _near_duplicate_result(self, signature):
+        match = self.near_duplicate_index.query(signature, model_version=self.model_version) \
+            if signature is not None else None
+        if match is None:
+            return None, None
+        row, similarity = match
+        entry = self.near_duplicate_index.entries[row]
+        probabilities = np.asarray(entry['probabilities'])
+        result_data = self._build_result(probabilities)
+        result_data['near_duplicate'] = {'matched_id': entry['id'], 'similarity': similarity}
+        return result_data, probabilities
+
+    def _remember_near_duplicate(self, text: str, signature, probabilities):
+        if signature is not None:
+            self.near_duplicate_index.add(signature, {
+                'id': hashlib.sha256(TextPreprocessor.clean_text(text).encode('utf-8')).hexdigest(),
+                'model_version': self.model_version,
+                'probabilities': [float(probability) for probability in probabilities],
+            })
+
+    @staticmethod
+    def _no_content_result() -> dict:
+        return {'classification_result': 'MANUAL_VERIFICATION', 'confidence': 0.0,
+                'message': 'Text has no content after preprocessing. Needs manual check.'}
+
+    @contextmanager
+    def _stage(self, stage: str, path: str, timings: dict = None):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            if self.record_metrics:
+                classification_stage_seconds.observe(elapsed, stage=stage, path=path)
+            if timings is not None:
+                timings[stage] = timings.get(stage, 0.0) + elapsed
+
+    def _lookup_cached(self, texts) -> list:
+        results = [self.result_cache.get(text, self.model_version) if self.result_cache else None for text in texts]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if self.result_store and missing:
+            stored = self.result_store.lookup_many([texts[index] for index in missing], self.model_version)
+            for index, probabilities in zip(missing, stored):
+                if probabilities is not None:
+                    results[index] = self._build_result(np.asarray(probabilities))
+                    self._cache_result(texts[index], results[index])
+        return results
+
+    def _record_result(self, text: str, result_data: dict, probabilities, timings: dict, batch_size: int = 1):
+        if self.result_store and probabilities is not None:
+            self.result_store.record(text, self.model_version, result_data, probabilities, stage_timings=timings,
+                                     batch_size=batch_size)
+
+    def _observe_shadow(self, texts, results):
+        shadow_scorer = self.shadow_scorer
+        if shadow_scorer:
+            shadow_scorer.observe(texts, results)
+
+    def _cache_result(self, text: str, result_data: dict):
+        if self.result_cache and result_data.get('classification_result') != "ERROR":
+            self.result_cache.set(text, self.model_version, result_data)
+
+    def _build_result(self, probabilities) -> dict:
+        confidence = max(probabilities)
+        top_class_index = probabilities.argmax()
+        top_label = self.label_mapping.get(top_class_index, "UNKNOWN")
+
+        result_data = {'confidence': confidence}
+
+        if confidence > 0.80:
+            result_data['classification_result'] = top_label
+        elif 0.60 <= confidence <= 0.80:
+            result_data['classification_result'] = top_label
+            all_probs = {self.label_mapping.get(i, "UNKNOWN"): prob
+                         for i, prob in enumerate(probabilities)}
+            result_data['all_predictions'] = sorted(all_probs.items(), key=lambda item: item[1], reverse=True)
+        else:
+            result_data['classification_result'] = 'MANUAL_VERIFICATION'
+
+        return result_data
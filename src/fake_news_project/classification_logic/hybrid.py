@@ -0,0 +1,167 @@
+import os
+import hashlib
+import threading
+from collections import Counter
+from contextlib import nullcontext
+
+import numpy as np
+from spacy.attrs import POS
+from spacy.symbols import NOUN, VERB, ADJ, ADV
+
+from .cache import LRUCache
+from .conf import get_setting
+from .emotions import EmotionLexicon
+from .inference import EngineUnavailableError
+from .metrics import classification_stage_seconds
+from .model_loaders import (TfidfSvmSingleton, DOC2VEC_MODEL_PATH, HYBRID_SVM_MODEL_PATH, HYBRID_SCALER_PATH,
+                            HYBRID_KMEANS_PATH)
+from .preprocessors import TextPreprocessor, split_into_chunks
+
+LEXICAL_FEATURE_COLUMNS = ('word_count', 'vocabulary_richness', 'noun_prop', 'verb_prop', 'adj_prop', 'adv_prop',
+                           'total_entities', 'entity_density')
+EMOTION_FEATURE_COLUMNS = ('anger_mean', 'joy_mean', 'sadness_mean', 'trust_mean', 'anticipation_mean',
+                           'disgust_mean', 'fear_mean', 'surprise_mean', 'Positivity', 'Negativity',
+                           'matched_emotion_words', 'percentage_positive_specific', 'percentage_negative_specific')
+ENGINEERED_FEATURE_COLUMNS = LEXICAL_FEATURE_COLUMNS + EMOTION_FEATURE_COLUMNS
+
+PROPORTION_POS_TAGS = (NOUN, VERB, ADJ, ADV)
+COUNTED_ENTITY_LABELS = frozenset({'PERSON', 'NAT_REL_POL', 'ORGANIZATION', 'FACILITY', 'EVENT', 'MONEY', 'LOC'})
+
+
+def combine_features(document_vectors: np.ndarray, engineered: np.ndarray, scaler, kmeans) -> np.ndarray:
+    """Stacks the Doc2Vec vectors, the scaled engineered features and the k-means cluster id, in the column
+    order the hybrid SVM is trained on."""
+    clusters = kmeans.predict(document_vectors.astype(kmeans.cluster_centers_.dtype, copy=False))
+    return np.hstack((document_vectors, scaler.transform(engineered), clusters.reshape(-1, 1)))
+
+
+class HybridClassifier:
+    """Experiment B from classification_experiments.ipynb: an SVM over the inferred Doc2Vec vector, the scaled
+    engineered features and the k-means cluster id of the Doc2Vec vector."""
+
+    name = 'hybrid'
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls.from_settings()
+        return cls._instance
+
+    @classmethod
+    def from_settings(cls):
+        artifact_paths = (DOC2VEC_MODEL_PATH, HYBRID_SCALER_PATH, HYBRID_KMEANS_PATH, HYBRID_SVM_MODEL_PATH)
+        missing = [path for path in artifact_paths if not os.path.exists(path)]
+        if missing:
+            raise EngineUnavailableError(f"Hybrid classifier artifacts not found: {', '.join(missing)}. "
+                                         f"Run 'manage.py train_hybrid_classifier' to fit them.")
+
+        scaler = TfidfSvmSingleton._read_pickle(HYBRID_SCALER_PATH, 'hybrid feature scaler')
+        kmeans = TfidfSvmSingleton._read_pickle(HYBRID_KMEANS_PATH, 'hybrid k-means model')
+        svm_model = TfidfSvmSingleton._read_pickle(HYBRID_SVM_MODEL_PATH, 'hybrid SVM model')
+        if scaler is None or kmeans is None or svm_model is None:
+            raise EngineUnavailableError("Hybrid classifier artifacts could not be loaded.")
+        return cls.feature_extractor(scaler, kmeans, svm_model,
+                                     model_version=TfidfSvmSingleton._compute_model_version(*artifact_paths))
+
+    @classmethod
+    def feature_extractor(cls, scaler=None, kmeans=None, svm_model=None, model_version: str = None):
+        """Loads the spaCy pipeline, the Doc2Vec model and the emotion lexicon. The fitted estimators are
+        optional so train_hybrid_classifier can extract training features before they exist."""
+        from gensim.models import Doc2Vec
+
+        if not os.path.exists(DOC2VEC_MODEL_PATH):
+            raise EngineUnavailableError(f"Doc2Vec model not found at {DOC2VEC_MODEL_PATH}.")
+        nlp = TextPreprocessor._load_pipeline('full')
+        if nlp is None or 'ner' not in nlp.pipe_names:
+            raise EngineUnavailableError("The hybrid classifier needs the full spaCy pipeline, including NER.")
+
+        print(f"HybridClassifier: Loading Doc2Vec model from {DOC2VEC_MODEL_PATH}...")
+        doc2vec_model = Doc2Vec.load(DOC2VEC_MODEL_PATH)
+
+        config = get_setting('HYBRID_CLASSIFIER', {})
+        return cls(nlp, doc2vec_model, scaler, kmeans, svm_model, EmotionLexicon.get_instance(),
+                   infer_epochs=config.get('INFER_EPOCHS'),
+                   infer_cache_entries=config.get('INFER_CACHE_ENTRIES', 10000),
+                   batch_size=config.get('BATCH_SIZE', 64),
+                   chunk_chars=get_setting('CLASSIFIER_STREAMING', {}).get('CHUNK_CHARS', 20000),
+                   model_version=model_version)
+
+    def __init__(self, nlp, doc2vec_model, scaler, kmeans, svm_model, emotion_lexicon, infer_epochs: int = None,
+                 infer_cache_entries: int = 10000, batch_size: int = 64, chunk_chars: int = 20000,
+                 model_version: str = None):
+        self.nlp = nlp
+        self.doc2vec_model = doc2vec_model
+        self.scaler = scaler
+        self.kmeans = kmeans
+        self.svm_model = svm_model
+        self.emotion_lexicon = emotion_lexicon
+        self.infer_epochs = infer_epochs
+        self.batch_size = batch_size
+        self.chunk_chars = chunk_chars
+        self.model_version = model_version
+        self.infer_cache = LRUCache(max_entries=infer_cache_entries) if infer_cache_entries else None
+
+    def analyze(self, texts) -> list:
+        analyses = [{'lemmas': [], 'all_lemmas': [], 'pos_counts': Counter(), 'entities': 0} for _ in texts]
+        chunks = ((chunk, index) for index, text in enumerate(texts)
+                  for chunk in split_into_chunks(text, self.chunk_chars))
+        for doc, index in self.nlp.pipe(chunks, as_tuples=True, batch_size=self.batch_size):
+            analysis = analyses[index]
+            analysis['lemmas'].extend(TextPreprocessor._filter_lemmas(doc))
+            analysis['all_lemmas'].extend(token.lemma_.lower() for token in doc)
+            analysis['pos_counts'].update(doc.count_by(POS))
+            analysis['entities'] += sum(1 for entity in doc.ents if entity.label_ in COUNTED_ENTITY_LABELS)
+        return analyses
+
+    def engineered_features(self, analyses: list) -> np.ndarray:
+        lexical = np.zeros((len(analyses), len(LEXICAL_FEATURE_COLUMNS)))
+        for row, analysis in zip(lexical, analyses):
+            lemmas, n_tokens = analysis['lemmas'], max(len(analysis['all_lemmas']), 1)
+            row[0] = len(lemmas)
+            row[1] = len(set(lemmas)) / len(lemmas) if lemmas else 0
+            row[2:6] = [analysis['pos_counts'][tag] / n_tokens for tag in PROPORTION_POS_TAGS]
+            row[6] = analysis['entities']
+            row[7] = analysis['entities'] / n_tokens
+
+        emotions = self.emotion_lexicon.score_batch([analysis['all_lemmas'] for analysis in analyses],
+                                                    columns=EMOTION_FEATURE_COLUMNS, expressions=False)
+        return np.hstack([lexical, emotions])
+
+    def document_vectors(self, lemma_lists) -> np.ndarray:
+        vectors = np.empty((len(lemma_lists), self.doc2vec_model.vector_size), dtype=np.float32)
+        for row, lemmas in enumerate(lemma_lists):
+            key = hashlib.blake2b('\n'.join(lemmas).encode('utf-8'), digest_size=16).digest()
+            vector = self.infer_cache.get(key) if self.infer_cache is not None else None
+            if vector is None:
+                vector = self.doc2vec_model.infer_vector(lemmas, epochs=self.infer_epochs)
+                if self.infer_cache is not None:
+                    self.infer_cache.set(key, vector)
+            vectors[row] = vector
+        return vectors
+
+    def build_features(self, analyses: list) -> np.ndarray:
+        document_vectors = self.document_vectors([analysis['lemmas'] for analysis in analyses])
+        return combine_features(document_vectors, self.engineered_features(analyses), self.scaler, self.kmeans)
+
+    def score(self, texts, record_metrics: bool = True):
+        timer = classification_stage_seconds.time if record_metrics else lambda **labels: nullcontext()
+        with timer(stage='spacy', path='hybrid'):
+            analyses = self.analyze(texts)
+        with timer(stage='features', path='hybrid'):
+            features = self.build_features(analyses)
+        with timer(stage='inference', path='hybrid'):
+            probabilities = self.svm_model.predict_proba(features)
+        return probabilities, [len(analysis['lemmas']) for analysis in analyses]
+
+    def predict_proba(self, texts) -> np.ndarray:
+        return self.score(texts)[0]
+
+    def get_infer_cache_stats(self):
+        if self.infer_cache is None:
+            return None
+        return self.infer_cache.stats()
@@ -0,0 +1,192 @@
+import os
+import json
+
+import numpy as np
+from scipy import sparse
+
+INFERENCE_ENGINES = ('exact', 'linear', 'distilled')
+ENGINE_MANIFEST_FILENAME = 'manifest.json'
+
+LIBSVM_MIN_PROBABILITY = 1e-7
+
+
+class EngineUnavailableError(ValueError):
+    pass
+
+
+def pairwise_coupling(pairwise_probabilities: np.ndarray) -> np.ndarray:
+    """Vectorized port of libsvm's multiclass_probability (Wu, Lin and Weng, method 2)."""
+    n_samples, n_classes, _ = pairwise_probabilities.shape
+    r = pairwise_probabilities
+    Q = np.zeros((n_samples, n_classes, n_classes))
+    for t in range(n_classes):
+        for j in range(t):
+            Q[:, t, t] += r[:, j, t] * r[:, j, t]
+            Q[:, t, j] = Q[:, j, t]
+        for j in range(t + 1, n_classes):
+            Q[:, t, t] += r[:, j, t] * r[:, j, t]
+            Q[:, t, j] = -r[:, j, t] * r[:, t, j]
+
+    probabilities = np.full((n_samples, n_classes), 1.0 / n_classes)
+    eps = 0.005 / n_classes
+    active = np.arange(n_samples)
+    for _ in range(max(100, n_classes)):
+        if not len(active):
+            break
+        Q_active, p = Q[active], probabilities[active]
+        Qp = np.einsum('ntj,nj->nt', Q_active, p)
+        pQp = (p * Qp).sum(axis=1)
+
+        running = np.abs(Qp - pQp[:, None]).max(axis=1) >= eps
+        active, Q_active, p, Qp, pQp = active[running], Q_active[running], p[running], Qp[running], pQp[running]
+
+        for t in range(n_classes):
+            diff = (-Qp[:, t] + pQp) / Q_active[:, t, t]
+            p[:, t] += diff
+            pQp = (pQp + diff * (diff * Q_active[:, t, t] + 2 * Qp[:, t])) / (1 + diff) / (1 + diff)
+            Qp = (Qp + diff[:, None] * Q_active[:, t, :]) / (1 + diff)[:, None]
+            p /= (1 + diff)[:, None]
+        probabilities[active] = p
+    return probabilities
+
+
+def softmax(scores: np.ndarray) -> np.ndarray:
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exponentials = np.exp(scores)
+    return exponentials / exponentials.sum(axis=1, keepdims=True)
+
+
+def _as_dense(matrix) -> np.ndarray:
+    return matrix.toarray() if sparse.issparse(matrix) else np.asarray(matrix)
+
+
+class ExactSvcEngine:
+    name = 'exact'
+
+    def __init__(self, svm_model):
+        self.svm_model = svm_model
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.svm_model.predict_proba(X)
+
+
+class LinearSvcEngine:
+    name = 'linear'
+
+    def __init__(self, weights: np.ndarray, intercept: np.ndarray, prob_a: np.ndarray, prob_b: np.ndarray,
+                 n_classes: int):
+        self.weights = weights
+        self.intercept = intercept
+        self.prob_a = prob_a
+        self.prob_b = prob_b
+        self.n_classes = n_classes
+        self.pair_rows, self.pair_columns = np.triu_indices(n_classes, k=1)
+
+    @classmethod
+    def from_svc(cls, svm_model):
+        if getattr(svm_model, 'kernel', None) != 'linear':
+            raise EngineUnavailableError(f"The linear engine needs a linear-kernel SVC, "
+                                         f"got kernel '{getattr(svm_model, 'kernel', None)}'.")
+        if not len(getattr(svm_model, '_probA', ())):
+            raise EngineUnavailableError("The linear engine needs an SVC fitted with probability=True.")
+        if len(svm_model.classes_) < 3:
+            raise EngineUnavailableError("The linear engine only reproduces multiclass (one-vs-one) SVCs.")
+        return cls(np.ascontiguousarray(_as_dense(svm_model.coef_).T), svm_model.intercept_,
+                   svm_model._probA, svm_model._probB, len(svm_model.classes_))
+
+    def predict_proba(self, X) -> np.ndarray:
+        decision_values = np.asarray(X @ self.weights) + self.intercept
+
+        fApB = decision_values * self.prob_a + self.prob_b
+        pairwise = np.where(fApB >= 0, np.exp(-np.abs(fApB)) / (1.0 + np.exp(-np.abs(fApB))),
+                            1.0 / (1 + np.exp(-np.abs(fApB))))
+        pairwise = np.clip(pairwise, LIBSVM_MIN_PROBABILITY, 1 - LIBSVM_MIN_PROBABILITY)
+
+        r = np.zeros((len(pairwise), self.n_classes, self.n_classes))
+        r[:, self.pair_rows, self.pair_columns] = pairwise
+        r[:, self.pair_columns, self.pair_rows] = 1 - pairwise
+        return pairwise_coupling(r)
+
+
+class DistilledLinearEngine:
+    name = 'distilled'
+
+    def __init__(self, weights: np.ndarray, intercept: np.ndarray, teacher_model_version: str = None,
+                 metrics: dict = None):
+        self.weights = weights
+        self.intercept = intercept
+        self.teacher_model_version = teacher_model_version
+        self.metrics = metrics or {}
+
+    @classmethod
+    def fit(cls, X, teacher_probabilities: np.ndarray, C: float = 10.0, max_iter: int = 1000,
+            teacher_model_version: str = None):
+        from sklearn.linear_model import LogisticRegression
+
+        n_classes = teacher_probabilities.shape[1]
+        if len(np.unique(teacher_probabilities.argmax(axis=1))) < 2:
+            raise ValueError("The teacher predicts a single class on this data; distillation needs more variety.")
+        student = LogisticRegression(C=C, max_iter=max_iter).fit(X, teacher_probabilities.argmax(axis=1))
+        weights = np.zeros((X.shape[1], n_classes))
+        intercept = np.full(n_classes, -np.inf)
+        coefficients = student.coef_ if len(student.classes_) > 2 else np.vstack([-student.coef_, student.coef_]) / 2
+        intercepts = student.intercept_ if len(student.classes_) > 2 else np.array(
+            [-student.intercept_[0], student.intercept_[0]]) / 2
+        weights[:, student.classes_] = coefficients.T
+        intercept[student.classes_] = intercepts
+        return cls(weights, intercept, teacher_model_version=teacher_model_version)
+
+    def predict_proba(self, X) -> np.ndarray:
+        return softmax(np.asarray(X @ self.weights) + self.intercept)
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'weights.npy'), self.weights)
+        np.save(os.path.join(directory, 'intercept.npy'), self.intercept)
+        manifest = {
+            'type': 'distilled_linear',
+            'n_features': int(self.weights.shape[0]),
+            'n_classes': int(self.weights.shape[1]),
+            'teacher_model_version': self.teacher_model_version,
+            'metrics': self.metrics,
+        }
+        with open(os.path.join(directory, ENGINE_MANIFEST_FILENAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True):
+        with open(os.path.join(directory, ENGINE_MANIFEST_FILENAME)) as f:
+            manifest = json.load(f)
+        mmap_mode = 'r' if mmap else None
+        return cls(np.load(os.path.join(directory, 'weights.npy'), mmap_mode=mmap_mode),
+                   np.load(os.path.join(directory, 'intercept.npy')),
+                   teacher_model_version=manifest.get('teacher_model_version'), metrics=manifest.get('metrics'))
+
+
+def measure_agreement(reference: np.ndarray, candidate: np.ndarray, band_thresholds=(0.60, 0.80)) -> dict:
+    reference_bands = np.digitize(reference.max(axis=1), band_thresholds)
+    candidate_bands = np.digitize(candidate.max(axis=1), band_thresholds)
+    absolute_differences = np.abs(reference - candidate)
+    return {
+        'documents': int(len(reference)),
+        'label_agreement': float((reference.argmax(axis=1) == candidate.argmax(axis=1)).mean()),
+        'band_agreement': float((reference_bands == candidate_bands).mean()),
+        'mean_abs_probability_difference': float(absolute_differences.mean()),
+        'max_abs_probability_difference': float(absolute_differences.max()),
+    }
+
+
+def build_inference_engine(engine_name: str, svm_model, model_version: str = None, distilled_dir: str = None):
+    if engine_name not in INFERENCE_ENGINES:
+        raise EngineUnavailableError(f"Unknown inference engine '{engine_name}'. Choose one of {INFERENCE_ENGINES}.")
+    if engine_name == 'linear':
+        return LinearSvcEngine.from_svc(svm_model)
+    if engine_name == 'distilled':
+        if not distilled_dir or not os.path.exists(os.path.join(distilled_dir, ENGINE_MANIFEST_FILENAME)):
+            raise EngineUnavailableError(f"No distilled linear model found at {distilled_dir}.")
+        engine = DistilledLinearEngine.load(distilled_dir)
+        if model_version and engine.teacher_model_version != model_version:
+            raise EngineUnavailableError(f"Distilled model was trained against model {engine.teacher_model_version}, "
+                                         f"the loaded SVC is {model_version}.")
+        return engine
+    return ExactSvcEngine(svm_model)
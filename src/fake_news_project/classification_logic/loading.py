@@ -0,0 +1,106 @@
+import threading
+import time
+
+LOADING_POLICIES = ('eager', 'lazy', 'background')
+
+
+class ModelLoadingManager:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.policy = 'lazy'
+        self._components = {}
+        self._warmup_thread = None
+
+    def register(self, name: str, loader):
+        self._components[name] = {
+            'loader': loader,
+            'lock': threading.Lock(),
+            'state': 'pending',
+            'load_seconds': None,
+            'error': None,
+        }
+
+    def get(self, name: str):
+        component = self._components[name]
+        if component['state'] not in ('loaded', 'unavailable'):
+            with component['lock']:
+                if component['state'] not in ('loaded', 'unavailable'):
+                    return self._load(name, component)
+        return component['loader']()
+
+    def apply_policy(self, policy: str, startup_budget: float = None):
+        if policy not in LOADING_POLICIES:
+            print(f"ModelLoading: Unknown loading policy '{policy}', falling back to 'lazy'.")
+            policy = 'lazy'
+        self.policy = policy
+        print(f"ModelLoading: Applying '{policy}' loading policy to {list(self._components)}.")
+
+        if policy == 'eager':
+            self.load_all(startup_budget=startup_budget)
+        elif policy == 'background':
+            self.start_background_warmup()
+
+    def load_all(self, startup_budget: float = None):
+        start_time = time.perf_counter()
+        for name in self._components:
+            if startup_budget is not None and time.perf_counter() - start_time > startup_budget:
+                print(f"ModelLoading: Startup budget of {startup_budget}s exhausted. "
+                      f"Warming up the remaining components in the background.")
+                self.start_background_warmup()
+                return
+            try:
+                self.get(name)
+            except Exception:
+                pass
+
+    def start_background_warmup(self):
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            return self._warmup_thread
+        self._warmup_thread = threading.Thread(target=self.load_all, name='model-warmup', daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def is_ready(self) -> bool:
+        if self.policy == 'lazy':
+            return True
+        return all(component['state'] in ('loaded', 'unavailable') for component in self._components.values())
+
+    def status(self) -> dict:
+        return {
+            'policy': self.policy,
+            'ready': self.is_ready(),
+            'components': {
+                name: {
+                    'state': component['state'],
+                    'load_seconds': component['load_seconds'],
+                    'error': component['error'],
+                }
+                for name, component in self._components.items()
+            },
+        }
+
+    def _load(self, name: str, component: dict):
+        component['state'] = 'loading'
+        print(f"ModelLoading: Loading component '{name}'...")
+        start_time = time.perf_counter()
+        try:
+            value = component['loader']()
+        except Exception as e:
+            component.update(state='failed', error=str(e), load_seconds=time.perf_counter() - start_time)
+            print(f"ModelLoading: Component '{name}' failed to load: {e}")
+            raise
+
+        component.update(state='loaded' if value is not None else 'unavailable', error=None,
+                         load_seconds=time.perf_counter() - start_time)
+        print(f"ModelLoading: Component '{name}' {component['state']} in {component['load_seconds']:.2f}s.")
+        return value
@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {key: {'counts': list(series['counts']), 'sum': series['sum'], 'count': series['count']}
+                    for key, series in self._series.items()}
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.snapshot().items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['counts']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series['count']}")
+        return lines
+
+
+class GaugeCollector:
+    def __init__(self, name: str, documentation: str, callback, metric_type: str = 'gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.metric_type = metric_type
+
+    def render(self) -> list:
+        try:
+            values = self.callback()
+        except Exception as e:
+            print(f"Metrics: Collector '{self.name}' failed - {e}")
+            return []
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in values.items():
+            lines.append(f"{self.name}{_format_labels(dict(labels))} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        with self._metrics_lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, documentation, labelnames=labelnames, buckets=buckets)
+            return self._metrics[name]
+
+    def register_collector(self, name: str, documentation: str, callback, metric_type: str = 'gauge'):
+        with self._metrics_lock:
+            self._metrics[name] = GaugeCollector(name, documentation, callback, metric_type=metric_type)
+
+    def render_prometheus(self) -> str:
+        with self._metrics_lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry.get_instance()
+
+classification_stage_seconds = registry.histogram(
+    'classification_stage_seconds', "Time spent in each classification stage.", labelnames=('stage', 'path'))
+word_similarity_stage_seconds = registry.histogram(
+    'word_similarity_stage_seconds', "Time spent in each word similarity stage.", labelnames=('stage', 'dimension'))
@@ -1,8 +1,13 @@
 import os
 import threading
 import pickle
+import hashlib
 
-from gensim.models import Word2Vec
+from gensim.models import Word2Vec, KeyedVectors
+
+from .artifacts import export_estimators, load_estimators, read_artifact_metadata, ARTIFACT_MANIFEST_FILENAME
+from .conf import get_setting
+from .similarity import ExactNeighbourIndex, IvfNeighbourIndex, QuantizedNeighbourIndex
 
 BASE_PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
@@ -12,20 +17,50 @@ CLASSIFIERS_DIR = os.path.join(MODELS_SAVED_DIR, 'classification')
 
 DOC2VEC_MODEL_PATH = os.path.join(EMBEDDINGS_DIR, 'doc2vec_300d.model')
 
+HYBRID_MODEL_DIR = os.path.join(CLASSIFIERS_DIR, 'hybrid')
+HYBRID_SVM_MODEL_PATH = os.path.join(HYBRID_MODEL_DIR, 'hybrid_svm_model.pkl')
+HYBRID_SCALER_PATH = os.path.join(HYBRID_MODEL_DIR, 'hybrid_scaler.pkl')
+HYBRID_KMEANS_PATH = os.path.join(HYBRID_MODEL_DIR, 'hybrid_kmeans.pkl')
+
 W2V_300D_MODEL_FILENAME = 'word2vec_300d.model'
 W2V_150D_MODEL_FILENAME = 'word2vec_150d.model'
+W2V_300D_VECTORS_FILENAME = 'word2vec_300d.kv'
+W2V_150D_VECTORS_FILENAME = 'word2vec_150d.kv'
+W2V_300D_INDEX_DIRNAME = 'word2vec_300d.ivf'
+W2V_150D_INDEX_DIRNAME = 'word2vec_150d.ivf'
+W2V_300D_QUANTIZED_DIRNAME = 'word2vec_300d.quantized'
+W2V_150D_QUANTIZED_DIRNAME = 'word2vec_150d.quantized'
+W2V_300D_NORMALIZED_DIRNAME = 'word2vec_300d.normed'
+W2V_150D_NORMALIZED_DIRNAME = 'word2vec_150d.normed'
+
+WORD2VEC_SERVING_MODES = ('full', 'mmap', 'quantized')
+NEIGHBOUR_BACKENDS = ('gensim', 'exact', 'ivf')
 
 VECTORIZER_PATH = os.path.join(CLASSIFIERS_DIR, 'final_tfidf_vectorizer.pkl')
 SVM_MODEL_PATH = os.path.join(CLASSIFIERS_DIR, 'final_svm_model.pkl')
+TFIDF_SVM_ARRAYS_DIR = os.path.join(CLASSIFIERS_DIR, 'tfidf_svm_arrays')
+DISTILLED_ENGINE_DIR = os.path.join(CLASSIFIERS_DIR, 'distilled_linear')
+
+CLASSIFIER_ARTIFACT_FORMATS = ('auto', 'arrays', 'pickle')
 
 class Word2VecManagerSingleton:
     _instance = None
     _lock = threading.Lock()
     _loaded_models = {}
+    _loaded_vectors = {}
+    _neighbour_indexes = {}
 
     MODEL_CONFIG = {
-        '300': {'path': os.path.join(EMBEDDINGS_DIR, W2V_300D_MODEL_FILENAME), 'name': '300D'},
-        '150': {'path': os.path.join(EMBEDDINGS_DIR, W2V_150D_MODEL_FILENAME), 'name': '150D'}
+        '300': {'path': os.path.join(EMBEDDINGS_DIR, W2V_300D_MODEL_FILENAME),
+                'vectors_path': os.path.join(EMBEDDINGS_DIR, W2V_300D_VECTORS_FILENAME),
+                'index_path': os.path.join(EMBEDDINGS_DIR, W2V_300D_INDEX_DIRNAME),
+                'quantized_path': os.path.join(EMBEDDINGS_DIR, W2V_300D_QUANTIZED_DIRNAME),
+                'normed_path': os.path.join(EMBEDDINGS_DIR, W2V_300D_NORMALIZED_DIRNAME), 'name': '300D'},
+        '150': {'path': os.path.join(EMBEDDINGS_DIR, W2V_150D_MODEL_FILENAME),
+                'vectors_path': os.path.join(EMBEDDINGS_DIR, W2V_150D_VECTORS_FILENAME),
+                'index_path': os.path.join(EMBEDDINGS_DIR, W2V_150D_INDEX_DIRNAME),
+                'quantized_path': os.path.join(EMBEDDINGS_DIR, W2V_150D_QUANTIZED_DIRNAME),
+                'normed_path': os.path.join(EMBEDDINGS_DIR, W2V_150D_NORMALIZED_DIRNAME), 'name': '150D'}
     }
 
     @classmethod
@@ -64,12 +99,229 @@ class Word2VecManagerSingleton:
 
         return self._loaded_models.get(dimension_key)
 
+    @staticmethod
+    def get_serving_mode() -> str:
+        serving_mode = get_setting('WORD2VEC_SERVING_MODE', 'full')
+        if serving_mode not in WORD2VEC_SERVING_MODES:
+            print(f"Word2VecManager: Unknown serving mode '{serving_mode}', falling back to 'full'.")
+            serving_mode = 'full'
+        return serving_mode
+
+    def get_vectors(self, dimension_key: str):
+        if self.get_serving_mode() in ('mmap', 'quantized'):
+            vectors = self._get_mmap_vectors(dimension_key)
+            if vectors is not None:
+                return vectors
+
+        model = self.get_model(dimension_key)
+        return model.wv if model else None
+
+    def _get_mmap_vectors(self, dimension_key: str):
+        if self._loaded_vectors.get(dimension_key) is None:
+            with self._lock:
+                if self._loaded_vectors.get(dimension_key) is None:
+                    config = self.MODEL_CONFIG.get(str(dimension_key))
+                    if not config:
+                        return None
+
+                    vectors_path = config['vectors_path']
+                    if not os.path.exists(vectors_path):
+                        print(f"Word2VecManager: No exported vectors at {vectors_path}. "
+                              f"Run 'manage.py export_word2vec_vectors' to enable mmap serving.")
+                        return None
+
+                    try:
+                        print(f"Word2VecManager: Memory-mapping vectors ({config['name']}) from {vectors_path}...")
+                        self._loaded_vectors[dimension_key] = KeyedVectors.load(vectors_path, mmap='r')
+                        print(f"Word2VecManager: Vectors ({config['name']}) mapped successfully.")
+                    except Exception as e:
+                        print(f"Word2VecManager: Error mapping vectors ({config['name']}): {e}")
+                        return None
+
+        return self._loaded_vectors.get(dimension_key)
+
+    def get_neighbour_index(self, dimension_key: str):
+        backend = get_setting('WORD2VEC_NEIGHBOUR_BACKEND', 'gensim')
+        if backend not in NEIGHBOUR_BACKENDS:
+            print(f"Word2VecManager: Unknown neighbour backend '{backend}', falling back to 'gensim'.")
+            backend = 'gensim'
+
+        if self.get_serving_mode() == 'quantized':
+            index = self._get_quantized_index(dimension_key)
+            if index is not None:
+                return index
+
+        vectors = self.get_vectors(dimension_key)
+        if vectors is None or backend == 'gensim':
+            return vectors
+
+        cache_key = (str(dimension_key), backend)
+        if self._neighbour_indexes.get(cache_key) is None:
+            with self._lock:
+                if self._neighbour_indexes.get(cache_key) is None:
+                    self._neighbour_indexes[cache_key] = self._load_neighbour_index(dimension_key, backend, vectors)
+        return self._neighbour_indexes[cache_key]
+
+    def _get_quantized_index(self, dimension_key: str):
+        cache_key = (str(dimension_key), 'quantized')
+        if self._neighbour_indexes.get(cache_key) is None:
+            with self._lock:
+                if self._neighbour_indexes.get(cache_key) is None:
+                    config = self.MODEL_CONFIG.get(str(dimension_key))
+                    if not config:
+                        return None
+
+                    quantized_path = config['quantized_path']
+                    if not os.path.exists(quantized_path):
+                        print(f"Word2VecManager: No quantized vectors at {quantized_path}. "
+                              f"Run 'manage.py quantize_word2vec_vectors'. Using float32 vectors.")
+                        return None
+
+                    try:
+                        index = QuantizedNeighbourIndex.load(quantized_path)
+                        self._neighbour_indexes[cache_key] = index
+                        print(f"Word2VecManager: Quantized vectors ({config['name']}, {index.dtype}) "
+                              f"mapped from {quantized_path}.")
+                    except Exception as e:
+                        print(f"Word2VecManager: Error loading quantized vectors ({config['name']}): {e}")
+                        return None
+
+        return self._neighbour_indexes.get(cache_key)
+
+    def get_batch_index(self, dimension_key: str):
+        index = self.get_neighbour_index(dimension_key)
+        if index is None or hasattr(index, 'most_similar_batch'):
+            return index
+
+        cache_key = (str(dimension_key), 'batch')
+        if self._neighbour_indexes.get(cache_key) is None:
+            with self._lock:
+                if self._neighbour_indexes.get(cache_key) is None:
+                    config = self.MODEL_CONFIG[str(dimension_key)]
+                    self._neighbour_indexes[cache_key] = (self._load_normalized_index(config, index)
+                                                          or ExactNeighbourIndex.from_keyed_vectors(index))
+        return self._neighbour_indexes[cache_key]
+
+    def _load_neighbour_index(self, dimension_key: str, backend: str, vectors):
+        config = self.MODEL_CONFIG[str(dimension_key)]
+        if backend == 'ivf':
+            index_path = config['index_path']
+            if os.path.exists(index_path):
+                try:
+                    n_probe = get_setting('WORD2VEC_ANN_N_PROBE', 8)
+                    index = IvfNeighbourIndex.load(index_path, vectors.index_to_key, n_probe=n_probe)
+                    print(f"Word2VecManager: ANN index ({config['name']}) mapped from {index_path}.")
+                    return index
+                except Exception as e:
+                    print(f"Word2VecManager: Error loading ANN index ({config['name']}): {e}")
+            else:
+                print(f"Word2VecManager: No ANN index at {index_path}. "
+                      f"Run 'manage.py build_word2vec_index'. Using exact search.")
+
+        index = self._load_normalized_index(config, vectors)
+        if index is None:
+            print(f"Word2VecManager: Using gensim search ({config['name']}).")
+            return vectors
+        return index
+
+    @staticmethod
+    def _load_normalized_index(config: dict, vectors):
+        normed_path = config.get('normed_path')
+        if not normed_path or not os.path.exists(normed_path):
+            print(f"Word2VecManager: No normalized vectors at {normed_path}. "
+                  f"Run 'manage.py export_word2vec_vectors' to enable shared exact search.")
+            return None
+        try:
+            index = ExactNeighbourIndex.load(normed_path, vectors.index_to_key)
+            print(f"Word2VecManager: Normalized vectors ({config['name']}) mapped from {normed_path}.")
+            return index
+        except Exception as e:
+            print(f"Word2VecManager: Error loading normalized vectors ({config['name']}): {e}")
+            return None
+
+    def build_neighbour_index(self, dimension_key: str, n_lists: int = None, n_iterations: int = 20):
+        config = self.MODEL_CONFIG.get(str(dimension_key))
+        if not config:
+            raise ValueError(f"No configuration found for dimension key {dimension_key}.")
+
+        vectors = self.get_vectors(dimension_key)
+        if vectors is None:
+            raise FileNotFoundError(f"Word2Vec vectors ({config['name']}) could not be loaded.")
+
+        index = IvfNeighbourIndex.build(vectors.index_to_key, vectors.vectors,
+                                        n_lists=n_lists, n_iterations=n_iterations)
+        index.save(config['index_path'])
+        print(f"Word2VecManager: Saved ANN index ({config['name']}) to {config['index_path']}.")
+        return index
+
+    def export_quantized_vectors(self, dimension_key: str, dtype: str = 'int8'):
+        config = self.MODEL_CONFIG.get(str(dimension_key))
+        if not config:
+            raise ValueError(f"No configuration found for dimension key {dimension_key}.")
+
+        vectors = self.get_vectors(dimension_key)
+        if vectors is None:
+            raise FileNotFoundError(f"Word2Vec vectors ({config['name']}) could not be loaded.")
+
+        index = QuantizedNeighbourIndex.quantize(vectors.index_to_key, vectors.vectors, dtype=dtype)
+        index.save(config['quantized_path'])
+        print(f"Word2VecManager: Saved {dtype} vectors ({config['name']}) to {config['quantized_path']}.")
+        return index
+
+    def export_normalized_vectors(self, dimension_key: str):
+        config = self.MODEL_CONFIG.get(str(dimension_key))
+        if not config:
+            raise ValueError(f"No configuration found for dimension key {dimension_key}.")
+
+        vectors = self.get_vectors(dimension_key)
+        if vectors is None:
+            raise FileNotFoundError(f"Word2Vec vectors ({config['name']}) could not be loaded.")
+
+        index = ExactNeighbourIndex.normalize(vectors.index_to_key, vectors.vectors)
+        index.save(config['normed_path'])
+        print(f"Word2VecManager: Saved normalized vectors ({config['name']}) to {config['normed_path']}.")
+        return index
+
+    def export_vectors(self, dimension_key: str) -> str:
+        config = self.MODEL_CONFIG.get(str(dimension_key))
+        if not config:
+            raise ValueError(f"No configuration found for dimension key {dimension_key}.")
+
+        model = self.get_model(dimension_key)
+        if model is None:
+            raise FileNotFoundError(f"Word2Vec model ({config['name']}) could not be loaded from {config['path']}.")
+
+        model.wv.save(config['vectors_path'], separately=['vectors'])
+        print(f"Word2VecManager: Exported vectors ({config['name']}) to {config['vectors_path']}.")
+        return config['vectors_path']
+
+_content_digests = {}
+_content_digests_lock = threading.Lock()
+
+
+def file_content_digest(path: str) -> str:
+    """SHA-1 of a file's bytes, computed once per (path, size, mtime) in this process."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _content_digests_lock:
+        if key in _content_digests:
+            return _content_digests[key]
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    with _content_digests_lock:
+        _content_digests[key] = digest.hexdigest()
+    return _content_digests[key]
+
+
 class TfidfSvmSingleton:
     _instance = None
     _lock = threading.Lock()
 
     _vectorizer = None
     _svm_model = None
+    _model_version = None
 
     _label_mapping = {
         0: 'FAKE',
@@ -85,27 +337,152 @@ class TfidfSvmSingleton:
             with cls._lock:
                 if cls._instance is None:
                     print("Initializing TfidfSvmSingleton...")
+                    registered_instance = cls._load_registered_version()
+                    if registered_instance is not None:
+                        cls._instance = registered_instance
+                        print(f"TfidfSvmSingleton: Model version {registered_instance.get_model_version()}.")
+                        return cls._instance
                     cls._instance = cls()
 
-                    try:
-                        print(f"Loading TF-IDF vectorizer from {VECTORIZER_PATH}...")
-                        cls._vectorizer = pickle.load(open(VECTORIZER_PATH, 'rb'))
-                        print("TF-IDF vectorizer loaded successfully.")
-                    except FileNotFoundError:
-                        print(f"ERROR: Vectorizer file not found at {VECTORIZER_PATH}")
-                    except Exception as e:
-                        print(f"ERROR loading vectorizer: {e}")
+                    artifact_format = get_setting('CLASSIFIER_ARTIFACT_FORMAT', 'auto')
+                    if artifact_format not in CLASSIFIER_ARTIFACT_FORMATS:
+                        print(f"TfidfSvmSingleton: Unknown artifact format '{artifact_format}', using 'auto'.")
+                        artifact_format = 'auto'
 
-                    try:
-                        print(f"Loading SVM model from {SVM_MODEL_PATH}...")
-                        cls._svm_model = pickle.load(open(SVM_MODEL_PATH, 'rb'))
-                        print("SVM model loaded successfully.")
-                    except FileNotFoundError:
-                        print(f"ERROR: SVM model file not found at {SVM_MODEL_PATH}")
-                    except Exception as e:
-                        print(f"ERROR loading SVM model: {e}")
+                    arrays_available = os.path.exists(os.path.join(TFIDF_SVM_ARRAYS_DIR, ARTIFACT_MANIFEST_FILENAME))
+                    if artifact_format == 'arrays' or (artifact_format == 'auto' and arrays_available
+                                                       and cls._arrays_match_pickles()):
+                        cls._load_arrays()
+                    else:
+                        cls._load_pickles()
+                    print(f"TfidfSvmSingleton: Model version {cls._model_version}.")
         return cls._instance
 
+    @classmethod
+    def _arrays_match_pickles(cls) -> bool:
+        if not (os.path.exists(VECTORIZER_PATH) and os.path.exists(SVM_MODEL_PATH)):
+            return True
+        pickle_version = cls._compute_model_version(VECTORIZER_PATH, SVM_MODEL_PATH)
+        try:
+            source_version = read_artifact_metadata(TFIDF_SVM_ARRAYS_DIR).get('source_model_version')
+        except (OSError, ValueError) as e:
+            print(f"TfidfSvmSingleton: Could not read the array artifacts manifest ({e}). Loading the pickles.")
+            return False
+        if source_version != pickle_version:
+            print(f"TfidfSvmSingleton: Array artifacts were exported from model {source_version}, but the pickles "
+                  f"are model {pickle_version}. Loading the pickles; run 'manage.py export_classifier_arrays' "
+                  f"to serve arrays again.")
+            return False
+        return True
+
+    @classmethod
+    def _load_registered_version(cls):
+        from .registry import ModelRegistry
+
+        registry = ModelRegistry.get_instance()
+        version = registry.read_manifest().get('active')
+        if not version:
+            return None
+        try:
+            instance = registry.load_version(version)
+        except Exception as e:
+            print(f"TfidfSvmSingleton: ERROR loading registered model version {version} - {e}. "
+                  f"Falling back to {CLASSIFIERS_DIR}.")
+            return None
+        registry.loaded_active = version
+        return instance
+
+    @classmethod
+    def from_directory(cls, directory: str, model_version: str = None):
+        instance = cls()
+        arrays_dir = os.path.join(directory, os.path.basename(TFIDF_SVM_ARRAYS_DIR))
+        manifest_path = os.path.join(arrays_dir, ARTIFACT_MANIFEST_FILENAME)
+        if os.path.exists(manifest_path):
+            print(f"Loading TF-IDF vectorizer and SVM model arrays from {arrays_dir}...")
+            estimators, metadata = load_estimators(arrays_dir, mmap_mode='r')
+            instance._vectorizer = estimators.get('vectorizer')
+            instance._svm_model = estimators.get('svm_model')
+            artifact_paths = (manifest_path,)
+        else:
+            artifact_paths = (os.path.join(directory, os.path.basename(VECTORIZER_PATH)),
+                              os.path.join(directory, os.path.basename(SVM_MODEL_PATH)))
+            instance._vectorizer = cls._read_pickle(artifact_paths[0], 'TF-IDF vectorizer')
+            instance._svm_model = cls._read_pickle(artifact_paths[1], 'SVM model')
+
+        if instance._vectorizer is None or instance._svm_model is None:
+            raise FileNotFoundError(f"A TF-IDF vectorizer and SVM model are required in {directory}.")
+        instance._model_version = model_version or cls._compute_model_version(*artifact_paths)
+        return instance
+
+    @classmethod
+    def _load_pickles(cls):
+        cls._vectorizer = cls._read_pickle(VECTORIZER_PATH, 'TF-IDF vectorizer')
+        cls._svm_model = cls._read_pickle(SVM_MODEL_PATH, 'SVM model')
+        cls._model_version = cls._compute_model_version(VECTORIZER_PATH, SVM_MODEL_PATH)
+
+    @staticmethod
+    def _read_pickle(path: str, description: str):
+        try:
+            print(f"Loading {description} from {path}...")
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            print(f"{description} loaded successfully.")
+            return value
+        except FileNotFoundError:
+            print(f"ERROR: {description} file not found at {path}")
+        except Exception as e:
+            print(f"ERROR loading {description}: {e}")
+        return None
+
+    @classmethod
+    def _load_arrays(cls):
+        try:
+            print(f"Loading TF-IDF vectorizer and SVM model arrays from {TFIDF_SVM_ARRAYS_DIR}...")
+            estimators, metadata = load_estimators(TFIDF_SVM_ARRAYS_DIR, mmap_mode='r')
+        except FileNotFoundError:
+            print(f"ERROR: Array artifacts not found at {TFIDF_SVM_ARRAYS_DIR}")
+            return
+        except Exception as e:
+            print(f"ERROR loading array artifacts: {e}")
+            return
+
+        import sklearn
+        if metadata.get('sklearn_version') != sklearn.__version__:
+            print(f"WARNING: Array artifacts were exported with scikit-learn {metadata.get('sklearn_version')}, "
+                  f"running {sklearn.__version__}.")
+
+        cls._vectorizer = estimators.get('vectorizer')
+        cls._svm_model = estimators.get('svm_model')
+        cls._model_version = metadata.get('model_version') or cls._compute_model_version(
+            os.path.join(TFIDF_SVM_ARRAYS_DIR, ARTIFACT_MANIFEST_FILENAME))
+        print("TF-IDF vectorizer and SVM model arrays loaded successfully.")
+
+    @classmethod
+    def export_arrays(cls, directory: str = TFIDF_SVM_ARRAYS_DIR) -> str:
+        vectorizer = cls._read_pickle(VECTORIZER_PATH, 'TF-IDF vectorizer')
+        svm_model = cls._read_pickle(SVM_MODEL_PATH, 'SVM model')
+        if vectorizer is None or svm_model is None:
+            raise FileNotFoundError(f"Pickled TF-IDF vectorizer and SVM model are required in {CLASSIFIERS_DIR}.")
+
+        import sklearn
+        source_model_version = cls._compute_model_version(VECTORIZER_PATH, SVM_MODEL_PATH)
+        metadata = {'model_version': source_model_version, 'source_model_version': source_model_version,
+                    'sklearn_version': sklearn.__version__}
+        manifest_path = export_estimators(directory, {'vectorizer': vectorizer, 'svm_model': svm_model},
+                                          metadata=metadata)
+        print(f"TfidfSvmSingleton: Exported array artifacts to {directory}.")
+        return manifest_path
+
+    @staticmethod
+    def _compute_model_version(*artifact_paths) -> str:
+        """Hashes the artifact contents, so a redeployed or copied model keeps its version and hosts serving the
+        same files share result cache and classification store entries."""
+        digest = hashlib.sha1()
+        for path in artifact_paths:
+            if os.path.exists(path):
+                digest.update(f"{os.path.basename(path)}:{file_content_digest(path)}".encode())
+        return digest.hexdigest()[:12]
+
     def get_vectorizer(self):
         return self._vectorizer
 
@@ -113,4 +490,7 @@ class TfidfSvmSingleton:
         return self._svm_model
 
     def get_label_mapping(self):
-        return self._label_mapping
\ No newline at end of file
+        return self._label_mapping
+
+    def get_model_version(self):
+        return self._model_version
@@ -0,0 +1,328 @@
+import os
+import base64
+import json
+import threading
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process.
+    fcntl = None
+
+import numpy as np
+
+from .conf import get_setting
+from .model_loaders import MODELS_SAVED_DIR
+
+NEAR_DUPLICATE_INDEX_DIR = os.path.join(MODELS_SAVED_DIR, 'near_duplicates')
+INDEX_MANIFEST_FILENAME = 'manifest.json'
+ENTRIES_FILENAME = 'entries.jsonl'
+LOCK_FILENAME = '.lock'
+
+SHINGLE_MIXERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                           0xFF51AFD7ED558CCD], dtype=np.uint64)
+BAND_MIXER = np.uint64(0x100000001B3)
+SIGNATURE_BLOCK_SHINGLES = 4096
+
+
+class NearDuplicateIndex:
+    """MinHash signatures over lemma shingles with LSH banding.
+
+    Each band of rows_per_band signature values is folded into one 64-bit key. Rows loaded from disk are kept in
+    per-band sorted key arrays (binary search), rows added since then in per-band dicts; compact() merges them,
+    automatically once compact_after rows are pending.
+
+    Each added row is appended to entries.jsonl as one line holding both its signature and its verdict, under an
+    exclusive lock on a lock file, so several processes can share a directory. Before appending, and before a
+    query when the file has grown, a process reads the rows other processes appended, so row numbers agree."""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls.from_settings()
+        return cls._instance
+
+    @classmethod
+    def from_settings(cls):
+        config = get_setting('NEAR_DUPLICATE_INDEX', {})
+        if not config.get('ENABLED', False):
+            return None
+        directory = (config.get('DIRECTORY') or NEAR_DUPLICATE_INDEX_DIR) if config.get('PERSIST', True) else None
+        if directory and os.path.exists(os.path.join(directory, INDEX_MANIFEST_FILENAME)):
+            index = cls.load(directory)
+            index.threshold = config.get('THRESHOLD', index.threshold)
+            index.compact_after = config.get('COMPACT_AFTER', index.compact_after)
+            return index
+        return cls(num_perm=config.get('NUM_PERM', 64), bands=config.get('BANDS', 16),
+                   shingle_size=config.get('SHINGLE_SIZE', 3), threshold=config.get('THRESHOLD', 0.8),
+                   directory=directory, compact_after=config.get('COMPACT_AFTER', 10000))
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 3, threshold: float = 0.8,
+                 seed: int = 1, directory: str = None, compact_after: int = 10000):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.seed = seed
+        self.directory = directory
+        self.compact_after = compact_after
+
+        rng = np.random.default_rng(seed)
+        self._multipliers = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._offsets = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._band_keys = np.zeros((0, bands), dtype=np.uint64)
+        self._size = 0
+        self.entries = []
+        self._sorted_keys = [np.zeros(0, dtype=np.uint64) for _ in range(bands)]
+        self._sorted_rows = [np.zeros(0, dtype=np.int64) for _ in range(bands)]
+        self._indexed_size = 0
+        self._recent = [{} for _ in range(bands)]
+        self._index_lock = threading.RLock()
+        self._file_offset = 0
+        self.hits = 0
+        self.misses = 0
+
+        if directory:
+            self._write_manifest()
+
+    def __len__(self):
+        return self._size
+
+    def shingle_hashes(self, lemmas) -> np.ndarray:
+        token_hashes = np.fromiter((zlib.crc32(lemma.encode('utf-8')) for lemma in lemmas), dtype=np.uint64,
+                                   count=len(lemmas))
+        width = min(self.shingle_size, len(token_hashes))
+        if width == 0:
+            return token_hashes
+        n_shingles = len(token_hashes) - width + 1
+        shingles = np.zeros(n_shingles, dtype=np.uint64)
+        for offset in range(width):
+            shingles += token_hashes[offset:offset + n_shingles] * SHINGLE_MIXERS[offset % len(SHINGLE_MIXERS)]
+        return np.unique(shingles)
+
+    def signature(self, lemmas):
+        shingles = self.shingle_hashes(list(lemmas))
+        if not len(shingles):
+            return None
+        signature = np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        for start in range(0, len(shingles), SIGNATURE_BLOCK_SHINGLES):
+            block = shingles[start:start + SIGNATURE_BLOCK_SHINGLES]
+            hashed = (self._multipliers[:, None] * block[None, :] + self._offsets[:, None]) >> np.uint64(32)
+            np.minimum(signature, hashed.min(axis=1).astype(np.uint32), out=signature)
+        return signature
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        rows = signatures.reshape(-1, self.bands, self.rows_per_band).astype(np.uint64)
+        keys = np.zeros(rows.shape[:2], dtype=np.uint64)
+        for column in range(self.rows_per_band):
+            keys = keys * BAND_MIXER + rows[:, :, column]
+        return keys
+
+    def query(self, signature, model_version=None):
+        """Returns (row, similarity) of the most similar stored article at or above the threshold, or None."""
+        if self.directory and self._file_size() != self._file_offset:
+            with self._file_lock(shared=True):
+                self._read_new_records()
+        with self._index_lock:
+            match = self._best_match(signature, model_version)
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return match
+
+    def _best_match(self, signature, model_version):
+        if signature is None or not self._size:
+            return None
+        keys = self.band_keys(signature[None, :])[0]
+        candidates = []
+        for band, key in enumerate(keys.tolist()):
+            sorted_keys = self._sorted_keys[band]
+            start = sorted_keys.searchsorted(keys[band], side='left')
+            if start < len(sorted_keys) and sorted_keys[start] == keys[band]:
+                stop = sorted_keys.searchsorted(keys[band], side='right')
+                candidates.extend(self._sorted_rows[band][start:stop].tolist())
+            candidates.extend(self._recent[band].get(key, ()))
+        if not candidates:
+            return None
+
+        candidates = np.unique(np.array(candidates, dtype=np.int64))
+        if model_version is not None:
+            candidates = candidates[[self.entries[row].get('model_version') == model_version for row in candidates]]
+            if not len(candidates):
+                return None
+        similarities = (self._signatures[candidates] == signature).mean(axis=1)
+        best = int(similarities.argmax())
+        if similarities[best] < self.threshold:
+            return None
+        return int(candidates[best]), float(similarities[best])
+
+    def add(self, signature, entry: dict) -> int:
+        if signature is None:
+            return None
+        if not self.directory:
+            with self._index_lock:
+                return self._append_row(signature, entry)
+
+        line = json.dumps({'signature': self._encode_signature(signature), 'entry': entry}) + '\n'
+        # Always take the file lock before the index lock, as query() does.
+        with self._file_lock(), self._index_lock:
+            self._read_new_records()
+            self._truncate_interrupted_record()
+            with open(os.path.join(self.directory, ENTRIES_FILENAME), 'ab') as f:
+                f.write(line.encode('utf-8'))
+                self._file_offset = f.tell()
+            return self._append_row(signature, entry)
+
+    def _append_row(self, signature, entry: dict) -> int:
+        row = self._size
+        if row == len(self._signatures):
+            capacity = max(1024, 2 * len(self._signatures))
+            self._signatures = np.resize(self._signatures, (capacity, self.num_perm))
+            self._band_keys = np.resize(self._band_keys, (capacity, self.bands))
+        self._signatures[row] = signature
+        keys = self.band_keys(signature[None, :])[0]
+        self._band_keys[row] = keys
+        self.entries.append(entry)
+        for band, key in enumerate(keys.tolist()):
+            self._recent[band].setdefault(key, []).append(row)
+        self._size += 1
+        if self.compact_after and self._size - self._indexed_size >= self.compact_after:
+            self.compact()
+        return row
+
+    def compact(self):
+        with self._index_lock:
+            for band in range(self.bands):
+                order = np.argsort(self._band_keys[:self._size, band], kind='stable')
+                self._sorted_keys[band] = self._band_keys[:self._size, band][order]
+                self._sorted_rows[band] = order.astype(np.int64)
+                self._recent[band] = {}
+            self._indexed_size = self._size
+
+    def _write_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = {'num_perm': self.num_perm, 'bands': self.bands, 'shingle_size': self.shingle_size,
+                    'threshold': self.threshold, 'seed': self.seed}
+        with open(os.path.join(self.directory, INDEX_MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+    def _encode_signature(self, signature) -> str:
+        return base64.b64encode(np.asarray(signature, dtype='<u4').tobytes()).decode('ascii')
+
+    def _decode_record(self, line: str):
+        """Returns (signature, entry) for a complete record line, or None if it is malformed."""
+        try:
+            record = json.loads(line)
+            signature = np.frombuffer(base64.b64decode(record['signature'], validate=True), dtype='<u4')
+            entry = record['entry']
+        except (ValueError, KeyError, TypeError):
+            return None
+        if len(signature) != self.num_perm or not isinstance(entry, dict):
+            return None
+        return signature.astype(np.uint32), entry
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        with open(os.path.join(self.directory, LOCK_FILENAME), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _file_size(self) -> int:
+        try:
+            return os.path.getsize(os.path.join(self.directory, ENTRIES_FILENAME))
+        except FileNotFoundError:
+            return 0
+
+    def _read_new_records(self) -> int:
+        """Adds the complete records appended after _file_offset, by this or other processes. Call it holding the
+        file lock. A trailing line without a newline is still being written, or was interrupted."""
+        path = os.path.join(self.directory, ENTRIES_FILENAME)
+        if not os.path.exists(path):
+            return 0
+        with self._index_lock:
+            with open(path, 'rb') as f:
+                f.seek(self._file_offset)
+                data = f.read()
+            added = skipped = 0
+            end = data.rfind(b'\n') + 1
+            for line in data[:end].splitlines():
+                record = self._decode_record(line.decode('utf-8', errors='replace'))
+                if record is None:
+                    skipped += 1
+                    continue
+                self._append_row(*record)
+                added += 1
+            self._file_offset += end
+        if skipped:
+            print(f"NearDuplicateIndex: Skipped {skipped} malformed records in {path}.")
+        return added
+
+    @classmethod
+    def load(cls, directory: str):
+        with open(os.path.join(directory, INDEX_MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        index = cls(num_perm=manifest['num_perm'], bands=manifest['bands'], shingle_size=manifest['shingle_size'],
+                    threshold=manifest['threshold'], seed=manifest['seed'])
+        index.directory = directory
+
+        with index._file_lock():
+            index._read_new_records()
+            index._truncate_interrupted_record()
+        index.compact()
+        print(f"NearDuplicateIndex: Loaded {len(index)} signatures from {directory}.")
+        return index
+
+    def _truncate_interrupted_record(self):
+        """Drops bytes after the last complete record. Call it holding the exclusive file lock, after
+        _read_new_records: no writer is active, so they are left by a write that was interrupted."""
+        path = os.path.join(self.directory, ENTRIES_FILENAME)
+        if self._file_size() > self._file_offset:
+            with open(path, 'rb+') as f:
+                f.truncate(self._file_offset)
+            print(f"NearDuplicateIndex: Dropped an incomplete trailing entry in {self.directory}.")
+
+    def save(self, directory: str):
+        self.directory = directory
+        self._write_manifest()
+        with self._file_lock():
+            self._rewrite_entries()
+
+    def _rewrite_entries(self):
+        temporary_path = os.path.join(self.directory, f".{ENTRIES_FILENAME}.tmp")
+        with self._index_lock:
+            with open(temporary_path, 'wb') as f:
+                for row, entry in enumerate(self.entries):
+                    f.write((json.dumps({'signature': self._encode_signature(self._signatures[row]),
+                                         'entry': entry}) + '\n').encode('utf-8'))
+                self._file_offset = f.tell()
+            os.replace(temporary_path, os.path.join(self.directory, ENTRIES_FILENAME))
+
+    def stats(self) -> dict:
+        return {
+            'entries': self._size,
+            'indexed': self._indexed_size,
+            'recent': self._size - self._indexed_size,
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'threshold': self.threshold,
+            'directory': self.directory,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
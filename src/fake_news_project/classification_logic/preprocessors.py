@@ -1,52 +1,87 @@
 import spacy
 import re
 import ast
+import sys
+import hashlib
+import threading
+from itertools import islice
+
+from .cache import LRUCache
+from .conf import get_setting
+from .metrics import classification_stage_seconds
+
+SPACY_MODEL_NAME = "ro_core_news_lg"
+
+PREPROCESSING_MODES = ('full', 'lean')
+LEAN_EXCLUDED_COMPONENTS = ('parser', 'ner')
+
+CHUNK_SEPARATORS = ('\n', '. ', '! ', '? ')
+CHUNK_WHITESPACE = (' ', '\t', '\r', '\xa0')
+
+SEGMENT_PATTERNS = {
+    'paragraph': re.compile(r'\n+'),
+    'sentence': re.compile(r'(?<=[.!?])\s+|\n+'),
+}
 
 
 class TextPreprocessor:
-    _nlp = None
     _instance = None
+    _lock = threading.Lock()
+    _pipelines = {}
 
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
-            cls._instance = cls()
-            try:
-                print("Preprocessor: Loading SpaCy ro_core_news_lg model...")
-                cls._nlp = spacy.load("ro_core_news_lg")
-                print("Preprocessor: SpaCy model loaded successfully.")
-            except OSError:
-                print("Preprocessor: ERROR - SpaCy model 'ro_core_news_lg' not found.")
-                cls._nlp = None
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
 
-    def __init__(self):
-        if self._nlp is None and TextPreprocessor._nlp is not None:
-            self._nlp = TextPreprocessor._nlp
-        elif self._nlp is None and TextPreprocessor._nlp is None:
-            try:
-                print("Preprocessor (init): Loading SpaCy ro_core_news_lg model...")
-                TextPreprocessor._nlp = spacy.load("ro_core_news_lg")
-                self._nlp = TextPreprocessor._nlp
-                print("Preprocessor (init): SpaCy model loaded successfully.")
-            except OSError:
-                print("Preprocessor (init): ERROR - SpaCy model 'ro_core_news_lg' not found during init.")
-                self._nlp = None
+    def __init__(self, mode: str = None, use_lemma_cache: bool = None, segment: str = None):
+        self.mode = mode or get_setting('TEXT_PREPROCESSOR_MODE', 'full')
+        if self.mode not in PREPROCESSING_MODES:
+            raise ValueError(f"Unknown preprocessing mode '{self.mode}'. Expected one of {PREPROCESSING_MODES}.")
+        self._nlp = self._load_pipeline(self.mode)
 
-    def get_processed_text_for_tfidf(self, text: str) -> str:
-        if not self._nlp:
-            print("Preprocessor: SpaCy model not available. Returning basic cleaned text.")
-            text = text.lower()
-            text = re.sub(r'[^a-zăâîșț\s]', '', text)
-            text = re.sub(r'\s+', ' ', text).strip()
-            return text
+        cache_config = get_setting('TEXT_PREPROCESSOR_LEMMA_CACHE', {})
+        if use_lemma_cache is None:
+            use_lemma_cache = cache_config.get('ENABLED', False)
+        self.lemma_cache = None
+        if use_lemma_cache:
+            segment = segment or cache_config.get('SEGMENT', 'paragraph')
+            if segment not in SEGMENT_PATTERNS:
+                raise ValueError(f"Unknown lemma cache segment '{segment}'. Expected one of {tuple(SEGMENT_PATTERNS)}.")
+            self._segment_pattern = SEGMENT_PATTERNS[segment]
+            self.lemma_cache = LRUCache(max_entries=None, max_bytes=cache_config.get('MAX_BYTES', 64 * 1024 * 1024),
+                                        sizeof=self._lemma_entry_size)
 
-        cleaned_text = re.sub(r'\s+', ' ', re.sub(r'[^a-zăâîșț\s]', '', text.lower())).strip()
-        if not cleaned_text:
-            return ""
+    @classmethod
+    def _load_pipeline(cls, mode: str):
+        if mode in cls._pipelines:
+            return cls._pipelines[mode]
+
+        excluded_components = []
+        if mode == 'lean':
+            excluded_components = list(get_setting('TEXT_PREPROCESSOR_LEAN_EXCLUDE', LEAN_EXCLUDED_COMPONENTS))
+
+        try:
+            print(f"Preprocessor: Loading SpaCy {SPACY_MODEL_NAME} model ({mode} mode)...")
+            nlp = spacy.load(SPACY_MODEL_NAME, exclude=excluded_components)
+            print(f"Preprocessor: SpaCy model loaded successfully with components {nlp.pipe_names}.")
+        except OSError:
+            print(f"Preprocessor: ERROR - SpaCy model '{SPACY_MODEL_NAME}' not found.")
+            nlp = None
+
+        cls._pipelines[mode] = nlp
+        return nlp
+
+    @staticmethod
+    def clean_text(text: str) -> str:
+        return re.sub(r'\s+', ' ', re.sub(r'[^a-zăâîșț\s]', '', text.lower())).strip()
 
-        doc = self._nlp(cleaned_text)
-        lemmas_filtered = [
+    @staticmethod
+    def _filter_lemmas(doc) -> list:
+        return [
             token.lemma_.lower() for token in doc
             if not token.is_stop
                and not token.is_punct
@@ -54,4 +89,177 @@ class TextPreprocessor:
                and token.pos_ not in {"ADP", "CCONJ", "SCONJ"}
         ]
 
-        return ' '.join(lemmas_filtered)
+    def get_processed_text_for_tfidf(self, text: str) -> str:
+        return ' '.join(self.get_lemmas_for_tfidf(text))
+
+    def get_lemmas_for_tfidf(self, text: str) -> list:
+        if not self._nlp:
+            print("Preprocessor: SpaCy model not available. Returning basic cleaned text.")
+            with classification_stage_seconds.time(stage='clean', path='single'):
+                return self.clean_text(text).split()
+
+        if self.lemma_cache is not None:
+            with classification_stage_seconds.time(stage='spacy', path='single'):
+                return next(self._iter_cached_lemma_lists([text], batch_size=1, n_process=1))
+
+        with classification_stage_seconds.time(stage='clean', path='single'):
+            cleaned_text = self.clean_text(text)
+        if not cleaned_text:
+            return []
+
+        with classification_stage_seconds.time(stage='spacy', path='single'):
+            doc = self._nlp(cleaned_text)
+            return self._filter_lemmas(doc)
+
+    def iter_processed_texts_for_tfidf(self, texts, batch_size: int = 64, n_process: int = 1):
+        for lemmas in self.iter_lemma_lists_for_tfidf(texts, batch_size=batch_size, n_process=n_process):
+            yield ' '.join(lemmas)
+
+    def iter_lemma_lists_for_tfidf(self, texts, batch_size: int = 64, n_process: int = 1):
+        cleaned_texts = (self.clean_text(text) for text in texts)
+
+        if not self._nlp:
+            print("Preprocessor: SpaCy model not available. Returning basic cleaned texts.")
+            for cleaned_text in cleaned_texts:
+                yield cleaned_text.split()
+            return
+
+        if self.lemma_cache is not None:
+            yield from self._iter_cached_lemma_lists(texts, batch_size=batch_size, n_process=n_process)
+            return
+
+        for doc in self._nlp.pipe(cleaned_texts, batch_size=batch_size, n_process=n_process):
+            yield self._filter_lemmas(doc)
+
+    def iter_lemma_chunks_for_tfidf(self, text: str, chunk_chars: int):
+        """Lemmatizes a long text chunk by chunk so only one bounded chunk is held by spaCy at a time.
+
+        Chunks end at sentence boundaries where split_into_chunks finds one. find_chunking_mismatches measures where
+        the lemmas still differ from the whole-document path."""
+        return self.iter_lemma_lists_for_tfidf(split_into_chunks(text, chunk_chars), batch_size=1)
+
+    def get_lemma_cache_stats(self):
+        if self.lemma_cache is None:
+            return None
+        return self.lemma_cache.stats()
+
+    def _iter_cached_lemma_lists(self, texts, batch_size: int, n_process: int):
+        texts = iter(texts)
+        while True:
+            chunk = list(islice(texts, batch_size))
+            if not chunk:
+                return
+
+            segment_key_lists = []
+            resolved = {}
+            missing = {}
+            for text in chunk:
+                segment_keys = []
+                for segment in self._split_segments(text):
+                    key = hashlib.blake2b(segment.encode('utf-8'), digest_size=16).digest()
+                    segment_keys.append(key)
+                    if key in resolved or key in missing:
+                        continue
+                    lemmas = self.lemma_cache.get(key)
+                    if lemmas is None:
+                        missing[key] = segment
+                    else:
+                        resolved[key] = lemmas
+                segment_key_lists.append(segment_keys)
+
+            docs = self._nlp.pipe(missing.values(), batch_size=batch_size, n_process=n_process)
+            for key, doc in zip(missing, docs):
+                lemmas = tuple(sys.intern(lemma) for lemma in self._filter_lemmas(doc))
+                self.lemma_cache.set(key, lemmas)
+                resolved[key] = lemmas
+
+            for segment_keys in segment_key_lists:
+                yield [lemma for key in segment_keys for lemma in resolved[key]]
+
+    def _split_segments(self, text: str) -> list:
+        # 'paragraph' and 'sentence' lemmatize each segment without its neighbours, so spaCy may tag the tokens at a
+        # boundary differently than in the whole document. find_segment_cache_mismatches measures the difference.
+        segments = (self.clean_text(segment) for segment in self._segment_pattern.split(text))
+        return [segment for segment in segments if segment]
+
+    @staticmethod
+    def _lemma_entry_size(lemmas) -> int:
+        return sys.getsizeof(lemmas) + sum(sys.getsizeof(lemma) for lemma in lemmas)
+
+
+def split_into_chunks(text: str, max_chars: int):
+    """Splits a text into chunks of at most max_chars.
+
+    Chunks end at a paragraph or sentence boundary when the window has one. A longer sentence is cut at its last
+    whitespace, and a run without whitespace is cut at max_chars, so no chunk exceeds spaCy's max_length."""
+    start = 0
+    while len(text) - start > max_chars:
+        cut = _find_chunk_end(text, start, max_chars)
+        yield text[start:cut]
+        start = cut
+    if start < len(text):
+        yield text[start:]
+
+
+def _find_chunk_end(text: str, start: int, max_chars: int) -> int:
+    end = start + max_chars
+    for low in (start + max_chars // 2, start + 1):
+        for separator in CHUNK_SEPARATORS:
+            cut = text.rfind(separator, low, end)
+            if cut != -1:
+                return cut + len(separator)
+    cut = max(text.rfind(whitespace, start + 1, end) for whitespace in CHUNK_WHITESPACE)
+    return cut + 1 if cut != -1 else end
+
+
+def find_chunking_mismatches(texts, chunk_chars: int) -> list:
+    """Compares the lemmas of streamed chunks with whole-document lemmatization. spaCy tags each chunk without the
+    neighbouring sentences, so tokens next to a chunk boundary may get a different lemma or part of speech."""
+    preprocessor = TextPreprocessor(use_lemma_cache=False)
+    if not preprocessor._nlp:
+        raise RuntimeError(f"SpaCy model '{SPACY_MODEL_NAME}' is required to compare chunked preprocessing.")
+
+    mismatches = []
+    for index, text in enumerate(texts):
+        document_tokens = preprocessor.get_lemmas_for_tfidf(text)
+        chunked_tokens = [lemma for lemmas in preprocessor.iter_lemma_chunks_for_tfidf(text, chunk_chars)
+                          for lemma in lemmas]
+        if document_tokens != chunked_tokens:
+            mismatches.append({'index': index, 'document_tokens': document_tokens, 'chunked_tokens': chunked_tokens})
+    return mismatches
+
+
+def find_segment_cache_mismatches(texts, segment: str, batch_size: int = 64) -> list:
+    texts = list(texts)
+    reference_preprocessor = TextPreprocessor(use_lemma_cache=False)
+    cached_preprocessor = TextPreprocessor(use_lemma_cache=True, segment=segment)
+    if not reference_preprocessor._nlp:
+        raise RuntimeError(f"SpaCy model '{SPACY_MODEL_NAME}' is required to compare lemma cache segments.")
+
+    reference_outputs = reference_preprocessor.iter_lemma_lists_for_tfidf(texts, batch_size=batch_size)
+    cached_outputs = cached_preprocessor.iter_lemma_lists_for_tfidf(texts, batch_size=batch_size)
+
+    mismatches = []
+    for index, (reference_tokens, cached_tokens) in enumerate(zip(reference_outputs, cached_outputs)):
+        if reference_tokens != cached_tokens:
+            mismatches.append({'index': index, 'document_tokens': reference_tokens, 'segment_tokens': cached_tokens})
+    return mismatches
+
+
+def find_lean_mode_mismatches(texts, batch_size: int = 64) -> list:
+    texts = list(texts)
+    full_preprocessor = TextPreprocessor(mode='full', use_lemma_cache=False)
+    lean_preprocessor = TextPreprocessor(mode='lean', use_lemma_cache=False)
+    if not full_preprocessor._nlp or not lean_preprocessor._nlp:
+        raise RuntimeError(f"SpaCy model '{SPACY_MODEL_NAME}' is required to compare preprocessing modes.")
+
+    full_outputs = full_preprocessor.iter_processed_texts_for_tfidf(texts, batch_size=batch_size)
+    lean_outputs = lean_preprocessor.iter_processed_texts_for_tfidf(texts, batch_size=batch_size)
+
+    mismatches = []
+    for index, (full_output, lean_output) in enumerate(zip(full_outputs, lean_outputs)):
+        full_tokens = full_output.split()
+        lean_tokens = lean_output.split()
+        if full_tokens != lean_tokens:
+            mismatches.append({'index': index, 'full_tokens': full_tokens, 'lean_tokens': lean_tokens})
+    return mismatches
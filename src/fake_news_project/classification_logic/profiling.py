@@ -0,0 +1,62 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Samples Python stacks on a background thread and aggregates them in the collapsed (folded) format
+    understood by flamegraph.pl, speedscope and inferno."""
+
+    def __init__(self, thread_ids=None, interval: float = 0.005, max_depth: int = 128):
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self):
+        own_thread_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                self.samples[self._collapse(thread_names.get(thread_id, str(thread_id)), frame)] += 1
+
+    def _collapse(self, thread_name: str, frame) -> str:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_name}@{os.path.basename(code.co_filename)}:{code.co_firstlineno}")
+            frame = frame.f_back
+        stack.append(thread_name)
+        return ';'.join(reversed(stack)).replace(' ', '_')
+
+    def collapsed(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def write_collapsed(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+        return path
+
+
+def profile_output_path(output_dir: str, label: str, duration: float) -> str:
+    safe_label = ''.join(character if character.isalnum() else '_' for character in label).strip('_') or 'root'
+    return os.path.join(output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}-{duration * 1000:.0f}ms.folded")
@@ -0,0 +1,324 @@
+import os
+import json
+import queue
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from .artifacts import ARTIFACT_MANIFEST_FILENAME
+from .conf import get_setting
+from .model_loaders import TfidfSvmSingleton, CLASSIFIERS_DIR, VECTORIZER_PATH, SVM_MODEL_PATH, TFIDF_SVM_ARRAYS_DIR
+
+REGISTRY_DIR = os.path.join(CLASSIFIERS_DIR, 'registry')
+REGISTRY_MANIFEST_FILENAME = 'registry.json'
+VERSIONS_DIRNAME = 'versions'
+
+
+class ShadowScorer:
+    """Re-classifies a sample of served texts with a candidate facade on a background thread and counts how often
+    the candidate agrees with the label that was returned to the user."""
+
+    def __init__(self, candidate, version: str, sample_rate: float = 1.0, max_pending: int = 1000, seed: int = None):
+        self.candidate = candidate
+        self.version = version
+        self.sample_rate = sample_rate
+        self._random = random.Random(seed)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.compared = 0
+        self.agreed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.confidence_delta_sum = 0.0
+        self.label_pairs = {}
+
+    def observe(self, texts, results):
+        observed = [(text, result) for text, result in zip(texts, results)
+                    if result and result.get('classification_result') != "ERROR"
+                    and (self.sample_rate >= 1 or self._random.random() < self.sample_rate)]
+        if not observed:
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(observed)
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(observed)
+
+    def wait(self):
+        self._queue.join()
+
+    def stats(self) -> dict:
+        return {
+            'version': self.version,
+            'sample_rate': self.sample_rate,
+            'pending': self._queue.qsize(),
+            'compared': self.compared,
+            'agreed': self.agreed,
+            'agreement_rate': self.agreed / self.compared if self.compared else None,
+            'mean_confidence_delta': self.confidence_delta_sum / self.compared if self.compared else None,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'label_pairs': dict(self.label_pairs),
+        }
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            observed = self._queue.get()
+            try:
+                self._compare(observed)
+            except Exception as e:
+                print(f"ShadowScorer: Error while scoring {len(observed)} texts with model {self.version} - {e}")
+                with self._lock:
+                    self.errors += len(observed)
+            finally:
+                self._queue.task_done()
+
+    def _compare(self, observed):
+        candidate_results = self.candidate.classify_batch([text for text, _ in observed])
+        with self._lock:
+            for (_, result), candidate_result in zip(observed, candidate_results):
+                primary_label = result['classification_result']
+                candidate_label = candidate_result.get('classification_result')
+                if candidate_label == "ERROR":
+                    self.errors += 1
+                    continue
+                self.compared += 1
+                self.agreed += primary_label == candidate_label
+                self.confidence_delta_sum += (float(candidate_result.get('confidence', 0.0))
+                                              - float(result.get('confidence', 0.0)))
+                pair = f"{primary_label}->{candidate_label}"
+                self.label_pairs[pair] = self.label_pairs.get(pair, 0) + 1
+
+
+class ModelRegistry:
+    """Versioned TF-IDF + SVM artifacts under models_saved/classification/registry.
+
+    registry.json names the active and shadow versions. Every worker polls it and loads a changed version on a
+    background thread, then swaps it in under the singleton locks. Requests that already hold the previous facade
+    finish on it."""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls.from_settings()
+        return cls._instance
+
+    @classmethod
+    def from_settings(cls):
+        config = get_setting('MODEL_REGISTRY', {})
+        return cls(config.get('DIRECTORY') or REGISTRY_DIR,
+                   poll_seconds=config.get('POLL_SECONDS', 30),
+                   shadow_sample_rate=config.get('SHADOW_SAMPLE_RATE', 1.0),
+                   shadow_max_pending=config.get('SHADOW_MAX_PENDING', 1000))
+
+    def __init__(self, directory: str = REGISTRY_DIR, poll_seconds: float = 30, shadow_sample_rate: float = 1.0,
+                 shadow_max_pending: int = 1000):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, REGISTRY_MANIFEST_FILENAME)
+        self.poll_seconds = poll_seconds
+        self.shadow_sample_rate = shadow_sample_rate
+        self.shadow_max_pending = shadow_max_pending
+
+        self.loaded_active = None
+        self.shadow_scorer = None
+        self.swaps = 0
+        self.last_error = None
+        self._sync_lock = threading.Lock()
+        self._watcher = None
+        self._manifest_mtime = None
+        self._deferred = False
+
+    def read_manifest(self) -> dict:
+        manifest = {'active': None, 'shadow': None, 'versions': {}}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        return manifest
+
+    def _write_manifest(self, manifest: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, prefix='.registry-', suffix='.json')
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.manifest_path)
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.directory, VERSIONS_DIRNAME, version)
+
+    def publish(self, source_dir: str = CLASSIFIERS_DIR, version: str = None, notes: str = None) -> str:
+        arrays_dir = os.path.join(source_dir, os.path.basename(TFIDF_SVM_ARRAYS_DIR))
+        pickle_paths = [os.path.join(source_dir, os.path.basename(path)) for path in (VECTORIZER_PATH, SVM_MODEL_PATH)]
+        if all(os.path.exists(path) for path in pickle_paths):
+            artifact_format, artifact_paths = 'pickle', pickle_paths
+        elif os.path.exists(os.path.join(arrays_dir, ARTIFACT_MANIFEST_FILENAME)):
+            artifact_format, artifact_paths = 'arrays', [arrays_dir]
+        else:
+            raise FileNotFoundError(f"No TF-IDF vectorizer and SVM model found in {source_dir}.")
+
+        version = version or TfidfSvmSingleton._compute_model_version(
+            *(os.path.join(path, ARTIFACT_MANIFEST_FILENAME) if os.path.isdir(path) else path
+              for path in artifact_paths))
+        target_dir = self.version_dir(version)
+        if os.path.exists(target_dir):
+            raise ValueError(f"Model version {version} is already registered.")
+
+        versions_dir = os.path.dirname(target_dir)
+        os.makedirs(versions_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=versions_dir, prefix='.staging-')
+        try:
+            for path in artifact_paths:
+                destination = os.path.join(staging_dir, os.path.basename(path))
+                if os.path.isdir(path):
+                    shutil.copytree(path, destination)
+                else:
+                    shutil.copy2(path, destination)
+            os.replace(staging_dir, target_dir)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        with self._sync_lock:
+            manifest = self.read_manifest()
+            manifest['versions'][version] = {'format': artifact_format, 'source': os.path.abspath(source_dir),
+                                             'published_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'notes': notes}
+            self._write_manifest(manifest)
+        print(f"ModelRegistry: Published model version {version} from {source_dir}.")
+        return version
+
+    def set_active(self, version: str):
+        self._update_manifest(active=version)
+
+    def set_shadow(self, version: str = None):
+        self._update_manifest(shadow=version)
+
+    def _update_manifest(self, **changes):
+        with self._sync_lock:
+            manifest = self.read_manifest()
+            for key, version in changes.items():
+                if version is not None and version not in manifest['versions']:
+                    raise ValueError(f"Unknown model version {version}. Registered: {sorted(manifest['versions'])}.")
+                manifest[key] = version
+            if manifest['shadow'] and manifest['shadow'] == manifest['active']:
+                manifest['shadow'] = None
+            self._write_manifest(manifest)
+
+    def load_version(self, version: str):
+        return TfidfSvmSingleton.from_directory(self.version_dir(version), model_version=version)
+
+    def build_facade(self, version: str):
+        """Builds a facade for shadow scoring. It reads and writes no cached or stored results, adds nothing to
+        the near-duplicate index and records no stage histograms, so the served traffic's state stays its own."""
+        from .facade import NewsClassifierFacade
+        facade = NewsClassifierFacade(model_singleton=self.load_version(version), record_metrics=False)
+        facade.result_cache = None
+        facade.result_store = None
+        facade.near_duplicate_index = None
+        return facade
+
+    def sync(self) -> bool:
+        """Brings this process in line with registry.json. Returns True if the serving model changed."""
+        from .facade import NewsClassifierFacade
+
+        with self._sync_lock:
+            manifest = self.read_manifest()
+            swapped = False
+            active = manifest['active']
+            if NewsClassifierFacade._instance is None:
+                # Nothing has been served yet: TfidfSvmSingleton loads the active version from registry.json
+                # when the facade is first used, so only forget a stale model. The shadow scorer is attached on
+                # the first poll after that.
+                with TfidfSvmSingleton._lock:
+                    loaded = TfidfSvmSingleton._instance
+                    if active and loaded is not None and loaded.get_model_version() != active:
+                        TfidfSvmSingleton._instance = None
+                self.loaded_active = active
+                self._deferred = True
+                return False
+
+            self._deferred = False
+            if active and active != self.loaded_active:
+                print(f"ModelRegistry: Loading model version {active} in the background...")
+                model_singleton = self.load_version(active)
+                facade = NewsClassifierFacade(model_singleton=model_singleton)
+                facade.shadow_scorer = self.shadow_scorer
+                with TfidfSvmSingleton._lock:
+                    TfidfSvmSingleton._instance = model_singleton
+                with NewsClassifierFacade._lock:
+                    replaced, NewsClassifierFacade._instance = NewsClassifierFacade._instance, facade
+                if replaced is not None and replaced.result_store is not None:
+                    replaced.result_store.close()
+                self.loaded_active = active
+                self.swaps += 1
+                swapped = True
+                print(f"ModelRegistry: Now serving model version {active}.")
+
+            shadow = manifest['shadow']
+            loaded_shadow = self.shadow_scorer.version if self.shadow_scorer else None
+            if shadow != loaded_shadow:
+                self.shadow_scorer = None
+                if shadow:
+                    self.shadow_scorer = ShadowScorer(self.build_facade(shadow), shadow,
+                                                      sample_rate=self.shadow_sample_rate,
+                                                      max_pending=self.shadow_max_pending)
+                    print(f"ModelRegistry: Shadow scoring against model version {shadow}.")
+                NewsClassifierFacade.get_instance().shadow_scorer = self.shadow_scorer
+            return swapped
+
+    def start_watcher(self):
+        if not self.poll_seconds or (self._watcher is not None and self._watcher.is_alive()):
+            return self._watcher
+        self._watcher = threading.Thread(target=self._watch, name='model-registry-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def _watch(self):
+        from .facade import NewsClassifierFacade
+
+        while True:
+            try:
+                mtime = os.stat(self.manifest_path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            deferred = self._deferred and NewsClassifierFacade._instance is not None
+            if mtime is not None and (mtime != self._manifest_mtime or deferred):
+                try:
+                    self.sync()
+                    self._manifest_mtime = mtime
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"ModelRegistry: ERROR while reloading models - {e}. Keeping the current model.")
+            time.sleep(self.poll_seconds)
+
+    def status(self) -> dict:
+        manifest = self.read_manifest()
+        return {
+            'directory': self.directory,
+            'active': manifest['active'],
+            'shadow': manifest['shadow'],
+            'loaded_active': self.loaded_active,
+            'versions': manifest['versions'],
+            'swaps': self.swaps,
+            'last_error': self.last_error,
+            'shadow_stats': self.shadow_scorer.stats() if self.shadow_scorer else None,
+        }
@@ -0,0 +1,382 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+INDEX_MANIFEST_FILENAME = 'manifest.json'
+BATCH_QUERY_CHUNK_SIZE = 64
+QUANTIZED_BLOCK_ROWS = 8192
+QUANTIZED_KEYS_FILENAME = 'keys.json'
+NORMALIZED_VECTORS_FILENAME = 'normed_vectors.npy'
+QUANTIZATION_DTYPES = {'float16': np.float16, 'int8': np.int8}
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def inverse_row_norms(vectors, block_rows: int = QUANTIZED_BLOCK_ROWS) -> np.ndarray:
+    scales = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), block_rows):
+        norms = np.linalg.norm(np.asarray(vectors[start:start + block_rows], dtype=np.float32), axis=1)
+        norms[norms == 0] = 1.0
+        scales[start:start + len(norms)] = 1.0 / norms
+    return scales
+
+
+def keys_checksum(keys) -> str:
+    digest = hashlib.sha1()
+    for key in keys:
+        digest.update(key.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def top_n_indices(scores: np.ndarray, topn: int) -> np.ndarray:
+    if topn >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    candidates = np.argpartition(-scores, topn)[:topn]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def score_rows(table: np.ndarray, queries: np.ndarray, row_scales: np.ndarray = None,
+               block_rows: int = QUANTIZED_BLOCK_ROWS) -> np.ndarray:
+    """Cosine scores of float32 queries against every table row.
+
+    Quantized tables are widened to float32 one block of rows at a time, so only the compact codes are streamed
+    from memory and no full-precision copy of the table is ever materialized."""
+    queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+    if row_scales is None and table.dtype == np.float32:
+        return queries @ np.asarray(table).T
+    scores = np.empty((len(queries), len(table)), dtype=np.float32)
+    for start in range(0, len(table), block_rows):
+        block = np.asarray(table[start:start + block_rows], dtype=np.float32)
+        scores[:, start:start + len(block)] = queries @ block.T
+    if row_scales is not None:
+        scores *= row_scales
+    return scores
+
+
+def table_rows(table: np.ndarray, rows, row_scales: np.ndarray = None) -> np.ndarray:
+    vectors = np.asarray(table[rows], dtype=np.float32)
+    return vectors if row_scales is None else vectors * row_scales[rows, None]
+
+
+def resolve_queries(queries, key_to_index, positions=None) -> list:
+    """Maps (positive, negative) word lists to table rows; None for queries with no or unknown words."""
+    resolved = []
+    for positive, negative in queries:
+        words = list(positive) + list(negative)
+        if not words or any(word not in key_to_index for word in words):
+            resolved.append(None)
+            continue
+        rows = [key_to_index[word] if positions is None else int(positions[key_to_index[word]]) for word in words]
+        resolved.append((rows[:len(positive)], rows[len(positive):]))
+    return resolved
+
+
+def batch_top_n(normed_vectors: np.ndarray, query_rows: list, topn: int,
+                chunk_size: int = BATCH_QUERY_CHUNK_SIZE, row_scales: np.ndarray = None) -> list:
+    """Scores each chunk of queries against the whole table with one matrix product.
+
+    A query is the normalized sum of its positive rows minus its negative rows, as in gensim's most_similar.
+    Returns a list of (row, score) pairs per query, or None where query_rows holds None."""
+    results = [None] * len(query_rows)
+    answerable = [number for number, rows in enumerate(query_rows) if rows is not None]
+    n_rows = len(normed_vectors)
+    width = min(topn, n_rows)
+    for start in range(0, len(answerable), chunk_size):
+        chunk = answerable[start:start + chunk_size]
+        queries = np.zeros((len(chunk), normed_vectors.shape[1]), dtype=np.float32)
+        for position, number in enumerate(chunk):
+            positive, negative = query_rows[number]
+            queries[position] = (table_rows(normed_vectors, positive, row_scales).sum(axis=0)
+                                 - table_rows(normed_vectors, negative, row_scales).sum(axis=0))
+
+        scores = score_rows(normed_vectors, normalize_rows(queries), row_scales)
+        for position, number in enumerate(chunk):
+            positive, negative = query_rows[number]
+            scores[position, positive + negative] = -np.inf
+
+        if width < n_rows:
+            best = np.argpartition(-scores, width - 1, axis=1)[:, :width]
+        else:
+            best = np.tile(np.arange(n_rows), (len(chunk), 1))
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        for position, number in enumerate(chunk):
+            finite = np.isfinite(best_scores[position])
+            results[number] = list(zip(best[position][finite].tolist(), best_scores[position][finite].tolist()))
+    return results
+
+
+class ExactNeighbourIndex:
+    """Brute-force cosine search over every row.
+
+    The table is either a unit-row matrix written once by normalize + save and memory-mapped by load, or the raw
+    vectors with one inverse norm per row, so a memory-mapped table is searched in place instead of being copied
+    into every worker."""
+
+    def __init__(self, keys, normed_vectors: np.ndarray, row_scales: np.ndarray = None):
+        self.index_to_key = list(keys)
+        self.key_to_index = {key: index for index, key in enumerate(self.index_to_key)}
+        self.normed_vectors = normed_vectors
+        self.row_scales = row_scales
+
+    @classmethod
+    def from_keyed_vectors(cls, keyed_vectors):
+        return cls(keyed_vectors.index_to_key, keyed_vectors.vectors,
+                   row_scales=inverse_row_norms(keyed_vectors.vectors))
+
+    @classmethod
+    def normalize(cls, keys, vectors, chunk_size: int = 65536):
+        normed_vectors = np.empty(vectors.shape, dtype=np.float32)
+        for start in range(0, len(vectors), chunk_size):
+            normed_vectors[start:start + chunk_size] = normalize_rows(vectors[start:start + chunk_size])
+        return cls(keys, normed_vectors)
+
+    def save(self, index_dir: str):
+        if self.row_scales is not None:
+            raise ValueError("Only a normalized table can be saved. Build it with ExactNeighbourIndex.normalize.")
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, NORMALIZED_VECTORS_FILENAME), self.normed_vectors)
+
+        manifest = {
+            'type': 'exact',
+            'vocabulary_size': len(self.index_to_key),
+            'keys_checksum': keys_checksum(self.index_to_key),
+            'dimension': int(self.normed_vectors.shape[1]),
+        }
+        with open(os.path.join(index_dir, INDEX_MANIFEST_FILENAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, index_dir: str, keys, mmap: bool = True):
+        with open(os.path.join(index_dir, INDEX_MANIFEST_FILENAME)) as f:
+            manifest = json.load(f)
+
+        keys = list(keys)
+        if manifest['vocabulary_size'] != len(keys) or manifest['keys_checksum'] != keys_checksum(keys):
+            raise ValueError(f"Normalized vectors at {index_dir} were built for a different vocabulary.")
+
+        normed_vectors = np.load(os.path.join(index_dir, NORMALIZED_VECTORS_FILENAME), mmap_mode='r' if mmap else None)
+        if normed_vectors.dtype != np.float32 or normed_vectors.shape != (len(keys), manifest['dimension']):
+            raise ValueError(f"Normalized vectors at {index_dir} do not match their manifest.")
+        return cls(keys, normed_vectors)
+
+    def most_similar(self, word: str, topn: int = 10) -> list:
+        word_index = self.key_to_index[word]
+        query = table_rows(self.normed_vectors, [word_index], self.row_scales)
+        scores = score_rows(self.normed_vectors, query, self.row_scales)[0]
+        scores[word_index] = -np.inf
+        best = top_n_indices(scores, topn)
+        return [(self.index_to_key[index], float(scores[index])) for index in best if np.isfinite(scores[index])]
+
+    def most_similar_batch(self, queries, topn: int = 10) -> list:
+        results = batch_top_n(self.normed_vectors, resolve_queries(queries, self.key_to_index), topn,
+                              row_scales=self.row_scales)
+        return [None if result is None else [(self.index_to_key[row], score) for row, score in result]
+                for result in results]
+
+
+class IvfNeighbourIndex:
+    def __init__(self, keys, centroids: np.ndarray, list_offsets: np.ndarray, row_ids: np.ndarray,
+                 positions: np.ndarray, ordered_vectors: np.ndarray, n_probe: int = 8):
+        self.index_to_key = list(keys)
+        self.key_to_index = {key: index for index, key in enumerate(self.index_to_key)}
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.row_ids = row_ids
+        self.positions = positions
+        self.ordered_vectors = ordered_vectors
+        self.n_probe = n_probe
+
+    @classmethod
+    def build(cls, keys, vectors, n_lists: int = None, n_iterations: int = 20, seed: int = 42,
+              chunk_size: int = 8192):
+        normed_vectors = normalize_rows(vectors)
+        n_rows = len(normed_vectors)
+        if n_lists is None:
+            n_lists = max(1, int(4 * np.sqrt(n_rows)))
+        n_lists = min(n_lists, n_rows)
+
+        rng = np.random.default_rng(seed)
+        centroids = normed_vectors[rng.choice(n_rows, size=n_lists, replace=False)].copy()
+        assignments = np.zeros(n_rows, dtype=np.int64)
+
+        for _ in range(n_iterations):
+            for start in range(0, n_rows, chunk_size):
+                chunk = normed_vectors[start:start + chunk_size]
+                assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, normed_vectors)
+            empty_lists = np.bincount(assignments, minlength=n_lists) == 0
+            sums[empty_lists] = normed_vectors[rng.choice(n_rows, size=int(empty_lists.sum()), replace=False)]
+            centroids = normalize_rows(sums)
+
+        row_ids = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=n_lists)
+        list_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        positions = np.empty_like(row_ids)
+        positions[row_ids] = np.arange(n_rows)
+
+        return cls(keys, centroids.astype(np.float32), list_offsets, row_ids, positions,
+                   np.ascontiguousarray(normed_vectors[row_ids]))
+
+    def save(self, index_dir: str):
+        os.makedirs(index_dir, exist_ok=True)
+        for name in ('centroids', 'list_offsets', 'row_ids', 'positions', 'ordered_vectors'):
+            np.save(os.path.join(index_dir, f'{name}.npy'), getattr(self, name))
+
+        manifest = {
+            'type': 'ivf',
+            'vocabulary_size': len(self.index_to_key),
+            'keys_checksum': keys_checksum(self.index_to_key),
+            'n_lists': int(len(self.centroids)),
+            'dimension': int(self.ordered_vectors.shape[1]),
+        }
+        with open(os.path.join(index_dir, INDEX_MANIFEST_FILENAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, index_dir: str, keys, n_probe: int = 8, mmap: bool = True):
+        with open(os.path.join(index_dir, INDEX_MANIFEST_FILENAME)) as f:
+            manifest = json.load(f)
+
+        keys = list(keys)
+        if manifest['vocabulary_size'] != len(keys) or manifest['keys_checksum'] != keys_checksum(keys):
+            raise ValueError(f"Neighbour index at {index_dir} was built for a different vocabulary.")
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(index_dir, f'{name}.npy'), mmap_mode=mmap_mode)
+                  for name in ('centroids', 'list_offsets', 'row_ids', 'positions', 'ordered_vectors')}
+        return cls(keys, n_probe=n_probe, **arrays)
+
+    def most_similar(self, word: str, topn: int = 10, n_probe: int = None) -> list:
+        word_index = self.key_to_index[word]
+        query = self.ordered_vectors[self.positions[word_index]]
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+
+        probed_lists = top_n_indices(self.centroids @ query, n_probe)
+        candidate_positions = np.concatenate([
+            np.arange(self.list_offsets[list_id], self.list_offsets[list_id + 1]) for list_id in probed_lists
+        ])
+
+        scores = self.ordered_vectors[candidate_positions] @ query
+        scores[candidate_positions == self.positions[word_index]] = -np.inf
+        best = top_n_indices(scores, topn)
+        return [(self.index_to_key[self.row_ids[candidate_positions[index]]], float(scores[index]))
+                for index in best if np.isfinite(scores[index])]
+
+    def most_similar_batch(self, queries, topn: int = 10) -> list:
+        """Exact batch search over the list-ordered table; probing only pays off for single queries."""
+        results = batch_top_n(self.ordered_vectors, resolve_queries(queries, self.key_to_index, self.positions), topn)
+        return [None if result is None else [(self.index_to_key[self.row_ids[position]], score)
+                                             for position, score in result]
+                for result in results]
+
+
+class QuantizedNeighbourIndex:
+    """Exact cosine search over unit rows stored as float16 or int8 codes with one float32 scale per row.
+
+    Rows are normalized before quantization and each scale also undoes the norm drift of its codes, so a
+    dequantized row is exactly unit length."""
+
+    def __init__(self, keys, codes: np.ndarray, scales: np.ndarray):
+        self.index_to_key = list(keys)
+        self.key_to_index = {key: index for index, key in enumerate(self.index_to_key)}
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def quantize(cls, keys, vectors, dtype: str = 'int8', chunk_size: int = 65536):
+        if dtype not in QUANTIZATION_DTYPES:
+            raise ValueError(f"Unknown quantization dtype '{dtype}'. Use one of {sorted(QUANTIZATION_DTYPES)}.")
+        codes = np.empty(vectors.shape, dtype=QUANTIZATION_DTYPES[dtype])
+        scales = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), chunk_size):
+            normed = normalize_rows(vectors[start:start + chunk_size])
+            if dtype == 'int8':
+                max_abs = np.abs(normed).max(axis=1, keepdims=True)
+                max_abs[max_abs == 0] = 1.0
+                chunk_codes = np.round(normed / max_abs * 127).astype(np.int8)
+            else:
+                chunk_codes = normed.astype(np.float16)
+            norms = np.linalg.norm(chunk_codes.astype(np.float32), axis=1)
+            norms[norms == 0] = 1.0
+            codes[start:start + len(normed)] = chunk_codes
+            scales[start:start + len(normed)] = 1.0 / norms
+        return cls(keys, codes, scales)
+
+    @property
+    def dtype(self) -> str:
+        return np.dtype(self.codes.dtype).name
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + self.scales.nbytes)
+
+    def save(self, index_dir: str):
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, 'codes.npy'), self.codes)
+        np.save(os.path.join(index_dir, 'scales.npy'), self.scales)
+        with open(os.path.join(index_dir, QUANTIZED_KEYS_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(self.index_to_key, f, ensure_ascii=False)
+
+        manifest = {
+            'type': 'quantized',
+            'dtype': self.dtype,
+            'vocabulary_size': len(self.index_to_key),
+            'keys_checksum': keys_checksum(self.index_to_key),
+            'dimension': int(self.codes.shape[1]),
+        }
+        with open(os.path.join(index_dir, INDEX_MANIFEST_FILENAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True):
+        with open(os.path.join(index_dir, INDEX_MANIFEST_FILENAME)) as f:
+            manifest = json.load(f)
+        with open(os.path.join(index_dir, QUANTIZED_KEYS_FILENAME), encoding='utf-8') as f:
+            keys = json.load(f)
+        if manifest['vocabulary_size'] != len(keys) or manifest['keys_checksum'] != keys_checksum(keys):
+            raise ValueError(f"Quantized vectors at {index_dir} do not match their vocabulary.")
+
+        mmap_mode = 'r' if mmap else None
+        codes = np.load(os.path.join(index_dir, 'codes.npy'), mmap_mode=mmap_mode)
+        scales = np.load(os.path.join(index_dir, 'scales.npy'))
+        if np.dtype(codes.dtype).name != manifest['dtype'] or codes.shape != (len(keys), manifest['dimension']):
+            raise ValueError(f"Quantized vectors at {index_dir} do not match their manifest.")
+        return cls(keys, codes, scales)
+
+    def most_similar(self, word: str, topn: int = 10) -> list:
+        word_index = self.key_to_index[word]
+        scores = score_rows(self.codes, table_rows(self.codes, [word_index], self.scales), self.scales)[0]
+        scores[word_index] = -np.inf
+        best = top_n_indices(scores, topn)
+        return [(self.index_to_key[index], float(scores[index])) for index in best if np.isfinite(scores[index])]
+
+    def most_similar_batch(self, queries, topn: int = 10) -> list:
+        results = batch_top_n(self.codes, resolve_queries(queries, self.key_to_index), topn, row_scales=self.scales)
+        return [None if result is None else [(self.index_to_key[row], score) for row, score in result]
+                for result in results]
+
+
+def top_n_overlap(reference, candidate, probe_words, topn: int = 10) -> dict:
+    """Mean share of reference's top-N neighbours that candidate also returns, over the probe words it knows."""
+    probe_words = [word for word in probe_words if word in reference.key_to_index and word in candidate.key_to_index]
+    overlaps = []
+    for word in probe_words:
+        expected = {neighbour for neighbour, _ in reference.most_similar(word, topn=topn)}
+        found = {neighbour for neighbour, _ in candidate.most_similar(word, topn=topn)}
+        overlaps.append(len(expected & found) / max(len(expected), 1))
+    return {'probe_words': len(probe_words), 'topn': topn,
+            'mean_overlap': float(np.mean(overlaps)) if overlaps else None,
+            'min_overlap': float(np.min(overlaps)) if overlaps else None}
@@ -0,0 +1,189 @@
+import hashlib
+import queue
+import threading
+import time
+
+from .conf import get_setting
+
+
+class ClassificationStore:
+    """Durable log of classifications, written in bulk by a background thread.
+
+    Requests only enqueue records, so they never wait on the database. With read_through enabled, the latest
+    record for a content hash and model version also serves as a second-level result cache."""
+
+    def __init__(self, model_label: str = 'fake_news_ui.ClassificationRecord', read_through: bool = True,
+                 batch_size: int = 100, flush_interval: float = 1.0, max_queue: int = 10000, normalizer=None):
+        self.model_label = model_label
+        self.read_through = read_through
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.normalizer = normalizer
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = None
+        self._stopping = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls, normalizer=None):
+        config = get_setting('CLASSIFICATION_STORE', {})
+        if not config.get('ENABLED', False):
+            return None
+        return cls(model_label=config.get('MODEL', 'fake_news_ui.ClassificationRecord'),
+                   read_through=config.get('READ_THROUGH', True),
+                   batch_size=config.get('BATCH_SIZE', 100),
+                   flush_interval=config.get('FLUSH_INTERVAL_SECONDS', 1.0),
+                   max_queue=config.get('MAX_QUEUE', 10000),
+                   normalizer=normalizer)
+
+    def get_model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_label)
+
+    def content_hash(self, text: str) -> str:
+        if self.normalizer:
+            text = self.normalizer(text)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def record(self, text: str, model_version, result: dict, probabilities, stage_timings: dict = None,
+               batch_size: int = 1):
+        fields = {
+            'content_hash': self.content_hash(text),
+            'model_version': str(model_version),
+            'label': result['classification_result'],
+            'confidence': float(result.get('confidence', 0.0)),
+            'probabilities': [float(probability) for probability in probabilities],
+            'stage_timings': {stage: round(seconds, 6) for stage, seconds in (stage_timings or {}).items()},
+            'text_length': len(text),
+            'batch_size': batch_size,
+        }
+        if self._closed:
+            # A request that still held a replaced facade: write it directly instead of restarting the writer.
+            with self._lock:
+                self.recorded += 1
+            self._write([fields])
+            return
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.recorded += 1
+
+    def lookup_many(self, texts, model_version) -> list:
+        if not self.read_through or not texts:
+            return [None] * len(texts)
+
+        hashes = [self.content_hash(text) for text in texts]
+        try:
+            rows = (self.get_model().objects
+                    .filter(content_hash__in=set(hashes), model_version=str(model_version))
+                    .order_by('content_hash', '-created_at')
+                    .values_list('content_hash', 'probabilities'))
+            latest = {}
+            for content_hash, probabilities in rows:
+                latest.setdefault(content_hash, probabilities)
+        except Exception as e:
+            print(f"ClassificationStore: Lookup failed - {e}")
+            return [None] * len(texts)
+
+        found = [latest.get(content_hash) for content_hash in hashes]
+        with self._lock:
+            self.hits += sum(probabilities is not None for probabilities in found)
+            self.misses += sum(probabilities is None for probabilities in found)
+        return found
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            pending = []
+            while True:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            return self._write(pending)
+
+    def close(self, timeout: float = None) -> int:
+        """Stops the writer thread and writes what is still queued. Records arriving afterwards are written
+        synchronously. Returns the number of records written by the final flush."""
+        with self._lock:
+            self._closed = True
+            writer, stopping, self._writer = self._writer, self._stopping, None
+        if writer is not None:
+            stopping.set()
+            writer.join(timeout)
+        return self.flush()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'pending': self._queue.qsize(),
+            'recorded': self.recorded,
+            'written': self.written,
+            'dropped': self.dropped,
+            'write_errors': self.write_errors,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None and not self._closed:
+                self._stopping = threading.Event()
+                self._writer = threading.Thread(target=self._run, args=(self._stopping,),
+                                                name='classification-store-writer', daemon=True)
+                self._writer.start()
+
+    def _run(self, stopping: threading.Event):
+        from django.db import close_old_connections, connection
+
+        while not stopping.is_set():
+            try:
+                pending = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            with self._flush_lock:
+                self._write(pending)
+            close_old_connections()
+        connection.close()
+
+    def _write(self, pending: list) -> int:
+        if not pending:
+            return 0
+
+        model = self.get_model()
+        try:
+            model.objects.bulk_create([model(**fields) for fields in pending], batch_size=self.batch_size)
+        except Exception as e:
+            print(f"ClassificationStore: Failed to write {len(pending)} records - {e}")
+            with self._lock:
+                self.write_errors += len(pending)
+            return 0
+        with self._lock:
+            self.written += len(pending)
+        return len(pending)
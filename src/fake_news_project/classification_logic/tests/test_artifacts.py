@@ -0,0 +1,115 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+import warnings
+from unittest.mock import patch
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.svm import SVC
+
+from .. import model_loaders
+from ..artifacts import export_estimators, load_estimators, ArtifactFormatError, ARTIFACT_MANIFEST_FILENAME
+from ..benchmarking import isolated_model_singletons
+
+
+class TestArrayArtifacts(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        words = [f"cuvant{index}" for index in range(300)]
+        cls.documents = [' '.join(rng.choice(words, size=40)) for _ in range(150)]
+        labels = [index % 5 for index in range(150)]
+
+        cls.vectorizer = TfidfVectorizer(ngram_range=(1, 2), max_df=0.95, min_df=2).fit(cls.documents)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            cls.svm_model = SVC(random_state=42, probability=True).fit(cls.vectorizer.transform(cls.documents),
+                                                                       labels)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_round_trip_reproduces_predict_proba(self):
+        export_estimators(self.directory.name, {'vectorizer': self.vectorizer, 'svm_model': self.svm_model},
+                          metadata={'model_version': 'abc123'})
+
+        estimators, metadata = load_estimators(self.directory.name, mmap_mode='r')
+
+        self.assertEqual(metadata['model_version'], 'abc123')
+        self.assertEqual(estimators['vectorizer'].vocabulary_, self.vectorizer.vocabulary_)
+        self.assertFalse(estimators['svm_model'].support_vectors_.data.flags.writeable)
+        expected = self.svm_model.predict_proba(self.vectorizer.transform(self.documents[:20]))
+        actual = estimators['svm_model'].predict_proba(estimators['vectorizer'].transform(self.documents[:20]))
+        np.testing.assert_array_equal(actual, expected)
+        self.assertFalse(any(name.endswith('.pkl') for name in os.listdir(self.directory.name)))
+
+    def test_rejects_classes_outside_the_whitelist(self):
+        export_estimators(self.directory.name, {'vectorizer': self.vectorizer})
+        manifest_path = os.path.join(self.directory.name, ARTIFACT_MANIFEST_FILENAME)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        manifest['estimators']['vectorizer']['__estimator__'] = 'os.system'
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+
+        with self.assertRaises(ArtifactFormatError):
+            load_estimators(self.directory.name)
+
+    def test_auto_format_serves_arrays_only_while_they_match_the_pickles(self):
+        vectorizer_path = os.path.join(self.directory.name, 'final_tfidf_vectorizer.pkl')
+        svm_model_path = os.path.join(self.directory.name, 'final_svm_model.pkl')
+        arrays_dir = os.path.join(self.directory.name, 'tfidf_svm_arrays')
+        for path, estimator in ((vectorizer_path, self.vectorizer), (svm_model_path, self.svm_model)):
+            with open(path, 'wb') as f:
+                pickle.dump(estimator, f)
+
+        with patch.object(model_loaders, 'VECTORIZER_PATH', vectorizer_path), \
+                patch.object(model_loaders, 'SVM_MODEL_PATH', svm_model_path), \
+                patch.object(model_loaders, 'TFIDF_SVM_ARRAYS_DIR', arrays_dir), \
+                patch.object(model_loaders.TfidfSvmSingleton, '_load_registered_version', return_value=None), \
+                isolated_model_singletons():
+            model_loaders.TfidfSvmSingleton.export_arrays(arrays_dir)
+            singleton = model_loaders.TfidfSvmSingleton.get_instance()
+            self.assertFalse(singleton.get_svm_model().support_vectors_.data.flags.writeable)
+            pickle_version = singleton.get_model_version()
+
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', FutureWarning)
+                retrained = SVC(C=2, random_state=42, probability=True).fit(
+                    self.vectorizer.transform(self.documents), [index % 5 for index in range(150)])
+            with open(svm_model_path, 'wb') as f:
+                pickle.dump(retrained, f)
+            model_loaders.TfidfSvmSingleton._instance = None
+            singleton = model_loaders.TfidfSvmSingleton.get_instance()
+
+            self.assertTrue(singleton.get_svm_model().support_vectors_.data.flags.writeable)
+            self.assertNotEqual(singleton.get_model_version(), pickle_version)
+            self.assertEqual(singleton.get_model_version(),
+                             model_loaders.TfidfSvmSingleton._compute_model_version(vectorizer_path, svm_model_path))
+
+    def test_model_version_follows_contents_not_file_times(self):
+        paths = []
+        for name in ('first', 'copy'):
+            path = os.path.join(self.directory.name, name, 'final_svm_model.pkl')
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                pickle.dump(self.svm_model, f)
+            paths.append(path)
+        stat = os.stat(paths[1])
+        os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        version = model_loaders.TfidfSvmSingleton._compute_model_version(paths[0])
+        self.assertEqual(model_loaders.TfidfSvmSingleton._compute_model_version(paths[1]), version)
+        with open(paths[1], 'ab') as f:
+            f.write(b'\0')
+        self.assertNotEqual(model_loaders.TfidfSvmSingleton._compute_model_version(paths[1]), version)
+
+    def test_rejects_unserializable_attributes(self):
+        vectorizer = TfidfVectorizer(tokenizer=str.split, token_pattern=None).fit(self.documents[:10])
+
+        with self.assertRaises(ArtifactFormatError):
+            export_estimators(self.directory.name, {'vectorizer': vectorizer})
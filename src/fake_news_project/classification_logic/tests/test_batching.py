@@ -0,0 +1,51 @@
+import queue
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from ..batching import MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_submissions_share_one_batch(self):
+        classify_batch = MagicMock(side_effect=lambda texts: [{'classification_result': text.upper()} for text in texts])
+        batcher = MicroBatcher(classify_batch, max_batch_size=8, max_wait=0.2)
+
+        futures = [batcher.submit(text) for text in ('a', 'b', 'c')]
+
+        self.assertEqual([future.result(timeout=5)['classification_result'] for future in futures], ['A', 'B', 'C'])
+        classify_batch.assert_called_once_with(['a', 'b', 'c'])
+        stats = batcher.stats()
+        self.assertEqual(stats['batches'], 1)
+        self.assertEqual(stats['max_batch_size'], 3)
+        self.assertEqual(stats['batch_size_counts'], {3: 1})
+
+    def test_batch_size_is_capped_and_errors_propagate(self):
+        classify_batch = MagicMock(side_effect=RuntimeError("model unavailable"))
+        batcher = MicroBatcher(classify_batch, max_batch_size=2, max_wait=0.2)
+
+        futures = [batcher.submit(text) for text in ('a', 'b', 'c')]
+
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+        self.assertEqual(classify_batch.call_count, 2)
+        self.assertEqual(batcher.stats()['max_batch_size'], 2)
+
+    def test_full_queue_rejects_submissions(self):
+        release = threading.Event()
+        classify_batch = MagicMock(side_effect=lambda texts: release.wait(5) and [{}] * len(texts))
+        batcher = MicroBatcher(classify_batch, max_batch_size=1, max_wait=0, max_queue=1)
+
+        first = batcher.submit('a')
+        while classify_batch.call_count == 0:
+            pass
+        batcher.submit('b')
+
+        with self.assertRaises(queue.Full):
+            batcher.submit('c')
+        self.assertEqual(batcher.stats()['rejected'], 1)
+        self.assertEqual(batcher.stats()['queue_depth'], 1)
+
+        release.set()
+        self.assertEqual(first.result(timeout=5), {})
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from ..benchmarking import (BenchmarkRunner, StandInArtifacts, build_synthetic_corpus, compare_results,
+                            isolated_model_singletons, sample_corpus, summarize)
+from ..emotions import EmotionLexicon
+from ..near_duplicates import NearDuplicateIndex
+from ..registry import ModelRegistry
+
+
+class TestBenchmarking(unittest.TestCase):
+    def test_synthetic_corpus_is_deterministic(self):
+        first = build_synthetic_corpus(3, 50, seed=1)
+
+        self.assertEqual(first, build_synthetic_corpus(3, 50, seed=1))
+        self.assertNotEqual(first, build_synthetic_corpus(3, 50, seed=2))
+        self.assertEqual([len(text.split()) for text in first], [50, 50, 50])
+
+    def test_sample_corpus_is_seeded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'articles.csv')
+            with open(path, 'w') as f:
+                f.write('id,content\n' + ''.join(f'{i},articolul {i}\n' for i in range(50)))
+
+            sample = sample_corpus(path, 5, seed=3)
+
+            self.assertEqual(len(sample), 5)
+            self.assertEqual(sample, sample_corpus(path, 5, seed=3))
+
+    def test_isolation_covers_registry_near_duplicate_and_lexicon_singletons(self):
+        singletons = (ModelRegistry, NearDuplicateIndex, EmotionLexicon)
+        saved = [cls._instance for cls in singletons]
+        sentinels = [object() for _ in singletons]
+        try:
+            for cls, sentinel in zip(singletons, sentinels):
+                cls._instance = sentinel
+
+            with isolated_model_singletons():
+                self.assertEqual([cls._instance for cls in singletons], [None] * len(singletons))
+                ModelRegistry._instance = ModelRegistry(tempfile.gettempdir(), poll_seconds=0)
+
+            self.assertEqual([cls._instance for cls in singletons], sentinels)
+        finally:
+            for cls, instance in zip(singletons, saved):
+                cls._instance = instance
+
+    def test_cold_start_keeps_the_stand_in_registry(self):
+        with tempfile.TemporaryDirectory() as directory:
+            artifacts = StandInArtifacts(directory, n_training_docs=60).build()
+            with artifacts.activate():
+                BenchmarkRunner({}, repeat=1, log=lambda message: None).bench_cold_start()
+
+                self.assertEqual(ModelRegistry.get_instance().directory, os.path.join(directory, 'registry'))
+
+    def test_compare_results_respects_direction(self):
+        baseline = {'results': {'classify.short': summarize([0.010]),
+                                'classify_batch.short': summarize([100.0], unit='docs/s', better='higher')}}
+        current = {'results': {'classify.short': summarize([0.011]),
+                               'classify_batch.short': summarize([70.0], unit='docs/s', better='higher'),
+                               'most_similar.300': summarize([0.001])}}
+
+        comparisons = {comparison['name']: comparison for comparison in compare_results(baseline, current, 0.2)}
+
+        self.assertEqual(set(comparisons), {'classify.short', 'classify_batch.short'})
+        self.assertFalse(comparisons['classify.short']['regression'])
+        self.assertTrue(comparisons['classify_batch.short']['regression'])
+        self.assertAlmostEqual(comparisons['classify_batch.short']['slowdown'], 0.3)
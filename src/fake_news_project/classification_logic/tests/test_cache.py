@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from ..cache import LRUCache, ClassificationResultCache
+from ..preprocessors import TextPreprocessor
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_least_recently_used_entry_evicted(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('classification_logic.cache.time.monotonic')
+    def test_expired_entry_dropped(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        cache = LRUCache(max_entries=10, ttl=30)
+        cache.set('a', 1)
+
+        mock_monotonic.return_value = 129.0
+        self.assertEqual(cache.get('a'), 1)
+        mock_monotonic.return_value = 131.0
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class TestClassificationResultCache(unittest.TestCase):
+    def test_normalized_text_shares_entry(self):
+        cache = ClassificationResultCache(max_entries=10, normalizer=TextPreprocessor.clean_text)
+        cache.set("Știre  FALSĂ!", 'v1', {'classification_result': 'FAKE', 'confidence': 0.9})
+
+        result = cache.get("știre falsă", 'v1')
+
+        self.assertEqual(result['classification_result'], 'FAKE')
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_model_version_change_invalidates(self):
+        cache = ClassificationResultCache(max_entries=10)
+        cache.set("text", 'v1', {'classification_result': 'REAL', 'confidence': 0.9})
+
+        self.assertIsNone(cache.get("text", 'v2'))
+        self.assertIsNone(cache.get("text", 'v1'))
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    @patch('django.core.cache.caches')
+    def test_shared_tier_read_through(self, mock_caches):
+        shared_cache = MagicMock()
+        shared_cache.get.return_value = {'classification_result': 'SATIRE', 'confidence': 0.85}
+        mock_caches.__getitem__.return_value = shared_cache
+        cache = ClassificationResultCache(max_entries=10, shared_cache_alias='default')
+
+        first = cache.get("text", 'v1')
+        second = cache.get("text", 'v1')
+
+        self.assertEqual(first['classification_result'], 'SATIRE')
+        self.assertEqual(second['classification_result'], 'SATIRE')
+        shared_cache.get.assert_called_once()
+        self.assertEqual(cache.stats()['shared_hits'], 1)
+        self.assertEqual(cache.stats()['hits'], 2)
@@ -0,0 +1,78 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..corpus import CorpusStore, CorpusWriter, convert_csv, infer_csv_schema, parse_list_literal
+
+ROWS = [
+    {'id': '1', 'content': 'Guvernul a anunțat, "azi", noi măsuri.', 'tag': 'REAL', 'word_count': '5',
+     'noun_prop': '0.4', 'lemmas_filtered': "['guvern', 'anunța', 'măsură']",
+     'pos_tags': "['NOUN', 'AUX', 'VERB']", 'entities': "[('Guvernul', 'ORGANIZATION')]"},
+    {'id': '2', 'content': 'Vaccinul\nconține cipuri.', 'tag': 'FAKE', 'word_count': '3', 'noun_prop': '',
+     'lemmas_filtered': "['vaccin', 'conține', 'cip']", 'pos_tags': "['NOUN', 'VERB', 'NOUN']",
+     'entities': '[]'},
+    {'id': '3', 'content': '', 'tag': 'SATIRE', 'word_count': '0', 'noun_prop': '0',
+     'lemmas_filtered': '[]', 'pos_tags': '[]', 'entities': "[('Ion Popescu', 'PERSON'), ('Guvernul', 'ORGANIZATION')]"},
+]
+LIST_COLUMNS = ('lemmas_filtered', 'pos_tags', 'entities')
+
+
+class TestCorpusStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.directory.name, 'final.csv')
+        with open(self.csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(ROWS[0]))
+            writer.writeheader()
+            writer.writerows(ROWS)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_converted_csv_matches_literal_eval(self):
+        self.assertEqual(infer_csv_schema(self.csv_path),
+                         {'id': 'int', 'content': 'string', 'tag': 'string', 'word_count': 'int', 'noun_prop': 'float',
+                          'lemmas_filtered': 'list', 'pos_tags': 'list', 'entities': 'list'})
+
+        store = convert_csv(self.csv_path, os.path.join(self.directory.name, 'final.corpus'), chunk_rows=2)
+
+        self.assertEqual(len(store), 3)
+        for name in LIST_COLUMNS:
+            self.assertEqual(store[name].tolist(), [parse_list_literal(row[name]) for row in ROWS])
+        self.assertEqual(store['content'].tolist(), [row['content'] for row in ROWS])
+        self.assertEqual(store['entities'][2][0], ('Ion Popescu', 'PERSON'))
+        np.testing.assert_array_equal(store['word_count'], [5, 3, 0])
+        np.testing.assert_array_equal(store['noun_prop'], [0.4, np.nan, 0.0])
+        self.assertEqual(list(store['lemmas_filtered'].documents()), ['guvern anunța măsură', 'vaccin conține cip', ''])
+        np.testing.assert_array_equal(store['pos_tags'].lengths(), [3, 3, 0])
+        self.assertIsInstance(store['lemmas_filtered'].codes, np.memmap)
+
+    def test_projection_and_chunked_iteration(self):
+        store = convert_csv(self.csv_path, os.path.join(self.directory.name, 'final.corpus'))
+
+        chunks = list(store.iter_chunks(columns=['tag', 'lemmas_filtered'], chunk_size=2))
+
+        self.assertEqual([list(chunk) for chunk in chunks], [['tag', 'lemmas_filtered']] * 2)
+        self.assertEqual(chunks[0]['tag'] + chunks[1]['tag'], ['REAL', 'FAKE', 'SATIRE'])
+        self.assertEqual(chunks[1]['lemmas_filtered'], [[]])
+        self.assertEqual(set(store._columns), {'tag', 'lemmas_filtered'})
+        with self.assertRaises(KeyError):
+            store.column('lemmas')
+
+    def test_failed_write_leaves_the_previous_corpus_in_place(self):
+        directory = os.path.join(self.directory.name, 'final.corpus')
+        convert_csv(self.csv_path, directory)
+
+        with self.assertRaises(ValueError):
+            with CorpusWriter(directory, {'entities': 'list'}) as writer:
+                writer.append([{'entities': [('Guvernul', 'ORGANIZATION')]}, {'entities': ['Guvernul']}])
+
+        self.assertEqual(len(CorpusStore(directory)), 3)
+        self.assertFalse(os.path.exists(f"{directory}.tmp"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..emotions import (EmotionLexicon, EMOTION_COLUMNS, EMOTION_PRIORITY, FEATURE_COLUMNS, POLARITY_COLUMNS,
+                        SCORE_COLUMNS)
+
+WORDS_CSV = """;word;part_of_speech;Positivity;Negativity;Anger;Anticipation;Disgust;Fear;Joy;Sadness;Surprise;Trust;wn_synset_id
+0;bate;Verb;0;1;1;0;0;1;0;0;0;0;x
+1;Abac;Noun;0;0;0;0;0;0;0;0;0;1;x
+2;bucurie;Noun;1;0;0;1;0;0;1;0;0;1;x
+3;abac;Noun;1;1;1;1;1;1;1;1;1;1;x
+4;surpriză;Noun;1;1;0;0;0;0;0;0;1;0;x
+5;lovi repetat;Expresie;0;1;1;0;0;1;0;0;0;0;x
+"""
+EXPRESSIONS_CSV = """;word;part_of_speech;Pozitivitate;Negativitate;Furie;Anticipare;Dezgust;Frica;Bucurie;Tristete;Surpriza;Incredere;wn_synset_id
+0;trimitere în judecată;Expresie;0;1;1;0;0;1;0;1;0;0;x
+1;lovi repetat bate;Expresie;0;0;0;0;1;0;0;0;0;0;x
+"""
+
+
+def notebook_features(lemmas, lexicon_dict):
+    scores = {column: 0 for column in SCORE_COLUMNS}
+    sentiment = [0, 0, 0]
+    exclusive = {column: 0 for column in SCORE_COLUMNS}
+    matched = matched_exclusive = 0
+    for lemma in lemmas:
+        if lemma not in lexicon_dict:
+            continue
+        entry = lexicon_dict[lemma]
+        matched += 1
+        for column in SCORE_COLUMNS:
+            scores[column] += entry[column]
+        positive, negative = entry['Positivity'] > 0, entry['Negativity'] > 0
+        if positive and negative:
+            sentiment[2] += 1
+        elif positive:
+            sentiment[0] += 1
+        elif negative:
+            sentiment[1] += 1
+        assigned = next((emotion for emotion in EMOTION_PRIORITY if entry[emotion] > 0), None)
+        if assigned:
+            exclusive[assigned] += 1
+            matched_exclusive += 1
+        for polarity in POLARITY_COLUMNS:
+            exclusive[polarity] += entry[polarity]
+
+    means = [scores[emotion] / max(matched, 1) for emotion in EMOTION_COLUMNS]
+    percentages = [count / matched * 100 if matched else 0 for count in sentiment]
+    return ([scores[column] for column in SCORE_COLUMNS] + [matched] + means + sentiment + percentages
+            + [exclusive[column] for column in SCORE_COLUMNS] + [matched_exclusive])
+
+
+class TestEmotionLexicon(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.words_path = os.path.join(cls.directory.name, 'words.csv')
+        cls.expressions_path = os.path.join(cls.directory.name, 'expressions.csv')
+        with open(cls.words_path, 'w', encoding='utf-8') as f:
+            f.write(WORDS_CSV)
+        with open(cls.expressions_path, 'w', encoding='utf-8') as f:
+            f.write(EXPRESSIONS_CSV)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_single_words_match_notebook_functions(self):
+        lexicon = EmotionLexicon.from_csv(self.words_path)
+        lexicon_dict = {'bate': dict(zip(SCORE_COLUMNS, [1, 0, 0, 1, 0, 0, 0, 0, 0, 1])),
+                        'abac': dict(zip(SCORE_COLUMNS, [0, 0, 0, 0, 0, 0, 0, 1, 0, 0])),
+                        'bucurie': dict(zip(SCORE_COLUMNS, [0, 1, 0, 0, 1, 0, 0, 1, 1, 0])),
+                        'surpriză': dict(zip(SCORE_COLUMNS, [0, 0, 0, 0, 0, 0, 1, 0, 1, 1]))}
+        rng = np.random.default_rng(0)
+        words = list(lexicon_dict) + ['guvern', 'repetat']
+        lemma_lists = [list(rng.choice(words, size=rng.integers(0, 30))) for _ in range(50)] + [[], None]
+
+        features = lexicon.score_batch(lemma_lists)
+
+        expected = [notebook_features(lemmas or [], lexicon_dict) for lemmas in lemma_lists]
+        np.testing.assert_allclose(features, np.array(expected, dtype=float))
+        self.assertEqual(features.shape[1], len(FEATURE_COLUMNS))
+
+    def test_expressions_match_longest_within_documents(self):
+        lexicon = EmotionLexicon.from_csv(self.words_path, self.expressions_path, skip_tokens={'în'})
+
+        counts = lexicon.score_batch([
+            ['lovi', 'repetat', 'bate', 'bate'],
+            ['trimitere', 'judecată', 'lovi'],
+            ['lovi'], ['repetat', 'bate'],
+        ], columns=('Anger', 'Disgust', 'Sadness', 'matched_emotion_words'))
+
+        np.testing.assert_array_equal(counts, [[1, 1, 0, 2], [1, 0, 1, 1], [0, 0, 0, 0], [1, 0, 0, 1]])
+
+    def test_score_returns_named_features(self):
+        lexicon = EmotionLexicon.from_csv(self.words_path, os.path.join(self.directory.name, 'missing.csv'))
+
+        features = lexicon.score(['bucurie', 'necunoscut'])
+
+        self.assertEqual(features['matched_emotion_words'], 1)
+        self.assertEqual(features['Joy_exclusive'], 0)
+        self.assertEqual(features['Anticipation_exclusive'], 1)
+        self.assertEqual(features['percentage_positive_specific'], 100)
@@ -1,8 +1,11 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
 
+from ..cache import ClassificationResultCache
 from ..facade import NewsClassifierFacade
+from ..preprocessors import TextPreprocessor
 
 
 class TestNewsClassifierFacade(unittest.TestCase):
@@ -112,5 +115,245 @@ class TestNewsClassifierFacade(unittest.TestCase):
         self.assertIn('Model components are not available', result.get('message', ''))
 
 
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    @patch('classification_logic.facade.TfidfSvmSingleton.get_instance')
+    def test_classify_batch_confidence_bands(self, mock_get_singleton, mock_get_preprocessor):
+        mock_svm_model = MagicMock()
+        mock_vectorizer = MagicMock()
+        mock_svm_model.predict_proba.return_value = np.array([
+            [0.05, 0.92, 0.01, 0.01, 0.01],
+            [0.15, 0.75, 0.05, 0.03, 0.02],
+            [0.30, 0.28, 0.15, 0.14, 0.13],
+        ])
+
+        mock_singleton_instance = MagicMock()
+        mock_singleton_instance.get_svm_model.return_value = mock_svm_model
+        mock_singleton_instance.get_vectorizer.return_value = mock_vectorizer
+        mock_singleton_instance.get_label_mapping.return_value = {
+            0: 'real_news',
+            1: 'misinformation',
+            2: 'propaganda',
+            3: 'fake_news',
+            4: 'satire'
+        }
+        mock_get_singleton.return_value = mock_singleton_instance
+
+        mock_preprocessor_instance = MagicMock()
+        mock_preprocessor_instance.iter_processed_texts_for_tfidf.side_effect = \
+            lambda texts, **kwargs: (f"processed {text}" for text in texts)
+        mock_get_preprocessor.return_value = mock_preprocessor_instance
+
+        facade = NewsClassifierFacade()
+        results = facade.classify_batch(["first", "", "second", "third"])
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0]['classification_result'], 'misinformation')
+        self.assertNotIn('all_predictions', results[0])
+        self.assertEqual(results[1]['classification_result'], 'ERROR')
+        self.assertEqual(results[2]['classification_result'], 'misinformation')
+        self.assertEqual(len(results[2]['all_predictions']), 5)
+        self.assertEqual(results[3]['classification_result'], 'MANUAL_VERIFICATION')
+
+        mock_vectorizer.transform.assert_called_once_with(
+            ["processed first", "processed second", "processed third"])
+        mock_svm_model.predict_proba.assert_called_once()
+
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    @patch('classification_logic.facade.TfidfSvmSingleton.get_instance')
+    def test_classify_batch_one_prediction_per_chunk(self, mock_get_singleton, mock_get_preprocessor):
+        mock_svm_model = MagicMock()
+        mock_svm_model.predict_proba.side_effect = \
+            lambda vectors: np.tile([0.05, 0.92, 0.01, 0.01, 0.01], (len(vectors), 1))
+        mock_vectorizer = MagicMock()
+        mock_vectorizer.transform.side_effect = lambda texts: texts
+
+        mock_singleton_instance = MagicMock()
+        mock_singleton_instance.get_svm_model.return_value = mock_svm_model
+        mock_singleton_instance.get_vectorizer.return_value = mock_vectorizer
+        mock_singleton_instance.get_label_mapping.return_value = {1: 'fake_news'}
+        mock_get_singleton.return_value = mock_singleton_instance
+
+        mock_preprocessor_instance = MagicMock()
+        mock_preprocessor_instance.iter_processed_texts_for_tfidf.side_effect = \
+            lambda texts, **kwargs: (text for text in texts)
+        mock_get_preprocessor.return_value = mock_preprocessor_instance
+
+        facade = NewsClassifierFacade()
+        results = facade.classify_batch([f"article {i}" for i in range(5)], batch_size=2)
+
+        self.assertEqual([result['classification_result'] for result in results], ['fake_news'] * 5)
+        self.assertEqual(mock_svm_model.predict_proba.call_count, 3)
+
+        mock_svm_model.predict_proba.reset_mock()
+        streamed_results = facade.iter_classify_batch([f"streamed article {i}" for i in range(5)], batch_size=2)
+        self.assertEqual(next(streamed_results)['classification_result'], 'fake_news')
+        self.assertEqual(mock_svm_model.predict_proba.call_count, 1)
+
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    @patch('classification_logic.facade.TfidfSvmSingleton.get_instance')
+    def test_classify_batch_isolates_a_bad_document(self, mock_get_singleton, mock_get_preprocessor):
+        mock_svm_model = MagicMock()
+        mock_svm_model.predict_proba.side_effect = \
+            lambda vectors: np.tile([0.05, 0.92, 0.01, 0.01, 0.01], (len(vectors), 1))
+        mock_vectorizer = MagicMock()
+        mock_vectorizer.transform.side_effect = lambda texts: texts
+
+        mock_singleton_instance = MagicMock()
+        mock_singleton_instance.get_svm_model.return_value = mock_svm_model
+        mock_singleton_instance.get_vectorizer.return_value = mock_vectorizer
+        mock_singleton_instance.get_label_mapping.return_value = {1: 'fake_news'}
+        mock_get_singleton.return_value = mock_singleton_instance
+
+        def preprocess(text):
+            if text == "bad article":
+                raise ValueError("spaCy failed")
+            return text
+
+        mock_preprocessor_instance = MagicMock()
+        mock_preprocessor_instance.iter_processed_texts_for_tfidf.side_effect = \
+            lambda texts, **kwargs: (preprocess(text) for text in texts)
+        mock_preprocessor_instance.get_processed_text_for_tfidf.side_effect = preprocess
+        mock_get_preprocessor.return_value = mock_preprocessor_instance
+
+        facade = NewsClassifierFacade()
+        facade.result_cache = None
+        facade.result_store = None
+        facade.near_duplicate_index = None
+        texts = ["article 0", "article 1", "article 2", "bad article", "article 4", "article 5", "article 6"]
+        results = facade.classify_batch(texts, batch_size=2)
+
+        self.assertEqual([result['classification_result'] for result in results],
+                         ['fake_news'] * 3 + ["ERROR"] + ['fake_news'] * 3)
+        self.assertEqual(mock_preprocessor_instance.iter_processed_texts_for_tfidf.call_count, 2)
+
+    @patch('classification_logic.facade.ClassificationResultCache.from_settings')
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    @patch('classification_logic.facade.TfidfSvmSingleton.get_instance')
+    def test_classify_uses_result_cache(self, mock_get_singleton, mock_get_preprocessor, mock_cache_from_settings):
+        mock_svm_model = MagicMock()
+        mock_svm_model.predict_proba.return_value = np.array([[0.05, 0.92, 0.01, 0.01, 0.01]])
+
+        mock_singleton_instance = MagicMock()
+        mock_singleton_instance.get_svm_model.return_value = mock_svm_model
+        mock_singleton_instance.get_vectorizer.return_value = MagicMock()
+        mock_singleton_instance.get_label_mapping.return_value = {1: 'fake_news'}
+        mock_singleton_instance.get_model_version.return_value = 'v1'
+        mock_get_singleton.return_value = mock_singleton_instance
+
+        mock_preprocessor_instance = MagicMock()
+        mock_preprocessor_instance.get_processed_text_for_tfidf.return_value = "processed text"
+        mock_get_preprocessor.return_value = mock_preprocessor_instance
+
+        mock_cache_from_settings.return_value = ClassificationResultCache(
+            max_entries=10, normalizer=TextPreprocessor.clean_text)
+
+        facade = NewsClassifierFacade()
+        first = facade.classify("This is some fake news.")
+        second = facade.classify("this is  some fake news")
+
+        self.assertEqual(first, second)
+        mock_svm_model.predict_proba.assert_called_once()
+        self.assertEqual(facade.result_cache.stats()['hits'], 1)
+
+    @patch('classification_logic.facade.get_setting', side_effect=lambda name, default=None:
+           True if name == 'TFIDF_DIRECT_TRANSFORM' else default)
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    @patch('classification_logic.facade.TfidfSvmSingleton.get_instance')
+    def test_classify_batch_uses_direct_tfidf_transform(self, mock_get_singleton, mock_get_preprocessor, _):
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2)).fit(["guvern anunta masuri", "vaccin modifica adn"])
+        mock_svm_model = MagicMock()
+        mock_svm_model.predict_proba.side_effect = \
+            lambda vectors: np.tile([0.05, 0.92, 0.01, 0.01, 0.01], (vectors.shape[0], 1))
+
+        mock_singleton_instance = MagicMock()
+        mock_singleton_instance.get_svm_model.return_value = mock_svm_model
+        mock_singleton_instance.get_vectorizer.return_value = vectorizer
+        mock_singleton_instance.get_label_mapping.return_value = {1: 'fake_news'}
+        mock_get_singleton.return_value = mock_singleton_instance
+
+        lemma_lists = [["guvern", "anunta", "masuri"], ["vaccin", "modifica", "adn", "guvern"]]
+        mock_preprocessor_instance = MagicMock()
+        mock_preprocessor_instance.iter_lemma_lists_for_tfidf.side_effect = lambda texts, **kwargs: iter(lemma_lists)
+        mock_get_preprocessor.return_value = mock_preprocessor_instance
+
+        facade = NewsClassifierFacade()
+        results = facade.classify_batch(["primul articol", "al doilea articol"])
+
+        self.assertIsNotNone(facade.tfidf_transform)
+        self.assertEqual([result['classification_result'] for result in results], ['fake_news'] * 2)
+        mock_preprocessor_instance.iter_processed_texts_for_tfidf.assert_not_called()
+        expected = vectorizer.transform([' '.join(lemmas) for lemmas in lemma_lists])
+        self.assertEqual((mock_svm_model.predict_proba.call_args[0][0] != expected).nnz, 0)
+
+
+    @patch('classification_logic.facade.get_setting', side_effect=lambda name, default=None:
+           {'TFIDF_DIRECT_TRANSFORM': True,
+            'CLASSIFIER_STREAMING': {'THRESHOLD_CHARS': 50, 'CHUNK_CHARS': 40, 'MAX_CHARS': 400}}.get(name, default))
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    @patch('classification_logic.facade.TfidfSvmSingleton.get_instance')
+    def test_long_text_is_streamed_in_chunks(self, mock_get_singleton, mock_get_preprocessor, _):
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2)).fit(["guvern anunta masuri", "vaccin modifica adn"])
+        mock_svm_model = MagicMock()
+        mock_svm_model.predict_proba.return_value = np.array([[0.05, 0.92, 0.01, 0.01, 0.01]])
+
+        mock_singleton_instance = MagicMock()
+        mock_singleton_instance.get_svm_model.return_value = mock_svm_model
+        mock_singleton_instance.get_vectorizer.return_value = vectorizer
+        mock_singleton_instance.get_label_mapping.return_value = {1: 'fake_news'}
+        mock_get_singleton.return_value = mock_singleton_instance
+
+        lemma_chunks = [["guvern", "anunta"], ["masuri", "vaccin"], ["modifica", "adn"]]
+        mock_preprocessor_instance = MagicMock()
+        mock_preprocessor_instance.iter_lemma_chunks_for_tfidf.return_value = iter(lemma_chunks)
+        mock_get_preprocessor.return_value = mock_preprocessor_instance
+
+        facade = NewsClassifierFacade()
+        long_text = "Guvernul anunta masuri, vaccinul modifica ADN-ul. " * 3
+        result = facade.classify(long_text)
+        too_long = facade.classify("cuvant " * 100)
+
+        self.assertEqual(result['classification_result'], 'fake_news')
+        mock_preprocessor_instance.iter_lemma_chunks_for_tfidf.assert_called_once_with(long_text, 40)
+        mock_preprocessor_instance.get_lemmas_for_tfidf.assert_not_called()
+        expected = vectorizer.transform([' '.join(lemma for lemmas in lemma_chunks for lemma in lemmas)])
+        self.assertEqual((mock_svm_model.predict_proba.call_args[0][0] != expected).nnz, 0)
+        self.assertEqual(too_long['classification_result'], 'ERROR')
+        self.assertIn('400', too_long['message'])
+
+
+    @patch('classification_logic.facade.get_setting', side_effect=lambda name, default=None: default)
+    @patch('classification_logic.facade.ClassificationStore.from_settings')
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    @patch('classification_logic.facade.TfidfSvmSingleton.get_instance')
+    def test_result_store_is_a_second_level_cache(self, mock_get_singleton, mock_get_preprocessor, mock_from_settings,
+                                                  _):
+        mock_svm_model = MagicMock()
+        mock_svm_model.predict_proba.side_effect = \
+            lambda vectors: np.tile([0.05, 0.92, 0.01, 0.01, 0.01], (vectors.shape[0], 1))
+        mock_singleton_instance = MagicMock()
+        mock_singleton_instance.get_svm_model.return_value = mock_svm_model
+        mock_singleton_instance.get_vectorizer.return_value = TfidfVectorizer().fit(["processed text"])
+        mock_singleton_instance.get_label_mapping.return_value = {0: 'FAKE', 1: 'MISINFORMATION'}
+        mock_singleton_instance.get_model_version.return_value = 'v1'
+        mock_get_singleton.return_value = mock_singleton_instance
+        mock_get_preprocessor.return_value.iter_processed_texts_for_tfidf.side_effect = \
+            lambda texts, **kwargs: iter(["processed text" for _ in texts])
+        mock_store = MagicMock()
+        mock_store.lookup_many.side_effect = lambda texts, model_version: [
+            [0.95, 0.05, 0.0, 0.0, 0.0] if text == "seen before" else None for text in texts]
+        mock_from_settings.return_value = mock_store
+
+        facade = NewsClassifierFacade()
+        results = facade.classify_batch(["seen before", "new article", ""])
+
+        self.assertEqual([result['classification_result'] for result in results], ['FAKE', 'MISINFORMATION', 'ERROR'])
+        mock_store.lookup_many.assert_called_once_with(["seen before", "new article"], 'v1')
+        self.assertEqual(mock_svm_model.predict_proba.call_args[0][0].shape[0], 1)
+        mock_store.record.assert_called_once()
+        text, model_version, result, probabilities = mock_store.record.call_args[0]
+        self.assertEqual((text, model_version, result['classification_result']), ("new article", 'v1', 'MISINFORMATION'))
+        self.assertEqual(set(mock_store.record.call_args[1]['stage_timings']), {'preprocess', 'tfidf', 'inference'})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,134 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+import spacy
+from gensim.models.doc2vec import Doc2Vec, TaggedDocument
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from .. import benchmarking  # noqa: F401 - registers the benchmark_lemmatizer component
+from ..emotions import EmotionLexicon
+from ..facade import NewsClassifierFacade
+from ..hybrid import HybridClassifier, ENGINEERED_FEATURE_COLUMNS
+from ..model_loaders import HYBRID_KMEANS_PATH, HYBRID_SCALER_PATH, HYBRID_SVM_MODEL_PATH
+from ..training import HybridTrainer, METRICS_FILENAME
+
+WORDS_CSV = """;word;part_of_speech;Positivity;Negativity;Anger;Anticipation;Disgust;Fear;Joy;Sadness;Surprise;Trust;wn_synset_id
+0;minciună;Noun;0;1;1;0;1;0;0;0;0;0;x
+1;bucurie;Noun;1;0;0;1;0;0;1;0;0;1;x
+2;lovi repetat;Expresie;0;1;1;0;0;1;0;0;0;0;x
+"""
+
+
+class TestHybridClassifier(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.nlp = spacy.blank('ro')
+        cls.nlp.add_pipe('benchmark_lemmatizer')
+        cls.nlp.add_pipe('entity_ruler').add_patterns([{'label': 'PERSON', 'pattern': 'Ion'},
+                                                      {'label': 'DATETIME', 'pattern': 'azi'}])
+
+        documents = [["guvern", "anunta", "masuri", "minciună"], ["vaccin", "modifica", "adn", "bucurie"]] * 5
+        cls.doc2vec_model = Doc2Vec([TaggedDocument(words, [i]) for i, words in enumerate(documents)],
+                                    vector_size=8, min_count=1, epochs=5, seed=1, workers=1)
+        rng = np.random.default_rng(0)
+        cls.scaler = StandardScaler().fit(rng.random((20, len(ENGINEERED_FEATURE_COLUMNS))))
+        cls.kmeans = KMeans(n_clusters=2, n_init=1, random_state=0).fit(rng.random((20, 8)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            words_path = os.path.join(directory, 'words.csv')
+            with open(words_path, 'w', encoding='utf-8') as f:
+                f.write(WORDS_CSV)
+            cls.lexicon = EmotionLexicon.from_csv(words_path)
+
+    def build_classifier(self, **kwargs):
+        svm_model = MagicMock()
+        svm_model.predict_proba.side_effect = \
+            lambda features: np.tile([0.05, 0.92, 0.01, 0.01, 0.01], (features.shape[0], 1))
+        return HybridClassifier(self.nlp, self.doc2vec_model, self.scaler, self.kmeans, svm_model, self.lexicon,
+                                **kwargs)
+
+    def test_engineered_features_follow_notebook_definitions(self):
+        classifier = self.build_classifier(chunk_chars=20)
+
+        analyses = classifier.analyze(["Ion spune azi o minciună, o minciună și lovi repetat.", ""])
+        features = dict(zip(ENGINEERED_FEATURE_COLUMNS, classifier.engineered_features(analyses)[0]))
+
+        self.assertEqual(analyses[0]['lemmas'], ['ion', 'spune', 'minciună', 'minciună', 'lovi', 'repetat'])
+        self.assertEqual(features['word_count'], 6)
+        self.assertAlmostEqual(features['vocabulary_richness'], 5 / 6)
+        self.assertEqual(features['total_entities'], 1)
+        self.assertAlmostEqual(features['entity_density'], 1 / len(analyses[0]['all_lemmas']))
+        self.assertEqual(features['matched_emotion_words'], 2)
+        self.assertEqual(features['anger_mean'], 1)
+        self.assertEqual(analyses[1]['lemmas'], [])
+
+    def test_inferred_vectors_are_cached_by_content(self):
+        classifier = self.build_classifier(infer_epochs=3)
+
+        with patch.object(self.doc2vec_model, 'infer_vector', wraps=self.doc2vec_model.infer_vector) as infer:
+            probabilities, lemma_counts = classifier.score(["Guvern anunta masuri."] * 3 + ["Vaccin modifica ADN."])
+            classifier.score(["Guvern  anunta masuri!"])
+
+        self.assertEqual(infer.call_count, 2)
+        self.assertEqual(infer.call_args.kwargs['epochs'], 3)
+        self.assertEqual(probabilities.shape, (4, 5))
+        self.assertEqual(lemma_counts, [3, 3, 3, 3])
+        features = classifier.svm_model.predict_proba.call_args_list[0][0][0]
+        self.assertEqual(features.shape, (4, 8 + len(ENGINEERED_FEATURE_COLUMNS) + 1))
+        self.assertEqual(classifier.get_infer_cache_stats()['hits'], 3)
+
+    @patch('classification_logic.facade.get_setting', side_effect=lambda name, default=None:
+           'hybrid' if name == 'CLASSIFIER_INFERENCE_ENGINE' else default)
+    @patch('classification_logic.facade.HybridClassifier.get_instance')
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    @patch('classification_logic.facade.TfidfSvmSingleton.get_instance')
+    def test_facade_routes_to_hybrid_engine(self, mock_get_singleton, mock_get_preprocessor, mock_get_hybrid, _):
+        mock_singleton_instance = MagicMock()
+        mock_singleton_instance.get_label_mapping.return_value = {1: 'MISINFORMATION'}
+        mock_singleton_instance.get_model_version.return_value = 'tfidf'
+        mock_get_singleton.return_value = mock_singleton_instance
+        classifier = self.build_classifier(model_version='doc2vec')
+        mock_get_hybrid.return_value = classifier
+
+        facade = NewsClassifierFacade()
+        results = facade.classify_batch(["Guvern anunta masuri.", "!!!", "Vaccin modifica ADN."])
+
+        self.assertEqual(facade.model_version, 'doc2vec+hybrid')
+        self.assertEqual([result['classification_result'] for result in results],
+                         ['MISINFORMATION', 'MANUAL_VERIFICATION', 'MISINFORMATION'])
+        self.assertEqual(classifier.svm_model.predict_proba.call_count, 1)
+        mock_get_preprocessor.return_value.iter_processed_texts_for_tfidf.assert_not_called()
+        mock_singleton_instance.get_svm_model.return_value.predict_proba.assert_not_called()
+
+    def test_trainer_writes_the_artifacts_the_classifier_serves(self):
+        texts = ["Guvern anunta masuri, minciună, minciună.", "Ion spune azi o bucurie."] * 6
+        labels = ['fake_news', 'real_news'] * 6
+        trainer = HybridTrainer(self.build_classifier(), n_clusters=2, svm_params={'kernel': 'linear', 'C': 1},
+                                n_splits=2, seed=0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            output_dir = os.path.join(directory, 'hybrid')
+            metrics = trainer.train(texts, labels, output_dir)
+            estimators = []
+            for path in (HYBRID_SCALER_PATH, HYBRID_KMEANS_PATH, HYBRID_SVM_MODEL_PATH):
+                with open(os.path.join(output_dir, os.path.basename(path)), 'rb') as f:
+                    estimators.append(pickle.load(f))
+            self.assertTrue(os.path.exists(os.path.join(output_dir, METRICS_FILENAME)))
+            self.assertEqual(sorted(os.listdir(directory)), ['hybrid'])
+
+        serving = HybridClassifier(self.nlp, self.doc2vec_model, *estimators, self.lexicon)
+        probabilities = serving.predict_proba(texts[:2])
+
+        self.assertEqual(len(metrics['folds']), 2)
+        self.assertEqual(metrics['label_counts'], {'FAKE': 6, 'REAL': 6})
+        self.assertEqual(list(estimators[2].classes_), [0, 3])
+        self.assertEqual(list(probabilities.argmax(axis=1)), [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
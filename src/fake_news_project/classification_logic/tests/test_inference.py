@@ -0,0 +1,50 @@
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.svm import SVC
+
+from ..inference import (LinearSvcEngine, DistilledLinearEngine, EngineUnavailableError, build_inference_engine,
+                         measure_agreement)
+
+
+class TestInferenceEngines(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        words = [f"cuvant{index}" for index in range(300)]
+        documents = [' '.join(rng.choice(words, size=40)) for _ in range(200)]
+        cls.labels = np.array([index % 5 for index in range(200)])
+        cls.X = TfidfVectorizer(min_df=2).fit_transform(documents)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            cls.linear_svm = SVC(kernel='linear', random_state=42, probability=True).fit(cls.X, cls.labels)
+            cls.rbf_svm = SVC(random_state=42, probability=True).fit(cls.X, cls.labels)
+
+    def test_linear_engine_reproduces_svc_probabilities(self):
+        engine = LinearSvcEngine.from_svc(self.linear_svm)
+
+        np.testing.assert_allclose(engine.predict_proba(self.X[:50]), self.linear_svm.predict_proba(self.X[:50]),
+                                   rtol=0, atol=1e-12)
+
+    def test_linear_engine_rejects_non_linear_kernels(self):
+        with self.assertRaises(EngineUnavailableError):
+            build_inference_engine('linear', self.rbf_svm)
+
+    def test_distilled_engine_round_trip_and_agreement(self):
+        teacher_probabilities = self.rbf_svm.predict_proba(self.X)
+        engine = DistilledLinearEngine.fit(self.X, teacher_probabilities, teacher_model_version='v1')
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine.save(directory)
+            loaded = build_inference_engine('distilled', self.rbf_svm, model_version='v1', distilled_dir=directory)
+            np.testing.assert_array_equal(loaded.predict_proba(self.X[:10]), engine.predict_proba(self.X[:10]))
+            with self.assertRaises(EngineUnavailableError):
+                build_inference_engine('distilled', self.rbf_svm, model_version='v2', distilled_dir=directory)
+
+        metrics = measure_agreement(teacher_probabilities, engine.predict_proba(self.X))
+        self.assertGreater(metrics['label_agreement'], 0.9)
+        self.assertEqual(metrics['documents'], 200)
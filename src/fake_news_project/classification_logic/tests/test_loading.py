@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import MagicMock
+
+from ..loading import ModelLoadingManager
+
+
+class TestModelLoadingManager(unittest.TestCase):
+    def test_lazy_component_loaded_once_on_first_use(self):
+        manager = ModelLoadingManager()
+        loader = MagicMock(return_value="model")
+        manager.register('classifier', loader)
+        manager.apply_policy('lazy')
+
+        loader.assert_not_called()
+        self.assertEqual(manager.status()['components']['classifier']['state'], 'pending')
+        self.assertTrue(manager.is_ready())
+
+        manager.get('classifier')
+        status = manager.status()['components']['classifier']
+        self.assertEqual(status['state'], 'loaded')
+        self.assertIsNotNone(status['load_seconds'])
+
+    def test_eager_policy_loads_everything_and_records_failures(self):
+        manager = ModelLoadingManager()
+        manager.register('preprocessor', MagicMock(return_value="nlp"))
+        manager.register('word2vec_300', MagicMock(return_value=None))
+        manager.register('tfidf_svm', MagicMock(side_effect=OSError("missing artifact")))
+
+        manager.apply_policy('eager')
+
+        components = manager.status()['components']
+        self.assertEqual(components['preprocessor']['state'], 'loaded')
+        self.assertEqual(components['word2vec_300']['state'], 'unavailable')
+        self.assertEqual(components['tfidf_svm']['state'], 'failed')
+        self.assertIn('missing artifact', components['tfidf_svm']['error'])
+        self.assertFalse(manager.is_ready())
+
+    def test_background_policy_warms_up_in_thread(self):
+        manager = ModelLoadingManager()
+        manager.register('classifier', MagicMock(return_value="model"))
+
+        manager.apply_policy('background')
+        manager._warmup_thread.join(timeout=5)
+
+        self.assertEqual(manager.status()['components']['classifier']['state'], 'loaded')
+        self.assertTrue(manager.is_ready())
+
+    def test_startup_budget_defers_remaining_components(self):
+        manager = ModelLoadingManager()
+        manager.register('preprocessor', MagicMock(return_value="nlp"))
+        manager.register('classifier', MagicMock(return_value="model"))
+
+        manager.apply_policy('eager', startup_budget=-1)
+        manager._warmup_thread.join(timeout=5)
+
+        self.assertTrue(manager.is_ready())
@@ -0,0 +1,56 @@
+import threading
+import time
+import unittest
+
+from ..metrics import Histogram, MetricsRegistry
+from ..profiling import SamplingProfiler
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_renders_cumulative_prometheus_buckets(self):
+        histogram = Histogram('stage_seconds', "Stage latency.", labelnames=('stage',), buckets=(0.01, 0.1))
+        histogram.observe(0.005, stage='spacy')
+        histogram.observe(0.05, stage='spacy')
+        histogram.observe(3, stage='spacy')
+
+        lines = histogram.render()
+
+        self.assertIn('# TYPE stage_seconds histogram', lines)
+        self.assertIn('stage_seconds_bucket{stage="spacy",le="0.01"} 1', lines)
+        self.assertIn('stage_seconds_bucket{stage="spacy",le="0.1"} 2', lines)
+        self.assertIn('stage_seconds_bucket{stage="spacy",le="+Inf"} 3', lines)
+        self.assertIn('stage_seconds_count{stage="spacy"} 3', lines)
+
+    def test_registry_renders_collectors_and_skips_failures(self):
+        registry = MetricsRegistry()
+        registry.register_collector('queue_depth', "Queued requests.", lambda: 4)
+        registry.register_collector('broken', "Always fails.", lambda: 1 / 0)
+        registry.register_collector('lookups_total', "Lookups.", lambda: {(('outcome', 'hit'),): 2},
+                                    metric_type='counter')
+
+        output = registry.render_prometheus()
+
+        self.assertIn('queue_depth 4.0\n', output)
+        self.assertIn('# TYPE lookups_total counter\nlookups_total{outcome="hit"} 2.0\n', output)
+        self.assertNotIn('broken', output)
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_collects_collapsed_stacks_for_the_target_thread(self):
+        def busy_wait():
+            deadline = time.perf_counter() + 0.1
+            while time.perf_counter() < deadline:
+                pass
+
+        worker = threading.Thread(target=busy_wait, name='busy worker')
+        worker.start()
+        profiler = SamplingProfiler(thread_ids=[worker.ident], interval=0.002).start()
+        worker.join()
+        profiler.stop()
+
+        collapsed = profiler.collapsed()
+        self.assertTrue(collapsed)
+        first_stack, count = collapsed.splitlines()[0].rsplit(' ', 1)
+        self.assertTrue(first_stack.startswith('busy_worker;'))
+        self.assertIn('busy_wait@test_metrics.py', first_stack)
+        self.assertGreater(int(count), 0)
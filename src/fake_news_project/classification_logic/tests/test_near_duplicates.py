@@ -0,0 +1,131 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ..facade import NewsClassifierFacade
+from ..near_duplicates import NearDuplicateIndex, ENTRIES_FILENAME
+
+
+def build_articles(n_articles: int = 20, n_words: int = 200, seed: int = 0):
+    rng = random.Random(seed)
+    vocabulary = [f"cuvant{i}" for i in range(5000)]
+    return [[rng.choice(vocabulary) for _ in range(n_words)] for _ in range(n_articles)], vocabulary, rng
+
+
+def edit(lemmas, vocabulary, rng, n_edits: int = 4):
+    edited = list(lemmas)
+    for _ in range(n_edits):
+        edited[rng.randrange(len(edited))] = rng.choice(vocabulary)
+    return edited
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    def test_finds_edited_reposts_only(self):
+        articles, vocabulary, rng = build_articles()
+        index = NearDuplicateIndex()
+        for number, lemmas in enumerate(articles):
+            index.add(index.signature(lemmas), {'id': f'article-{number}', 'model_version': 'v1'})
+
+        row, similarity = index.query(index.signature(edit(articles[7], vocabulary, rng)), model_version='v1')
+        unrelated = index.query(index.signature(build_articles(1, seed=99)[0][0]))
+
+        self.assertEqual(index.entries[row]['id'], 'article-7')
+        self.assertGreaterEqual(similarity, 0.8)
+        self.assertIsNone(unrelated)
+        self.assertIsNone(index.query(index.signature(articles[7]), model_version='v2'))
+        self.assertIsNone(index.signature([]))
+
+    def test_persists_incrementally_and_reloads(self):
+        articles, vocabulary, rng = build_articles()
+        with tempfile.TemporaryDirectory() as directory:
+            index = NearDuplicateIndex(directory=directory)
+            for number, lemmas in enumerate(articles[:10]):
+                index.add(index.signature(lemmas), {'id': f'article-{number}'})
+
+            reloaded = NearDuplicateIndex.load(directory)
+            reloaded.add(reloaded.signature(articles[10]), {'id': 'article-10'})
+            with open(os.path.join(directory, ENTRIES_FILENAME), 'a') as f:
+                f.write('{"id": "interrupted')
+
+            restored = NearDuplicateIndex.load(directory)
+
+            self.assertEqual(len(restored), 11)
+            self.assertEqual(restored.stats()['recent'], 0)
+            for number in (3, 10):
+                row, _ = restored.query(restored.signature(edit(articles[number], vocabulary, rng)))
+                self.assertEqual(restored.entries[row]['id'], f'article-{number}')
+            np.testing.assert_array_equal(restored.signature(articles[0]), index.signature(articles[0]))
+
+    def test_processes_sharing_a_directory_agree_on_rows(self):
+        articles, vocabulary, rng = build_articles()
+        with tempfile.TemporaryDirectory() as directory:
+            first = NearDuplicateIndex(directory=directory)
+            second = NearDuplicateIndex.load(directory)
+            for number, lemmas in enumerate(articles[:10]):
+                writer = first if number % 2 else second
+                writer.add(writer.signature(lemmas), {'id': f'article-{number}'})
+
+            match = second.query(second.signature(edit(articles[4], vocabulary, rng)))
+            restored = NearDuplicateIndex.load(directory)
+
+            self.assertEqual(len(first), 10)
+            self.assertEqual(first.entries, second.entries)
+            self.assertEqual(second.entries[match[0]]['id'], 'article-4')
+            self.assertEqual(restored.entries, second.entries)
+            np.testing.assert_array_equal(restored._signatures[:10], second._signatures[:10])
+
+    def test_compacts_recent_rows_past_the_limit(self):
+        articles, _, _ = build_articles()
+        index = NearDuplicateIndex(compact_after=8)
+        for number, lemmas in enumerate(articles):
+            index.add(index.signature(lemmas), {'id': f'article-{number}'})
+
+        self.assertEqual(index.stats()['indexed'], 16)
+        self.assertEqual(index.stats()['recent'], 4)
+        self.assertEqual(index.entries[index.query(index.signature(articles[2]))[0]]['id'], 'article-2')
+
+    @patch('classification_logic.facade.get_setting', side_effect=lambda name, default=None: default)
+    @patch('classification_logic.facade.NearDuplicateIndex.get_instance')
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    @patch('classification_logic.facade.TfidfSvmSingleton.get_instance')
+    def test_facade_returns_the_stored_verdict_for_near_duplicates(self, mock_get_singleton, mock_get_preprocessor,
+                                                                    mock_get_index, _):
+        articles, vocabulary, rng = build_articles(2)
+        repost = edit(articles[0], vocabulary, rng)
+        mock_svm_model = MagicMock()
+        mock_svm_model.predict_proba.side_effect = \
+            lambda vectors: np.tile([0.05, 0.92, 0.01, 0.01, 0.01], (vectors.shape[0], 1))
+        mock_singleton_instance = MagicMock()
+        mock_singleton_instance.get_svm_model.return_value = mock_svm_model
+        mock_singleton_instance.get_vectorizer.return_value = TfidfVectorizer().fit([' '.join(vocabulary)])
+        mock_singleton_instance.get_label_mapping.return_value = {1: 'MISINFORMATION'}
+        mock_singleton_instance.get_model_version.return_value = 'v1'
+        mock_get_singleton.return_value = mock_singleton_instance
+        processed = {"original": articles[0], "repost": repost, "other": articles[1]}
+        mock_get_preprocessor.return_value.get_processed_text_for_tfidf.side_effect = \
+            lambda text: ' '.join(processed[text])
+        mock_get_preprocessor.return_value.iter_processed_texts_for_tfidf.side_effect = \
+            lambda texts, **kwargs: iter([' '.join(processed[text]) for text in texts])
+        mock_get_index.return_value = NearDuplicateIndex()
+
+        facade = NewsClassifierFacade()
+        original = facade.classify("original")
+        repost_result, other_result = facade.classify_batch(["repost", "other"])
+
+        self.assertNotIn('near_duplicate', original)
+        self.assertEqual(repost_result['classification_result'], 'MISINFORMATION')
+        self.assertEqual(repost_result['near_duplicate']['matched_id'],
+                         facade.near_duplicate_index.entries[0]['id'])
+        self.assertNotIn('near_duplicate', other_result)
+        self.assertEqual(mock_svm_model.predict_proba.call_count, 2)
+        self.assertEqual(mock_svm_model.predict_proba.call_args[0][0].shape[0], 1)
+        self.assertEqual(len(facade.near_duplicate_index), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ..preprocessors import (TextPreprocessor, find_chunking_mismatches, find_lean_mode_mismatches,
+                             find_segment_cache_mismatches, split_into_chunks)
+from ..tfidf import StreamingTfidfAccumulator
+
+
+def make_token(lemma, pos="NOUN", is_stop=False):
+    token = MagicMock()
+    token.lemma_ = lemma
+    token.pos_ = pos
+    token.is_stop = is_stop
+    token.is_punct = False
+    token.is_alpha = True
+    return token
+
+
+class TestTextPreprocessorModes(unittest.TestCase):
+    @patch.dict(TextPreprocessor._pipelines, clear=True)
+    @patch('classification_logic.preprocessors.spacy.load')
+    def test_lean_mode_excludes_parser_and_ner(self, mock_spacy_load):
+        TextPreprocessor(mode='lean')
+
+        mock_spacy_load.assert_called_once_with("ro_core_news_lg", exclude=['parser', 'ner'])
+
+    @patch.dict(TextPreprocessor._pipelines, clear=True)
+    @patch('classification_logic.preprocessors.spacy.load')
+    def test_full_mode_loads_every_component(self, mock_spacy_load):
+        TextPreprocessor(mode='full')
+
+        mock_spacy_load.assert_called_once_with("ro_core_news_lg", exclude=[])
+
+    def test_unknown_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            TextPreprocessor(mode='tiny')
+
+    @patch.dict(TextPreprocessor._pipelines, clear=True)
+    def test_lean_mode_mismatches_reported(self):
+        full_nlp = MagicMock()
+        full_nlp.pipe.side_effect = lambda texts, **kwargs: iter([
+            [make_token("guvern"), make_token("anunța", pos="VERB")],
+            [make_token("vaccin")],
+        ])
+        lean_nlp = MagicMock()
+        lean_nlp.pipe.side_effect = lambda texts, **kwargs: iter([
+            [make_token("guvern"), make_token("anunța", pos="VERB")],
+            [make_token("vaccin"), make_token("de", pos="ADP"), make_token("adn")],
+        ])
+        TextPreprocessor._pipelines.update({'full': full_nlp, 'lean': lean_nlp})
+
+        mismatches = find_lean_mode_mismatches(["Guvernul anunță.", "Vaccinul ADN."])
+
+        self.assertEqual(len(mismatches), 1)
+        self.assertEqual(mismatches[0]['index'], 1)
+        self.assertEqual(mismatches[0]['full_tokens'], ['vaccin'])
+        self.assertEqual(mismatches[0]['lean_tokens'], ['vaccin', 'adn'])
+
+
+
+def make_context_sensitive_nlp():
+    # Tags the first word of every document as a stop word, like a tagger that looks at the surrounding tokens.
+    def tag(text):
+        return [make_token(word, is_stop=position == 0) for position, word in enumerate(text.split())]
+
+    nlp = MagicMock(side_effect=tag)
+    nlp.pipe.side_effect = lambda texts, **kwargs: [tag(text) for text in list(texts)]
+    return nlp
+
+
+class TestLemmaCache(unittest.TestCase):
+    def make_preprocessor(self, max_bytes=1024 * 1024, segment='paragraph'):
+        nlp = MagicMock()
+        nlp.pipe.side_effect = lambda texts, **kwargs: [
+            [make_token(word) for word in text.split()] for text in list(texts)]
+        cache_config = {'ENABLED': True, 'MAX_BYTES': max_bytes, 'SEGMENT': segment}
+
+        with patch.object(TextPreprocessor, '_load_pipeline', return_value=nlp), \
+                patch('classification_logic.preprocessors.get_setting',
+                      side_effect=lambda name, default=None: cache_config if name.endswith('LEMMA_CACHE') else default):
+            preprocessor = TextPreprocessor(mode='full')
+        return preprocessor, nlp
+
+    def test_only_changed_paragraphs_are_lemmatized(self):
+        preprocessor, nlp = self.make_preprocessor()
+
+        first = preprocessor.get_processed_text_for_tfidf("Agenția transmite.\nGuvernul anunță măsuri.")
+        second = preprocessor.get_processed_text_for_tfidf("Agenția transmite.\nPrimăria anunță lucrări.")
+
+        self.assertEqual(first, "agenția transmite guvernul anunță măsuri")
+        self.assertEqual(second, "agenția transmite primăria anunță lucrări")
+        self.assertEqual(list(nlp.pipe.call_args_list[1].args[0]), ["primăria anunță lucrări"])
+        stats = preprocessor.get_lemma_cache_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 3)
+
+    def test_batch_path_deduplicates_segments(self):
+        preprocessor, nlp = self.make_preprocessor()
+
+        outputs = list(preprocessor.iter_processed_texts_for_tfidf(
+            ["Știre comună.\nPrima variantă.", "Știre comună.\nA doua variantă."]))
+
+        self.assertEqual(outputs, ["știre comună prima variantă", "știre comună a doua variantă"])
+        nlp.pipe.assert_called_once()
+        self.assertEqual(len(list(nlp.pipe.call_args.args[0])), 3)
+
+    def test_segment_mismatches_with_uncached_lemmas_are_reported(self):
+        texts = ["Agenția transmite.\nGuvernul anunță măsuri.", "Știre comună.\nA doua variantă."]
+
+        with patch.object(TextPreprocessor, '_load_pipeline', return_value=make_context_sensitive_nlp()):
+            mismatches = find_segment_cache_mismatches(texts, 'paragraph')
+            with self.assertRaises(ValueError):
+                TextPreprocessor(mode='full', use_lemma_cache=True, segment='document')
+
+        self.assertEqual([mismatch['index'] for mismatch in mismatches], [0, 1])
+        self.assertEqual(mismatches[0]['document_tokens'], ['transmite', 'guvernul', 'anunță', 'măsuri'])
+        self.assertEqual(mismatches[0]['segment_tokens'], ['transmite', 'anunță', 'măsuri'])
+
+    def test_cache_bounded_by_memory(self):
+        preprocessor, _ = self.make_preprocessor(max_bytes=400)
+
+        for index in range(20):
+            preprocessor.get_processed_text_for_tfidf(f"paragraf numarul {'x' * (index + 1)}")
+
+        stats = preprocessor.get_lemma_cache_stats()
+        self.assertLessEqual(stats['bytes'], 400)
+        self.assertGreater(stats['evictions'], 0)
+
+
+class TestChunking(unittest.TestCase):
+    def test_chunks_are_bounded_and_cut_between_words(self):
+        text = "Guvernul a anunțat noi măsuri. Ministrul susține planul!\nCetățenii protestează în piață. " * 40
+
+        chunks = list(split_into_chunks(text, 200))
+
+        self.assertEqual(''.join(chunks), text)
+        self.assertTrue(all(len(chunk) <= 200 for chunk in chunks))
+        self.assertEqual(sum(len(TextPreprocessor.clean_text(chunk).split()) for chunk in chunks),
+                         len(TextPreprocessor.clean_text(text).split()))
+
+    def test_chunks_end_at_sentence_boundaries(self):
+        text = "Prima propoziție este scurtă. " + "cuvant " * 40 + "sfarsit. A treia propoziție."
+
+        chunks = list(split_into_chunks(text, 100))
+
+        self.assertEqual(''.join(chunks), text)
+        self.assertEqual(chunks[0], "Prima propoziție este scurtă. ")
+        self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+        self.assertTrue(all(chunk.endswith(('. ', 'cuvant ')) for chunk in chunks[:-1]))
+
+    def test_text_without_separators_is_cut_between_words_or_hard(self):
+        text = 'cuvant ' * 300000
+
+        chunks = list(split_into_chunks(text, 20000))
+
+        self.assertEqual(''.join(chunks), text)
+        self.assertTrue(all(len(chunk) <= 20000 and chunk.endswith(' ') for chunk in chunks))
+        self.assertEqual([len(chunk) for chunk in split_into_chunks('x' * 250, 100)], [100, 100, 50])
+
+    def test_streamed_tfidf_row_matches_whole_document(self):
+        nlp = MagicMock(side_effect=lambda text: [make_token(word) for word in text.split()])
+        nlp.pipe.side_effect = lambda texts, **kwargs: [nlp(text) for text in list(texts)]
+        text = ("Guvernul anunta masuri noi. Ministrul sustine planul!\nCetatenii protesteaza in piata. "
+                "Vaccinul modifica ADN-ul? Medicii neaga zvonurile. ") * 8
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2)).fit([TextPreprocessor.clean_text(text)])
+
+        with patch.object(TextPreprocessor, '_load_pipeline', return_value=nlp):
+            preprocessor = TextPreprocessor(mode='full', use_lemma_cache=False)
+            accumulator = StreamingTfidfAccumulator(vectorizer)
+            for lemmas in preprocessor.iter_lemma_chunks_for_tfidf(text, 120):
+                accumulator.add(lemmas)
+            expected = vectorizer.transform([preprocessor.get_processed_text_for_tfidf(text)])
+            self.assertEqual(find_chunking_mismatches([text], 120), [])
+
+        self.assertGreater(len(list(split_into_chunks(text, 120))), 5)
+        self.assertEqual((accumulator.transform() != expected).nnz, 0)
+
+    def test_chunking_mismatches_are_reported(self):
+        text = "Guvernul anunta masuri noi. Ministrul sustine planul. " * 4
+
+        with patch.object(TextPreprocessor, '_load_pipeline', return_value=make_context_sensitive_nlp()):
+            mismatches = find_chunking_mismatches([text], 60)
+
+        self.assertEqual(len(mismatches), 1)
+        self.assertLess(len(mismatches[0]['chunked_tokens']), len(mismatches[0]['document_tokens']))
+
+
+if __name__ == '__main__':
+    unittest.main()
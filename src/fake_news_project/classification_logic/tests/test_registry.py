@@ -0,0 +1,139 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from ..benchmarking import isolated_model_singletons
+from ..facade import NewsClassifierFacade
+from ..model_loaders import TfidfSvmSingleton
+from ..registry import ModelRegistry, ShadowScorer
+
+DOCUMENTS = ["guvern anunta masuri", "vaccin modifica adn", "guvern vaccin masuri", "adn modifica anunta"]
+
+
+def write_model(directory: str, labels):
+    os.makedirs(directory, exist_ok=True)
+    vectorizer = TfidfVectorizer().fit(DOCUMENTS)
+    svm_model = LogisticRegression().fit(vectorizer.transform(DOCUMENTS), labels)
+    for filename, value in (('final_tfidf_vectorizer.pkl', vectorizer), ('final_svm_model.pkl', svm_model)):
+        with open(os.path.join(directory, filename), 'wb') as f:
+            pickle.dump(value, f)
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.registry = ModelRegistry(os.path.join(self.directory.name, 'registry'), poll_seconds=0)
+        write_model(os.path.join(self.directory.name, 'first'), [0, 1, 0, 1])
+        write_model(os.path.join(self.directory.name, 'second'), [3, 4, 3, 4])
+
+    def test_publish_and_activate_versions(self):
+        first = self.registry.publish(os.path.join(self.directory.name, 'first'))
+        second = self.registry.publish(os.path.join(self.directory.name, 'second'), version='v2')
+        self.registry.set_active(first)
+        self.registry.set_shadow('v2')
+
+        manifest = self.registry.read_manifest()
+        self.assertEqual((manifest['active'], manifest['shadow']), (first, 'v2'))
+        self.assertEqual(set(manifest['versions']), {first, second})
+        with self.assertRaises(ValueError):
+            self.registry.publish(os.path.join(self.directory.name, 'second'), version='v2')
+        with self.assertRaises(ValueError):
+            self.registry.set_active('missing')
+
+        self.registry.set_active('v2')
+        self.assertIsNone(self.registry.read_manifest()['shadow'])
+        self.assertEqual(self.registry.load_version('v2').get_model_version(), 'v2')
+
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    def test_sync_swaps_the_serving_facade(self, mock_get_preprocessor):
+        mock_get_preprocessor.return_value.get_lemmas_for_tfidf.return_value = ['guvern', 'anunta']
+        mock_get_preprocessor.return_value.get_processed_text_for_tfidf.return_value = 'guvern anunta'
+        self.registry.publish(os.path.join(self.directory.name, 'first'), version='v1')
+        self.registry.publish(os.path.join(self.directory.name, 'second'), version='v2')
+
+        with isolated_model_singletons(), patch.object(ModelRegistry, '_instance', self.registry):
+            self.registry.set_active('v1')
+            serving = NewsClassifierFacade.get_instance()
+            self.assertEqual(self.registry.loaded_active, 'v1')
+            self.assertFalse(self.registry.sync())
+
+            serving.result_store = MagicMock()
+            self.registry.set_active('v2')
+            self.assertTrue(self.registry.sync())
+            serving.result_store.close.assert_called_once_with()
+
+            self.assertEqual(serving.model_version, 'v1')
+            self.assertEqual(NewsClassifierFacade.get_instance().model_version, 'v2')
+            self.assertEqual(TfidfSvmSingleton.get_instance().get_model_version(), 'v2')
+            self.assertIn(serving.classify("Guvernul anunta")['classification_result'], ('FAKE', 'MISINFORMATION',
+                                                                                           'MANUAL_VERIFICATION'))
+            self.assertEqual(self.registry.swaps, 1)
+
+    def test_sync_defers_loading_until_a_facade_is_served(self):
+        self.registry.publish(os.path.join(self.directory.name, 'first'), version='v1')
+        self.registry.publish(os.path.join(self.directory.name, 'second'), version='v2')
+        self.registry.set_active('v1')
+        self.registry.set_shadow('v2')
+
+        with isolated_model_singletons(), patch.object(ModelRegistry, '_instance', self.registry), \
+                patch.object(ModelRegistry, 'load_version', wraps=self.registry.load_version) as load_version:
+            self.assertFalse(self.registry.sync())
+
+            self.assertIsNone(NewsClassifierFacade._instance)
+            self.assertIsNone(TfidfSvmSingleton._instance)
+            self.assertIsNone(self.registry.shadow_scorer)
+            self.assertEqual(self.registry.loaded_active, 'v1')
+            load_version.assert_not_called()
+
+    @patch('classification_logic.facade.TextPreprocessor.get_instance')
+    def test_shadow_facade_shares_no_serving_state(self, _):
+        self.registry.publish(os.path.join(self.directory.name, 'second'), version='v2')
+
+        with patch('classification_logic.facade.classification_stage_seconds') as histogram:
+            facade = self.registry.build_facade('v2')
+            with facade._stage('total', 'single'):
+                pass
+
+        self.assertEqual(facade.model_version, 'v2')
+        self.assertIsNone(facade.result_cache)
+        self.assertIsNone(facade.result_store)
+        self.assertIsNone(facade.near_duplicate_index)
+        histogram.observe.assert_not_called()
+
+
+class TestShadowScorer(unittest.TestCase):
+    def test_counts_agreement_with_the_candidate(self):
+        candidate = MagicMock()
+        candidate.classify_batch.side_effect = lambda texts: [
+            {'classification_result': 'FAKE' if text.startswith('a') else 'REAL', 'confidence': 0.9}
+            for text in texts]
+        scorer = ShadowScorer(candidate, 'v2')
+
+        scorer.observe(['a1', 'a2', 'b1', 'c1'], [{'classification_result': 'FAKE', 'confidence': 0.8}] * 3
+                       + [{'classification_result': "ERROR", 'message': "x"}])
+        scorer.wait()
+
+        stats = scorer.stats()
+        self.assertEqual((stats['compared'], stats['agreed']), (3, 2))
+        self.assertEqual(stats['label_pairs'], {'FAKE->FAKE': 2, 'FAKE->REAL': 1})
+        self.assertAlmostEqual(stats['mean_confidence_delta'], 0.1)
+        candidate.classify_batch.assert_called_once_with(['a1', 'a2', 'b1'])
+
+    def test_facade_reports_served_results(self):
+        facade = NewsClassifierFacade.__new__(NewsClassifierFacade)
+        facade.shadow_scorer = MagicMock()
+
+        facade._observe_shadow(['text'], [{'classification_result': 'REAL'}])
+
+        facade.shadow_scorer.observe.assert_called_once_with(['text'], [{'classification_result': 'REAL'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from gensim.models import KeyedVectors
+
+from ..benchmarking import isolated_model_singletons
+from ..model_loaders import Word2VecManagerSingleton
+from ..similarity import (ExactNeighbourIndex, IvfNeighbourIndex, QuantizedNeighbourIndex, normalize_rows,
+                          top_n_overlap)
+
+
+class TestNeighbourIndexes(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.keys = [f"cuvant{i}" for i in range(500)]
+        self.vectors = rng.normal(size=(500, 16)).astype(np.float32)
+
+    def test_exact_index_matches_brute_force_cosine(self):
+        index = ExactNeighbourIndex(self.keys, normalize_rows(self.vectors))
+
+        result = index.most_similar("cuvant3", topn=5)
+
+        normed = normalize_rows(self.vectors)
+        scores = normed @ normed[3]
+        scores[3] = -np.inf
+        expected = [self.keys[i] for i in np.argsort(-scores)[:5]]
+        self.assertEqual([word for word, _ in result], expected)
+        self.assertNotIn("cuvant3", [word for word, _ in result])
+
+    def test_exact_index_searches_raw_vectors_in_place(self):
+        normalized = ExactNeighbourIndex.normalize(self.keys, self.vectors, chunk_size=64)
+        scaled = ExactNeighbourIndex(self.keys, self.vectors, row_scales=1.0 / np.linalg.norm(self.vectors, axis=1))
+        queries = [(["cuvant3"], []), (["cuvant1", "cuvant2"], ["cuvant3"])]
+
+        self.assertIs(scaled.normed_vectors, self.vectors)
+        for word in ("cuvant0", "cuvant3", "cuvant499"):
+            expected = normalized.most_similar(word, topn=10)
+            result = scaled.most_similar(word, topn=10)
+            self.assertEqual([w for w, _ in result], [w for w, _ in expected])
+            np.testing.assert_allclose([s for _, s in result], [s for _, s in expected], rtol=1e-5)
+        self.assertEqual([[w for w, _ in result] for result in scaled.most_similar_batch(queries, topn=5)],
+                         [[w for w, _ in result] for result in normalized.most_similar_batch(queries, topn=5)])
+
+        with tempfile.TemporaryDirectory() as index_dir:
+            normalized.save(index_dir)
+            loaded = ExactNeighbourIndex.load(index_dir, self.keys)
+            self.assertIsInstance(loaded.normed_vectors, np.memmap)
+            self.assertEqual(loaded.most_similar("cuvant5", topn=5), normalized.most_similar("cuvant5", topn=5))
+            with self.assertRaises(ValueError):
+                ExactNeighbourIndex.load(index_dir, self.keys[::-1])
+            with self.assertRaises(ValueError):
+                scaled.save(index_dir)
+
+    def test_ivf_with_all_lists_probed_is_exact(self):
+        exact = ExactNeighbourIndex(self.keys, normalize_rows(self.vectors))
+        ivf = IvfNeighbourIndex.build(self.keys, self.vectors, n_lists=10, n_iterations=5)
+
+        for word in ("cuvant0", "cuvant42", "cuvant499"):
+            self.assertEqual([w for w, _ in ivf.most_similar(word, topn=10, n_probe=10)],
+                             [w for w, _ in exact.most_similar(word, topn=10)])
+
+    def test_ivf_round_trips_through_memory_mapped_files(self):
+        ivf = IvfNeighbourIndex.build(self.keys, self.vectors, n_lists=10, n_iterations=5)
+
+        with tempfile.TemporaryDirectory() as index_dir:
+            ivf.save(index_dir)
+            loaded = IvfNeighbourIndex.load(index_dir, self.keys, n_probe=3)
+
+            self.assertIsInstance(loaded.ordered_vectors, np.memmap)
+            self.assertEqual(loaded.most_similar("cuvant5", topn=5), ivf.most_similar("cuvant5", topn=5, n_probe=3))
+            with self.assertRaises(ValueError):
+                IvfNeighbourIndex.load(index_dir, self.keys[:-1])
+
+    def test_batch_matches_single_queries_and_analogies(self):
+        exact = ExactNeighbourIndex(self.keys, normalize_rows(self.vectors))
+        ivf = IvfNeighbourIndex.build(self.keys, self.vectors, n_lists=10, n_iterations=5)
+        queries = [(["cuvant0"], []), (["cuvant42"], []), (["cuvant1", "cuvant2"], ["cuvant3"]), (["inexistent"], [])]
+
+        for index in (exact, ivf):
+            results = index.most_similar_batch(queries, topn=5)
+
+            for result, word in zip(results, ("cuvant0", "cuvant42")):
+                expected = exact.most_similar(word, topn=5)
+                self.assertEqual([w for w, _ in result], [w for w, _ in expected])
+                np.testing.assert_allclose([s for _, s in result], [s for _, s in expected], rtol=1e-5)
+            normed = normalize_rows(self.vectors)
+            scores = normalize_rows((normed[1] + normed[2] - normed[3])[None, :])[0] @ normed.T
+            scores[[1, 2, 3]] = -np.inf
+            self.assertEqual([w for w, _ in results[2]], [self.keys[i] for i in np.argsort(-scores)[:5]])
+            self.assertIsNone(results[3])
+
+    def test_quantized_search_keeps_float32_neighbours(self):
+        exact = ExactNeighbourIndex(self.keys, normalize_rows(self.vectors))
+        probe_words = self.keys[:50]
+
+        for dtype, min_overlap in (('float16', 0.99), ('int8', 0.9)):
+            quantized = QuantizedNeighbourIndex.quantize(self.keys, self.vectors, dtype=dtype, chunk_size=64)
+
+            self.assertEqual(quantized.dtype, dtype)
+            self.assertLess(quantized.nbytes, exact.normed_vectors.nbytes / (1.7 if dtype == 'float16' else 3))
+            self.assertGreaterEqual(top_n_overlap(exact, quantized, probe_words, topn=10)['mean_overlap'],
+                                    min_overlap)
+            self.assertEqual(quantized.most_similar_batch([(["cuvant7"], [])], topn=5)[0],
+                             quantized.most_similar("cuvant7", topn=5))
+
+    def test_manager_serves_exported_quantized_vectors(self):
+        keyed_vectors = KeyedVectors(vector_size=16)
+        keyed_vectors.add_vectors(self.keys, self.vectors)
+
+        with tempfile.TemporaryDirectory() as directory, isolated_model_singletons():
+            config = {'path': os.path.join(directory, 'missing.model'),
+                      'vectors_path': os.path.join(directory, 'word2vec_150d.kv'),
+                      'index_path': os.path.join(directory, 'word2vec_150d.ivf'),
+                      'quantized_path': os.path.join(directory, 'word2vec_150d.quantized'),
+                      'normed_path': os.path.join(directory, 'word2vec_150d.normed'), 'name': '150D'}
+            keyed_vectors.save(config['vectors_path'], separately=['vectors'])
+            settings = {'WORD2VEC_SERVING_MODE': 'quantized', 'WORD2VEC_NEIGHBOUR_BACKEND': 'exact'}
+            with patch.dict(Word2VecManagerSingleton.MODEL_CONFIG, {'150': config}), \
+                    patch('classification_logic.model_loaders.get_setting',
+                          side_effect=lambda name, default=None: settings.get(name, default)):
+                manager = Word2VecManagerSingleton.get_instance()
+                self.assertIsInstance(manager.get_neighbour_index('150'), KeyedVectors)
+                batch_index = manager.get_batch_index('150')
+                self.assertIs(batch_index.normed_vectors, manager.get_vectors('150').vectors)
+
+                manager.export_normalized_vectors('150')
+                manager._neighbour_indexes.clear()
+                index = manager.get_neighbour_index('150')
+                self.assertIsInstance(index, ExactNeighbourIndex)
+                self.assertIsInstance(index.normed_vectors, np.memmap)
+                self.assertEqual([word for word, _ in index.most_similar("cuvant3", topn=5)],
+                                 [word for word, _ in batch_index.most_similar("cuvant3", topn=5)])
+
+                manager.export_quantized_vectors('150', dtype='int8')
+                manager._neighbour_indexes.clear()
+                index = manager.get_neighbour_index('150')
+
+                self.assertIsInstance(index, QuantizedNeighbourIndex)
+                self.assertIsInstance(index.codes, np.memmap)
+                self.assertEqual(index.dtype, 'int8')
+                self.assertIs(manager.get_batch_index('150'), index)
+
+    def test_unknown_word_raises_key_error(self):
+        index = ExactNeighbourIndex(self.keys, normalize_rows(self.vectors))
+        with self.assertRaises(KeyError):
+            index.most_similar("inexistent")
@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ..tfidf import CompiledTfidfTransform, StreamingTfidfAccumulator
+
+
+class TestCompiledTfidfTransform(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        words = [f"cuvânt{index}" for index in range(400)] + ["adn-ul", "a", "Știre"]
+        cls.lemma_lists = [list(rng.choice(words, size=rng.integers(0, 120))) for _ in range(150)]
+        cls.lemma_lists += [[], ["a"], ["necunoscut", "adn-ul", "adn-ul"]]
+        cls.documents = [' '.join(lemmas) for lemmas in cls.lemma_lists]
+
+    def assert_bit_identical(self, expected, actual):
+        self.assertIs(type(actual), type(expected))
+        self.assertEqual(actual.dtype, expected.dtype)
+        np.testing.assert_array_equal(actual.indptr, expected.indptr)
+        np.testing.assert_array_equal(actual.indices, expected.indices)
+        self.assertEqual(actual.data.tobytes(), expected.data.tobytes())
+
+    def test_matches_vectorizer_bit_for_bit(self):
+        configurations = [
+            dict(ngram_range=(1, 2), max_df=0.95, min_df=5, max_features=2000),
+            dict(ngram_range=(1, 3), min_df=2, sublinear_tf=True),
+            dict(ngram_range=(2, 2), min_df=2, binary=True, norm='l1'),
+            dict(ngram_range=(1, 2), stop_words=['adn'], use_idf=False),
+        ]
+        for configuration in configurations:
+            with self.subTest(**configuration):
+                vectorizer = TfidfVectorizer(**configuration).fit(self.documents)
+                transform = CompiledTfidfTransform.from_vectorizer(vectorizer)
+
+                self.assert_bit_identical(vectorizer.transform(self.documents), transform.transform(self.lemma_lists))
+
+    def test_rejects_custom_tokenizers(self):
+        vectorizer = TfidfVectorizer(tokenizer=str.split, token_pattern=None).fit(self.documents)
+
+        with self.assertRaises(ValueError):
+            CompiledTfidfTransform.from_vectorizer(vectorizer)
+
+    def test_streaming_accumulator_matches_whole_document(self):
+        document = [lemma for lemmas in self.lemma_lists for lemma in lemmas]
+        configurations = [
+            dict(ngram_range=(1, 2), max_df=0.95, min_df=5, max_features=2000),
+            dict(ngram_range=(1, 3), min_df=2, sublinear_tf=True),
+            dict(ngram_range=(1, 2), stop_words=['adn'], use_idf=False),
+        ]
+        for configuration in configurations:
+            vectorizer = TfidfVectorizer(**configuration).fit(self.documents)
+            expected = vectorizer.transform([' '.join(document)])
+            for compiled in (False, True):
+                with self.subTest(compiled=compiled, **configuration):
+                    count_matrix = CompiledTfidfTransform.from_vectorizer(vectorizer).count_matrix if compiled else None
+                    accumulator = StreamingTfidfAccumulator(vectorizer, count_matrix=count_matrix)
+                    for start in range(0, len(document), 97):
+                        accumulator.add(document[start:start + 97])
+
+                    self.assert_bit_identical(expected, accumulator.transform())
+                    self.assertEqual(accumulator.n_lemmas, len(document))
@@ -0,0 +1,98 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+
+from ..corpus import CorpusWriter
+from ..model_loaders import TfidfSvmSingleton
+from ..registry import ModelRegistry
+from ..training import ClassifierTrainer, DATASET_LABELS, METRICS_FILENAME, encode_labels, load_training_data
+
+LABELS = ('FAKE', 'MISINFORMATION', 'PROPAGANDA', 'REAL', 'SATIRE')
+GRID = {'tfidf': {'min_df': [1], 'max_features': [200, 1000]}, 'svm': [{'kernel': ['linear'], 'C': [0.1, 10]}]}
+
+
+def build_corpus(directory: str, documents_per_label: int = 8, labels=LABELS):
+    rng = random.Random(3)
+    shared = [f"comun{i}" for i in range(30)]
+    rows = []
+    for label in labels:
+        own = [f"{label.lower()}{i}" for i in range(10)]
+        for _ in range(documents_per_label):
+            rows.append({'tag': label, 'lemmas_filtered': rng.sample(own, 4) + rng.sample(shared, 8)})
+    rows.append({'tag': labels[3], 'lemmas_filtered': []})
+    with CorpusWriter(directory, {'tag': 'string', 'lemmas_filtered': 'list'}) as writer:
+        writer.append(rows)
+
+
+class TestClassifierTrainer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.corpus_dir = os.path.join(self.directory.name, 'final.corpus')
+        self.cache_dir = os.path.join(self.directory.name, 'cache')
+        build_corpus(self.corpus_dir)
+
+    def test_trains_servable_artifacts_and_reuses_fold_matrices(self):
+        documents, labels = load_training_data(self.corpus_dir)
+        trainer = ClassifierTrainer(tfidf_grid=GRID['tfidf'], svm_grid=GRID['svm'], n_splits=3, n_jobs=2,
+                                    cache_dir=self.cache_dir)
+
+        metrics = trainer.train(documents, labels, os.path.join(self.directory.name, 'run1'))
+        cached = {os.path.join(root, name): os.path.getmtime(os.path.join(root, name))
+                  for root, _, names in os.walk(self.cache_dir) for name in names}
+        rerun = trainer.train(documents, labels, os.path.join(self.directory.name, 'run2'))
+
+        self.assertEqual(len(documents), 40)
+        self.assertEqual(len(metrics['candidates']), 4)
+        self.assertEqual(len(cached), 6)
+        self.assertEqual({path: os.path.getmtime(path) for path in cached}, cached)
+        self.assertEqual(rerun['artifact_sha256'], metrics['artifact_sha256'])
+        self.assertEqual(len(metrics['best_folds']), 3)
+        self.assertGreater(metrics['best']['mean_f1_weighted'], 0.9)
+        self.assertEqual(metrics['label_counts'], {label: 8 for label in LABELS})
+
+        serving = TfidfSvmSingleton.from_directory(os.path.join(self.directory.name, 'run1'))
+        probabilities = serving.get_svm_model().predict_proba(
+            serving.get_vectorizer().transform(['fake1 fake2 fake3 comun1']))
+        self.assertEqual(serving.get_label_mapping()[probabilities.argmax()], 'FAKE')
+        self.assertEqual(serving.get_model_version(), metrics['model_version'])
+        with self.assertRaises(ValueError):
+            trainer.train(documents, labels, os.path.join(self.directory.name, 'run1'))
+
+    def test_encodes_the_corpus_tags_like_the_notebooks(self):
+        self.assertEqual(encode_labels(['fake_news', 'real_news', 'satire', 'misinformation', 'propaganda']).tolist(),
+                         [0, 3, 4, 1, 2])
+        self.assertEqual(encode_labels(['FAKE', 'REAL']).tolist(), [0, 3])
+        with self.assertRaises(ValueError):
+            encode_labels(['fake'])
+
+    def test_command_writes_metrics_and_publishes(self):
+        corpus_dir = os.path.join(self.directory.name, 'tagged.corpus')
+        build_corpus(corpus_dir, labels=DATASET_LABELS)
+        grid_path = os.path.join(self.directory.name, 'grid.json')
+        with open(grid_path, 'w') as f:
+            json.dump(GRID, f)
+        output_dir = os.path.join(self.directory.name, 'run')
+        registry = ModelRegistry(os.path.join(self.directory.name, 'registry'), poll_seconds=0)
+
+        with patch.object(ModelRegistry, '_instance', registry):
+            call_command('train_classifier', corpus_dir, '--grid', grid_path, '--folds', '3', '--jobs', '1',
+                         '--cache-dir', self.cache_dir, '--output-dir', output_dir, '--publish', '--name', 'trained',
+                         '--activate', stdout=StringIO())
+
+        with open(os.path.join(output_dir, METRICS_FILENAME)) as f:
+            metrics = json.load(f)
+        self.assertEqual(metrics['source'], os.path.abspath(corpus_dir))
+        self.assertEqual(metrics['label_counts'], {label: 8 for label in LABELS})
+        self.assertEqual(metrics['best']['tfidf_params']['min_df'], 1)
+        self.assertEqual(registry.read_manifest()['active'], 'trained')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+import numpy as np
+
+UNKNOWN_TOKEN = -1
+
+
+class CompiledTfidfTransform:
+    """Builds TF-IDF rows straight from lemma lists for a fitted TfidfVectorizer.
+
+    Lemmas are mapped once to integer token ids, n-grams are looked up as packed integer keys, and the resulting
+    count matrix goes through the vectorizer's own idf/normalization step, so the output is bit-identical to
+    ``vectorizer.transform([' '.join(lemmas), ...])`` without joining, re-tokenizing and building n-gram strings.
+    """
+
+    def __init__(self, vectorizer, max_cached_lemmas: int = 500000):
+        self.vectorizer = vectorizer
+        self.max_cached_lemmas = max_cached_lemmas
+        self.min_n, self.max_n = vectorizer.ngram_range
+        self.n_features = len(vectorizer.vocabulary_)
+
+        self._preprocess = vectorizer.build_preprocessor()
+        self._tokenize = vectorizer.build_tokenizer()
+        self._stop_words = vectorizer.get_stop_words()
+        self._container = type(vectorizer.transform(['']))
+
+        self.token_to_id = {}
+        ngram_terms = {}
+        for term, column in vectorizer.vocabulary_.items():
+            token_ids = tuple(self.token_to_id.setdefault(token, len(self.token_to_id)) for token in term.split(' '))
+            ngram_terms.setdefault(len(token_ids), []).append((token_ids, column))
+
+        self.n_tokens = len(self.token_to_id)
+        if (self.n_tokens + 1) ** self.max_n >= 2 ** 62:
+            raise ValueError(f"Vocabulary of {self.n_tokens} tokens is too large to pack {self.max_n}-grams "
+                             f"into 64-bit keys.")
+
+        self._unigram_columns = np.full(self.n_tokens, -1, dtype=np.int64)
+        self._ngram_keys, self._ngram_columns = {}, {}
+        for n, terms in ngram_terms.items():
+            token_ids = np.array([ids for ids, _ in terms], dtype=np.int64)
+            columns = np.array([column for _, column in terms], dtype=np.int64)
+            if n == 1:
+                self._unigram_columns[token_ids[:, 0]] = columns
+                continue
+            keys = self._pack(token_ids.T)
+            order = np.argsort(keys)
+            self._ngram_keys[n], self._ngram_columns[n] = keys[order], columns[order]
+
+        self._lemma_token_ids = {}
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, **kwargs):
+        if getattr(vectorizer, 'analyzer', None) != 'word':
+            raise ValueError("Only word-analyzer vectorizers can be compiled.")
+        if vectorizer.preprocessor is not None or vectorizer.tokenizer is not None:
+            raise ValueError("Vectorizers with a custom preprocessor or tokenizer cannot be compiled.")
+        if not hasattr(vectorizer, 'vocabulary_') or not hasattr(vectorizer, '_tfidf'):
+            raise ValueError("The vectorizer is not a fitted TfidfVectorizer.")
+        if any(' ' in token for token in vectorizer.build_tokenizer()('aa bb  cc\tdd')):
+            raise ValueError("The token pattern can match across whitespace, so lemmas cannot be tokenized alone.")
+        return cls(vectorizer, **kwargs)
+
+    def _pack(self, token_id_columns) -> np.ndarray:
+        keys = np.zeros(len(token_id_columns[0]), dtype=np.int64)
+        for token_ids in token_id_columns:
+            keys = keys * (self.n_tokens + 1) + token_ids
+        return keys
+
+    def _token_ids(self, lemma: str) -> tuple:
+        token_ids = self._lemma_token_ids.get(lemma)
+        if token_ids is None:
+            tokens = self._tokenize(self._preprocess(lemma))
+            if self._stop_words is not None:
+                tokens = [token for token in tokens if token not in self._stop_words]
+            token_ids = tuple(self.token_to_id.get(token, UNKNOWN_TOKEN) for token in tokens)
+            if len(self._lemma_token_ids) >= self.max_cached_lemmas:
+                self._lemma_token_ids.clear()
+            self._lemma_token_ids[lemma] = token_ids
+        return token_ids
+
+    def count_matrix(self, lemma_lists):
+        document_lengths = []
+        token_ids = []
+        for lemmas in lemma_lists:
+            length = len(token_ids)
+            for lemma in lemmas:
+                token_ids.extend(self._token_ids(lemma))
+            document_lengths.append(len(token_ids) - length)
+
+        n_documents = len(document_lengths)
+        token_ids = np.array(token_ids, dtype=np.int64)
+        document_ids = np.repeat(np.arange(n_documents, dtype=np.int64), document_lengths)
+
+        rows, columns = [], []
+        if self.min_n == 1:
+            known = token_ids != UNKNOWN_TOKEN
+            unigram_columns = self._unigram_columns[token_ids[known]]
+            in_vocabulary = unigram_columns >= 0
+            rows.append(document_ids[known][in_vocabulary])
+            columns.append(unigram_columns[in_vocabulary])
+
+        for n in range(max(self.min_n, 2), self.max_n + 1):
+            if n not in self._ngram_keys or len(token_ids) < n:
+                continue
+            starts = np.arange(len(token_ids) - n + 1)
+            windows = [token_ids[starts + offset] for offset in range(n)]
+            valid = document_ids[starts] == document_ids[starts + n - 1]
+            for window in windows:
+                valid &= window != UNKNOWN_TOKEN
+            keys = self._pack([window[valid] for window in windows])
+
+            positions = np.searchsorted(self._ngram_keys[n], keys)
+            positions[positions == len(self._ngram_keys[n])] = 0
+            found = self._ngram_keys[n][positions] == keys
+            rows.append(document_ids[starts[valid][found]])
+            columns.append(self._ngram_columns[n][positions[found]])
+
+        cells = np.concatenate(rows) * self.n_features + np.concatenate(columns) if rows else np.zeros(0, np.int64)
+        cells, counts = np.unique(cells, return_counts=True)
+
+        indices_dtype = np.int64 if len(cells) > np.iinfo(np.int32).max else np.int32
+        indptr = np.zeros(n_documents + 1, dtype=indices_dtype)
+        np.cumsum(np.bincount(cells // self.n_features, minlength=n_documents), out=indptr[1:])
+        X = self._container((counts.astype(np.intc), (cells % self.n_features).astype(indices_dtype), indptr),
+                            shape=(n_documents, self.n_features), dtype=self.vectorizer.dtype)
+        X.sort_indices()
+        if self.vectorizer.binary:
+            X.data.fill(1)
+        return X
+
+    def transform(self, lemma_lists):
+        return self.vectorizer._tfidf.transform(self.count_matrix(lemma_lists), copy=False)
+
+
+class StreamingTfidfAccumulator:
+    """Accumulates the term counts of one long document fed as consecutive lemma chunks.
+
+    Each chunk is counted together with the lemmas carrying the previous chunk's last ``max_n - 1`` tokens, minus the
+    counts of those carried lemmas alone, so n-grams spanning a chunk boundary are counted exactly once and the final
+    row equals the count row of the whole document. Memory stays bounded by the chunk size and the feature count.
+    """
+
+    def __init__(self, vectorizer, count_matrix=None):
+        if vectorizer.binary:
+            raise ValueError("Binary vectorizers cannot accumulate counts across chunks.")
+        self.vectorizer = vectorizer
+        self._count_matrix = count_matrix or self._vectorizer_count_matrix
+        self._preprocess = vectorizer.build_preprocessor()
+        self._tokenize = vectorizer.build_tokenizer()
+        self._stop_words = vectorizer.get_stop_words()
+        self._carry_tokens = vectorizer.ngram_range[1] - 1
+        self._carry = []
+        self.counts = None
+        self.n_lemmas = 0
+
+    def _vectorizer_count_matrix(self, lemma_lists):
+        from sklearn.feature_extraction.text import CountVectorizer
+        return CountVectorizer.transform(self.vectorizer, [' '.join(lemmas) for lemmas in lemma_lists])
+
+    def _token_count(self, lemma: str) -> int:
+        tokens = self._tokenize(self._preprocess(lemma))
+        if self._stop_words is not None:
+            tokens = [token for token in tokens if token not in self._stop_words]
+        return len(tokens)
+
+    def _next_carry(self, lemmas: list) -> list:
+        carried_tokens = 0
+        start = len(lemmas)
+        while start > 0 and carried_tokens < self._carry_tokens:
+            start -= 1
+            carried_tokens += self._token_count(lemmas[start])
+        return lemmas[start:]
+
+    def add(self, lemmas):
+        lemmas = list(lemmas)
+        if not lemmas:
+            return
+        window = self._carry + lemmas
+        if self._carry:
+            counts = self._count_matrix([window, self._carry])
+            chunk_counts = counts[0:1] - counts[1:2]
+        else:
+            chunk_counts = self._count_matrix([window])
+        self.counts = chunk_counts if self.counts is None else self.counts + chunk_counts
+        self._carry = self._next_carry(window) if self._carry_tokens else []
+        self.n_lemmas += len(lemmas)
+
+    def transform(self):
+        if self.counts is None:
+            return None
+        self.counts.eliminate_zeros()
+        self.counts.sort_indices()
+        return self.vectorizer._tfidf.transform(self.counts, copy=False)
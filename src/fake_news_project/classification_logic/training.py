@@ -0,0 +1,388 @@
+import os
+import hashlib
+import json
+import pickle
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn import __version__ as sklearn_version
+from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from .corpus import CORPUS_MANIFEST_FILENAME, CorpusStore, csv_rows, parse_list_literal
+from .hybrid import combine_features
+from .model_loaders import (CLASSIFIERS_DIR, SVM_MODEL_PATH, VECTORIZER_PATH, DOC2VEC_MODEL_PATH, HYBRID_KMEANS_PATH,
+                            HYBRID_SCALER_PATH, HYBRID_SVM_MODEL_PATH, TfidfSvmSingleton)
+
+TRAINING_RUNS_DIR = os.path.join(CLASSIFIERS_DIR, 'training')
+FOLD_CACHE_DIR = os.path.join(TRAINING_RUNS_DIR, 'fold_cache')
+METRICS_FILENAME = 'metrics.json'
+
+DEFAULT_TFIDF_GRID = {'ngram_range': [(1, 2)], 'max_df': [0.95], 'min_df': [5], 'max_features': [10000]}
+DEFAULT_SVM_GRID = [
+    {'kernel': ['linear'], 'C': [1, 10, 100]},
+    {'kernel': ['rbf'], 'C': [1, 10, 100], 'gamma': ['scale', 'auto', 0.1]},
+]
+SELECTION_METRIC = 'f1_weighted'
+
+# The corpus 'tag' values in LabelEncoder (sorted) order, the class ids the served models were fitted with.
+DATASET_LABELS = ('fake_news', 'misinformation', 'propaganda', 'real_news', 'satire')
+
+HYBRID_CLUSTERS = 8
+DEFAULT_HYBRID_SVM_PARAMS = {'kernel': 'rbf', 'C': 10, 'gamma': 'scale'}
+
+
+def load_training_data(path: str, text_column: str = 'lemmas_filtered', label_column: str = 'tag'):
+    """Returns (documents, labels) from a columnar corpus directory or a preprocessed CSV.
+
+    List columns are joined with spaces, as the serving preprocessor does before TF-IDF."""
+    if os.path.exists(os.path.join(path, CORPUS_MANIFEST_FILENAME)):
+        store = CorpusStore(path)
+        texts = store.column(text_column)
+        documents = list(texts.documents()) if hasattr(texts, 'documents') else texts.tolist()
+        labels = store.column(label_column).tolist()
+    else:
+        documents, labels = [], []
+        for row in csv_rows(path):
+            if text_column not in row or label_column not in row:
+                raise ValueError(f"{path} needs '{text_column}' and '{label_column}' columns.")
+            text = row[text_column] or ''
+            documents.append(' '.join(parse_list_literal(text)) if text.startswith('[') else text)
+            labels.append(row[label_column])
+
+    kept = [number for number, document in enumerate(documents) if document.strip()]
+    return [documents[number] for number in kept], [labels[number] for number in kept]
+
+
+def encode_labels(labels) -> np.ndarray:
+    """Encodes labels with the class ids TfidfSvmSingleton maps back to names when serving. Accepts the corpus
+    tags (fake_news, real_news, ...) as well as the served names (FAKE, REAL, ...)."""
+    label_ids = {label: label_id for label_id, label in TfidfSvmSingleton._label_mapping.items()}
+    label_ids.update({label: label_id for label_id, label in enumerate(DATASET_LABELS)})
+    unknown = sorted(set(labels) - set(label_ids))
+    if unknown:
+        raise ValueError(f"Unknown labels {unknown}. Expected {sorted(label_ids)}.")
+    return np.array([label_ids[label] for label in labels], dtype=np.int64)
+
+
+def corpus_fingerprint(documents, labels) -> str:
+    digest = hashlib.sha1()
+    for document, label in zip(documents, labels):
+        digest.update(label.encode('utf-8'))
+        digest.update(b'\t')
+        digest.update(document.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parameter_grid(grid) -> list:
+    candidates = []
+    for params in ParameterGrid(grid):
+        if isinstance(params.get('ngram_range'), list):
+            params['ngram_range'] = tuple(params['ngram_range'])
+        candidates.append(params)
+    return candidates
+
+
+def params_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def vectorize_fold(documents, train_rows, test_rows, tfidf_params: dict, cache_path: str) -> str:
+    """Fits TF-IDF on one training fold and caches both transformed halves; reused by every SVM candidate."""
+    if os.path.exists(cache_path):
+        return cache_path
+    vectorizer = TfidfVectorizer(**tfidf_params)
+    X_train = vectorizer.fit_transform([documents[row] for row in train_rows])
+    X_test = vectorizer.transform([documents[row] for row in test_rows])
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as f:
+        np.savez(f, train_rows=train_rows, test_rows=test_rows, **{
+            f'{half}_{name}': getattr(matrix, name)
+            for half, matrix in (('train', X_train), ('test', X_test))
+            for name in ('data', 'indices', 'indptr')
+        }, train_shape=X_train.shape, test_shape=X_test.shape)
+    os.replace(temporary_path, cache_path)
+    return cache_path
+
+
+def load_fold(cache_path: str) -> dict:
+    with np.load(cache_path) as arrays:
+        fold = {'train_rows': arrays['train_rows'], 'test_rows': arrays['test_rows']}
+        for half in ('train', 'test'):
+            fold[f'X_{half}'] = sparse.csr_matrix(
+                (arrays[f'{half}_data'], arrays[f'{half}_indices'], arrays[f'{half}_indptr']),
+                shape=tuple(arrays[f'{half}_shape']))
+    return fold
+
+
+def score_predictions(y_true, y_pred) -> dict:
+    return {
+        'accuracy': accuracy_score(y_true, y_pred),
+        'precision_weighted': precision_score(y_true, y_pred, average='weighted', zero_division=0),
+        'recall_weighted': recall_score(y_true, y_pred, average='weighted', zero_division=0),
+        'f1_weighted': f1_score(y_true, y_pred, average='weighted', zero_division=0),
+    }
+
+
+def evaluate_candidate(cache_path: str, y: np.ndarray, svm_params: dict, seed: int) -> dict:
+    fold = load_fold(cache_path)
+    start_time = time.perf_counter()
+    model = SVC(random_state=seed, **svm_params)
+    model.fit(fold['X_train'], y[fold['train_rows']])
+    scores = score_predictions(y[fold['test_rows']], model.predict(fold['X_test']))
+    scores['fit_seconds'] = time.perf_counter() - start_time
+    return scores
+
+
+class ClassifierTrainer:
+    """Grid search and stratified cross-validation for the TF-IDF + SVM classifier.
+
+    Every (fold, TF-IDF setting) pair is vectorized once, in parallel, and cached on disk keyed by the corpus
+    fingerprint, so all SVM candidates and later runs on the same corpus reuse it. (candidate, fold) fits are
+    then spread over n_jobs workers. The best candidate is refit on the full corpus with probability
+    estimates, as served by TfidfSvmSingleton."""
+
+    def __init__(self, tfidf_grid=None, svm_grid=None, n_splits: int = 5, seed: int = 42, n_jobs: int = -1,
+                 cache_dir: str = FOLD_CACHE_DIR):
+        self.tfidf_candidates = parameter_grid(tfidf_grid or DEFAULT_TFIDF_GRID)
+        self.svm_candidates = parameter_grid(svm_grid or DEFAULT_SVM_GRID)
+        self.n_splits = n_splits
+        self.seed = seed
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+
+    def fold_cache_path(self, fingerprint: str, tfidf_params: dict, fold: int) -> str:
+        key = hashlib.sha1(f"{fingerprint}|{self.n_splits}|{self.seed}|{params_key(tfidf_params)}".encode('utf-8'))
+        return os.path.join(self.cache_dir, key.hexdigest()[:16], f'fold_{fold}.npz')
+
+    def cross_validate(self, documents, y: np.ndarray, fingerprint: str) -> list:
+        folds = list(StratifiedKFold(n_splits=self.n_splits, shuffle=True, random_state=self.seed)
+                     .split(np.zeros(len(y)), y))
+        cache_paths = {}
+        pending = []
+        for tfidf_number, tfidf_params in enumerate(self.tfidf_candidates):
+            for fold_number, (train_rows, test_rows) in enumerate(folds):
+                cache_path = self.fold_cache_path(fingerprint, tfidf_params, fold_number)
+                cache_paths[tfidf_number, fold_number] = cache_path
+                if not os.path.exists(cache_path):
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    pending.append((train_rows, test_rows, tfidf_params, cache_path))
+
+        start_time = time.perf_counter()
+        Parallel(n_jobs=self.n_jobs)(delayed(vectorize_fold)(documents, *task) for task in pending)
+        print(f"ClassifierTrainer: Vectorized {len(pending)} folds in {time.perf_counter() - start_time:.1f}s "
+              f"({len(cache_paths) - len(pending)} reused from {self.cache_dir}).")
+
+        tasks = [(tfidf_number, svm_number, fold_number)
+                 for tfidf_number in range(len(self.tfidf_candidates))
+                 for svm_number in range(len(self.svm_candidates))
+                 for fold_number in range(self.n_splits)]
+        start_time = time.perf_counter()
+        fold_scores = Parallel(n_jobs=self.n_jobs)(
+            delayed(evaluate_candidate)(cache_paths[tfidf_number, fold_number], y,
+                                        self.svm_candidates[svm_number], self.seed)
+            for tfidf_number, svm_number, fold_number in tasks)
+        print(f"ClassifierTrainer: Fitted {len(tasks)} candidate folds in {time.perf_counter() - start_time:.1f}s.")
+
+        results = {}
+        for (tfidf_number, svm_number, _), scores in zip(tasks, fold_scores):
+            results.setdefault((tfidf_number, svm_number), []).append(scores)
+
+        candidates = []
+        for (tfidf_number, svm_number), scores in results.items():
+            candidate = {'tfidf_params': self.tfidf_candidates[tfidf_number],
+                         'svm_params': self.svm_candidates[svm_number], 'folds': scores}
+            for metric in scores[0]:
+                values = [fold[metric] for fold in scores]
+                candidate[f'mean_{metric}'] = float(np.mean(values))
+                candidate[f'std_{metric}'] = float(np.std(values))
+            candidates.append(candidate)
+        candidates.sort(key=lambda candidate: -candidate[f'mean_{SELECTION_METRIC}'])
+        return candidates
+
+    def fit_final(self, documents, y: np.ndarray, tfidf_params: dict, svm_params: dict):
+        vectorizer = TfidfVectorizer(**tfidf_params)
+        X = vectorizer.fit_transform(documents)
+        svm_model = SVC(random_state=self.seed, probability=True, **svm_params)
+        svm_model.fit(X, y)
+        return vectorizer, svm_model
+
+    def train(self, documents, labels, output_dir: str, source: str = None) -> dict:
+        """Runs the search, refits the best candidate and writes the pickles and metrics.json to output_dir."""
+        if os.path.exists(output_dir):
+            raise ValueError(f"Training output directory {output_dir} already exists.")
+        y = encode_labels(labels)
+        label_counts = np.bincount(y)
+        if label_counts[label_counts > 0].min() < self.n_splits:
+            raise ValueError(f"Every label needs at least {self.n_splits} documents for {self.n_splits}-fold "
+                             f"cross-validation.")
+        fingerprint = corpus_fingerprint(documents, labels)
+
+        start_time = time.perf_counter()
+        candidates = self.cross_validate(documents, y, fingerprint)
+        search_seconds = time.perf_counter() - start_time
+        best = candidates[0]
+
+        start_time = time.perf_counter()
+        vectorizer, svm_model = self.fit_final(documents, y, best['tfidf_params'], best['svm_params'])
+        final_fit_seconds = time.perf_counter() - start_time
+
+        staging_dir = f"{output_dir}.tmp"
+        os.makedirs(staging_dir, exist_ok=True)
+        for path, estimator in ((VECTORIZER_PATH, vectorizer), (SVM_MODEL_PATH, svm_model)):
+            with open(os.path.join(staging_dir, os.path.basename(path)), 'wb') as f:
+                pickle.dump(estimator, f)
+
+        artifact_paths = [os.path.join(staging_dir, os.path.basename(path))
+                          for path in (VECTORIZER_PATH, SVM_MODEL_PATH)]
+        metrics = {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'model_version': TfidfSvmSingleton._compute_model_version(*artifact_paths),
+            'artifact_sha256': {os.path.basename(path): file_sha256(path) for path in artifact_paths},
+            'source': os.path.abspath(source) if source else None,
+            'corpus_fingerprint': fingerprint,
+            'documents': len(documents),
+            'label_counts': {TfidfSvmSingleton._label_mapping[label_id]: int(count)
+                             for label_id, count in enumerate(label_counts) if count},
+            'n_splits': self.n_splits,
+            'seed': self.seed,
+            'selection_metric': SELECTION_METRIC,
+            'best': {key: value for key, value in best.items() if key != 'folds'},
+            'best_folds': best['folds'],
+            'candidates': [{key: value for key, value in candidate.items() if key != 'folds'}
+                           for candidate in candidates],
+            'vocabulary_size': len(vectorizer.vocabulary_),
+            'timings': {'search_seconds': search_seconds, 'final_fit_seconds': final_fit_seconds},
+            'versions': {'scikit-learn': sklearn_version, 'numpy': np.__version__},
+        }
+        with open(os.path.join(staging_dir, METRICS_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+        os.replace(staging_dir, output_dir)
+        print(f"ClassifierTrainer: Saved model {metrics['model_version']} to {output_dir}.")
+        return metrics
+
+
+def fit_hybrid_estimators(document_vectors: np.ndarray, engineered: np.ndarray, y: np.ndarray, n_clusters: int,
+                          svm_params: dict, seed: int, probability: bool = True):
+    """Fits the scaler, k-means and SVM of experiment B in classification_experiments.ipynb."""
+    scaler = StandardScaler().fit(engineered)
+    kmeans = KMeans(n_clusters=n_clusters, random_state=seed, n_init='auto').fit(document_vectors)
+    svm_model = SVC(random_state=seed, probability=True, **svm_params) if probability else \
+        SVC(random_state=seed, **svm_params)
+    svm_model.fit(combine_features(document_vectors, engineered, scaler, kmeans), y)
+    return scaler, kmeans, svm_model
+
+
+class HybridTrainer:
+    """Fits the artifacts HybridClassifier.from_settings serves: hybrid_scaler.pkl, hybrid_kmeans.pkl and
+    hybrid_svm_model.pkl.
+
+    Features come from the serving HybridClassifier itself (spaCy analysis, inferred Doc2Vec vectors and the
+    engineered features), so training and serving cannot drift apart. They are extracted once; each
+    cross-validation fold then refits the scaler and k-means on its training rows only."""
+
+    def __init__(self, extractor, n_clusters: int = HYBRID_CLUSTERS, svm_params: dict = None, n_splits: int = 5,
+                 seed: int = 42):
+        self.extractor = extractor
+        self.n_clusters = n_clusters
+        self.svm_params = dict(svm_params or DEFAULT_HYBRID_SVM_PARAMS)
+        self.n_splits = n_splits
+        self.seed = seed
+
+    def extract_features(self, texts):
+        analyses = self.extractor.analyze(texts)
+        document_vectors = self.extractor.document_vectors([analysis['lemmas'] for analysis in analyses])
+        return document_vectors, self.extractor.engineered_features(analyses)
+
+    def cross_validate(self, document_vectors: np.ndarray, engineered: np.ndarray, y: np.ndarray) -> list:
+        fold_scores = []
+        folds = StratifiedKFold(n_splits=self.n_splits, shuffle=True, random_state=self.seed)
+        for train_rows, test_rows in folds.split(np.zeros(len(y)), y):
+            scaler, kmeans, svm_model = fit_hybrid_estimators(document_vectors[train_rows], engineered[train_rows],
+                                                              y[train_rows], self.n_clusters, self.svm_params,
+                                                              self.seed, probability=False)
+            features = combine_features(document_vectors[test_rows], engineered[test_rows], scaler, kmeans)
+            fold_scores.append(score_predictions(y[test_rows], svm_model.predict(features)))
+        return fold_scores
+
+    def train(self, texts, labels, output_dir: str, source: str = None) -> dict:
+        """Cross-validates, refits on every document and writes the pickles and metrics.json to output_dir.
+
+        Files are staged next to output_dir and moved in one by one, so output_dir may be the serving
+        directory."""
+        y = encode_labels(labels)
+        label_counts = np.bincount(y)
+        if self.n_splits and label_counts[label_counts > 0].min() < self.n_splits:
+            raise ValueError(f"Every label needs at least {self.n_splits} documents for {self.n_splits}-fold "
+                             f"cross-validation.")
+        if len(texts) < self.n_clusters:
+            raise ValueError(f"At least {self.n_clusters} documents are needed for {self.n_clusters} clusters.")
+
+        start_time = time.perf_counter()
+        document_vectors, engineered = self.extract_features(texts)
+        feature_seconds = time.perf_counter() - start_time
+        print(f"HybridTrainer: Extracted features of {len(texts)} documents in {feature_seconds:.1f}s.")
+
+        start_time = time.perf_counter()
+        fold_scores = self.cross_validate(document_vectors, engineered, y) if self.n_splits else []
+        cross_validation_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        estimators = fit_hybrid_estimators(document_vectors, engineered, y, self.n_clusters, self.svm_params,
+                                           self.seed)
+        final_fit_seconds = time.perf_counter() - start_time
+
+        artifact_names = [os.path.basename(path)
+                          for path in (HYBRID_SCALER_PATH, HYBRID_KMEANS_PATH, HYBRID_SVM_MODEL_PATH)]
+        staging_dir = f"{output_dir.rstrip(os.sep)}.tmp"
+        os.makedirs(staging_dir, exist_ok=True)
+        for name, estimator in zip(artifact_names, estimators):
+            with open(os.path.join(staging_dir, name), 'wb') as f:
+                pickle.dump(estimator, f)
+
+        metrics = {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'artifact_sha256': {name: file_sha256(os.path.join(staging_dir, name)) for name in artifact_names},
+            'doc2vec_model': os.path.abspath(DOC2VEC_MODEL_PATH),
+            'source': os.path.abspath(source) if source else None,
+            'corpus_fingerprint': corpus_fingerprint(texts, labels),
+            'documents': len(texts),
+            'label_counts': {TfidfSvmSingleton._label_mapping[label_id]: int(count)
+                             for label_id, count in enumerate(label_counts) if count},
+            'n_clusters': self.n_clusters,
+            'svm_params': self.svm_params,
+            'n_splits': self.n_splits,
+            'seed': self.seed,
+            'folds': fold_scores,
+            'timings': {'feature_seconds': feature_seconds, 'cross_validation_seconds': cross_validation_seconds,
+                        'final_fit_seconds': final_fit_seconds},
+            'versions': {'scikit-learn': sklearn_version, 'numpy': np.__version__},
+        }
+        for metric in (fold_scores[0] if fold_scores else {}):
+            values = [fold[metric] for fold in fold_scores]
+            metrics[f'mean_{metric}'] = float(np.mean(values))
+            metrics[f'std_{metric}'] = float(np.std(values))
+        with open(os.path.join(staging_dir, METRICS_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+
+        os.makedirs(output_dir, exist_ok=True)
+        for name in artifact_names + [METRICS_FILENAME]:
+            os.replace(os.path.join(staging_dir, name), os.path.join(output_dir, name))
+        os.rmdir(staging_dir)
+        print(f"HybridTrainer: Saved the hybrid classifier to {output_dir}.")
+        return metrics
@@ -30,6 +30,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'fake_news_ui.middleware.SlowRequestProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'fake_news_project.urls'
@@ -97,3 +98,107 @@ STATICFILES_DIRS = [
 ]
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+MODEL_LOADING_POLICY = os.environ.get('MODEL_LOADING_POLICY', 'lazy')
+MODEL_LOADING_STARTUP_BUDGET = None
+
+# 'lean' disables TEXT_PREPROCESSOR_LEAN_EXCLUDE in the spaCy pipeline. It is opt-in until
+# `manage.py check_lean_preprocessing` reports no mismatches with ro_core_news_lg for the articles being served.
+TEXT_PREPROCESSOR_MODE = 'full'
+TEXT_PREPROCESSOR_LEAN_EXCLUDE = ['parser', 'ner']
+
+CLASSIFIER_RESULT_CACHE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 10000,
+    'TTL': 60 * 60,
+    'SHARED_CACHE_ALIAS': None,
+}
+
+# Enable in serving deployments with a migrated database. Offline runs (classify_corpus workers, benchmarks and
+# shadow facades) never use the store.
+CLASSIFICATION_STORE = {
+    'ENABLED': False,
+    'MODEL': 'fake_news_ui.ClassificationRecord',
+    'READ_THROUGH': True,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL_SECONDS': 1.0,
+    'MAX_QUEUE': 10000,
+}
+
+NEAR_DUPLICATE_INDEX = {
+    'ENABLED': False,
+    'THRESHOLD': 0.8,
+    'NUM_PERM': 64,
+    'BANDS': 16,
+    'SHINGLE_SIZE': 3,
+    'PERSIST': True,
+    'DIRECTORY': None,
+    'COMPACT_AFTER': 10000,
+}
+
+# Whole documents are already cached by CLASSIFIER_RESULT_CACHE; this cache reuses the shared paragraphs or
+# sentences of reposts. Each segment is lemmatized out of context; measure that with find_segment_cache_mismatches.
+TEXT_PREPROCESSOR_LEMMA_CACHE = {
+    'ENABLED': False,
+    'MAX_BYTES': 64 * 1024 * 1024,
+    'SEGMENT': 'paragraph',
+}
+
+WORD2VEC_SERVING_MODE = 'mmap'
+WORD2VEC_NEIGHBOUR_BACKEND = 'exact'
+WORD2VEC_ANN_N_PROBE = 8
+WORD_SIMILARITY_API_MAX_QUERIES = 1000
+
+CLASSIFIER_API_MAX_BATCH = 1000
+CLASSIFIER_API_STREAM_THRESHOLD = 100
+CLASSIFIER_API_BATCH_SIZE = 64
+
+CLASSIFIER_MICRO_BATCH = {
+    'MAX_BATCH_SIZE': 32,
+    'MAX_WAIT_MS': 5,
+    'MAX_QUEUE': 1000,
+    'WORKERS': 1,
+}
+
+CLASSIFIER_ARTIFACT_FORMAT = 'auto'
+
+CLASSIFIER_INFERENCE_ENGINE = 'exact'
+
+TFIDF_DIRECT_TRANSFORM = True
+
+CLASSIFIER_STREAMING = {
+    'THRESHOLD_CHARS': 100000,
+    'CHUNK_CHARS': 20000,
+    'MAX_CHARS': 2000000,
+}
+
+# WATCH: 'auto' polls registry.json only in serving processes (runserver, wsgi.py, asgi.py); True or False forces it.
+MODEL_REGISTRY = {
+    'DIRECTORY': None,
+    'POLL_SECONDS': 30,
+    'WATCH': 'auto',
+    'SHADOW_SAMPLE_RATE': 1.0,
+    'SHADOW_MAX_PENDING': 1000,
+}
+
+HYBRID_CLASSIFIER = {
+    'INFER_EPOCHS': None,
+    'INFER_CACHE_ENTRIES': 10000,
+    'BATCH_SIZE': 64,
+}
+
+EMOTION_LEXICON = {
+    'SKIP_STOP_WORDS': True,
+}
+
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+SLOW_REQUEST_PROFILER = {
+    'ENABLED': os.environ.get('SLOW_REQUEST_PROFILER', '') == '1',
+    'THRESHOLD_SECONDS': 1.0,
+    'INTERVAL_SECONDS': 0.005,
+    'SAMPLE_RATE': 1.0,
+    'ALL_THREADS': False,
+    'OUTPUT_DIR': BASE_DIR / 'profiles',
+}
@@ -3,5 +3,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fake_news_project.settings')
+# Marks this process as serving requests, so the app starts the model registry watcher.
+os.environ.setdefault('FAKE_NEWS_SERVING', '1')
 
 application = get_wsgi_application()
@@ -1 +1,11 @@
 from django.contrib import admin
+
+from .models import ClassificationRecord
+
+
+@admin.register(ClassificationRecord)
+class ClassificationRecordAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'label', 'confidence', 'model_version', 'content_hash', 'text_length')
+    list_filter = ('label', 'model_version')
+    search_fields = ('content_hash',)
+    date_hierarchy = 'created_at'
@@ -1,26 +1,46 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+SERVING_ENV_VAR = 'FAKE_NEWS_SERVING'
+
+
+def is_serving_process() -> bool:
+    """True in the runserver process that serves requests and under the WSGI/ASGI entry points, which set
+    FAKE_NEWS_SERVING. Management commands and the runserver autoreloader are not serving processes."""
+    if os.environ.get(SERVING_ENV_VAR):
+        return True
+    return 'runserver' in sys.argv and (os.environ.get('RUN_MAIN') == 'true' or '--noreload' in sys.argv)
+
 
 class FakeNewsUiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fake_news_ui'
 
     def ready(self):
-        print("FakeNewsUiConfig: App ready. Preloading models and preprocessor...")
-        try:
-            from ..classification_logic.model_loaders import (
-                TfidfSvmSingleton,
-                TextPreprocessor,
-                Word2VecManagerSingleton
-
-            )
-
-            TfidfSvmSingleton.get_instance()
-            TextPreprocessor.get_instance()
+        from classification_logic.emotions import EmotionLexicon
+        from classification_logic.facade import NewsClassifierFacade
+        from classification_logic.loading import ModelLoadingManager
+        from classification_logic.model_loaders import TfidfSvmSingleton, Word2VecManagerSingleton
+        from classification_logic.preprocessors import TextPreprocessor
+        from classification_logic.registry import ModelRegistry
 
-            w2v_manager = Word2VecManagerSingleton.get_instance()
-            w2v_manager.get_model('300')
-            w2v_manager.get_model('150')
+        loading_manager = ModelLoadingManager.get_instance()
+        loading_manager.register('preprocessor', TextPreprocessor.get_instance)
+        loading_manager.register('tfidf_svm', TfidfSvmSingleton.get_instance)
+        loading_manager.register('classifier', NewsClassifierFacade.get_instance)
+        loading_manager.register('emotion_lexicon', EmotionLexicon.get_instance)
+        for dimension_key in Word2VecManagerSingleton.MODEL_CONFIG:
+            loading_manager.register(
+                f'word2vec_{dimension_key}',
+                lambda dimension_key=dimension_key:
+                    Word2VecManagerSingleton.get_instance().get_neighbour_index(dimension_key))
 
-            print("FakeNewsUiConfig: Models preloaded/initialized via Singletons.")
-        except Exception as e:
-            print(f"FakeNewsUiConfig: Error during model preloading: {e}")
\ No newline at end of file
+        policy = getattr(settings, 'MODEL_LOADING_POLICY', 'eager')
+        print(f"FakeNewsUiConfig: App ready. Model loading policy is '{policy}'.")
+        loading_manager.apply_policy(policy, startup_budget=getattr(settings, 'MODEL_LOADING_STARTUP_BUDGET', None))
+        watch = getattr(settings, 'MODEL_REGISTRY', {}).get('WATCH', 'auto')
+        if watch is True or (watch == 'auto' and is_serving_process()):
+            ModelRegistry.get_instance().start_watcher()
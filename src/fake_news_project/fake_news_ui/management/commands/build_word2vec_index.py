@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.model_loaders import Word2VecManagerSingleton
+from classification_logic.similarity import ExactNeighbourIndex
+
+
+class Command(BaseCommand):
+    help = ("Builds the approximate nearest-neighbour (IVF) index for each Word2Vec model, saves it next to "
+            "the .model file and reports recall@N against exact search for several n_probe values.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dimension', action='append', choices=list(Word2VecManagerSingleton.MODEL_CONFIG),
+                            help="Model dimension to index. Defaults to every configured model.")
+        parser.add_argument('--lists', type=int, default=None,
+                            help="Number of inverted lists. Defaults to 4 * sqrt(vocabulary size).")
+        parser.add_argument('--iterations', type=int, default=20, help="k-means iterations.")
+        parser.add_argument('--probe-words', type=int, default=200, help="Words sampled for the recall report.")
+        parser.add_argument('--top-n', type=int, default=10)
+
+    def handle(self, *args, **options):
+        manager = Word2VecManagerSingleton.get_instance()
+        dimensions = options['dimension'] or list(Word2VecManagerSingleton.MODEL_CONFIG)
+
+        for dimension_key in dimensions:
+            start_time = time.perf_counter()
+            try:
+                index = manager.build_neighbour_index(dimension_key, n_lists=options['lists'],
+                                                      n_iterations=options['iterations'])
+            except (ValueError, FileNotFoundError) as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"{dimension_key}D: built {len(index.centroids)} lists over "
+                              f"{len(index.index_to_key)} words in {time.perf_counter() - start_time:.1f}s")
+
+            self.report_recall(dimension_key, index, manager.get_vectors(dimension_key),
+                               options['probe_words'], options['top_n'])
+
+    def report_recall(self, dimension_key, index, vectors, probe_word_count, top_n):
+        exact_index = ExactNeighbourIndex.from_keyed_vectors(vectors)
+        rng = np.random.default_rng(0)
+        probe_count = min(probe_word_count, len(exact_index.index_to_key))
+        probe_words = [exact_index.index_to_key[i]
+                       for i in rng.choice(len(exact_index.index_to_key), size=probe_count, replace=False)]
+
+        start_time = time.perf_counter()
+        exact_results = {word: {neighbour for neighbour, _ in exact_index.most_similar(word, topn=top_n)}
+                         for word in probe_words}
+        exact_ms = (time.perf_counter() - start_time) * 1000 / max(probe_count, 1)
+        self.stdout.write(f"{dimension_key}D: exact search {exact_ms:.3f} ms/query")
+
+        n_lists = len(index.centroids)
+        for n_probe in sorted({1, 2, 4, 8, 16, 32, n_lists}):
+            if n_probe > n_lists:
+                continue
+            start_time = time.perf_counter()
+            matched = 0
+            for word in probe_words:
+                neighbours = {neighbour for neighbour, _ in index.most_similar(word, topn=top_n, n_probe=n_probe)}
+                matched += len(neighbours & exact_results[word])
+            elapsed_ms = (time.perf_counter() - start_time) * 1000 / max(probe_count, 1)
+            recall = matched / max(sum(len(result) for result in exact_results.values()), 1)
+            self.stdout.write(f"{dimension_key}D: n_probe={n_probe:<4} recall@{top_n}={recall:.3f} "
+                              f"{elapsed_ms:.3f} ms/query")
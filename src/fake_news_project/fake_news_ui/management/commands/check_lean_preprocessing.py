@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.preprocessors import TextPreprocessor, find_lean_mode_mismatches
+
+SAMPLE_ARTICLES = [
+    "Guvernul a anunțat astăzi un nou pachet de măsuri economice pentru sprijinirea întreprinderilor mici.",
+    "Un studiu recent arată că vaccinurile modifică ADN-ul uman, susțin mai multe surse anonime de pe internet.",
+    "Președintele s-a întâlnit cu liderii europeni la Bruxelles pentru a discuta despre securitatea energetică.",
+    "Oamenii de știință au descoperit că ceaiul de mușețel vindecă orice boală în doar trei zile.",
+    "Primăria Capitalei a început lucrările de reabilitare a rețelei de termoficare din sectorul 3.",
+    "Extratereștrii au aterizat aseară în Piața Victoriei, iar autoritățile ascund adevărul de populație.",
+    "Banca Națională a României a menținut dobânda de politică monetară la nivelul de 7 la sută.",
+    "Ministrul a declarat, cu o mână pe inimă, că de mâine toate autostrăzile vor fi gata.",
+]
+
+
+class Command(BaseCommand):
+    help = "Checks that the lean spaCy pipeline produces token-identical TF-IDF input to the full pipeline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--input', help="Text file with one article per line. Defaults to a built-in sample.")
+        parser.add_argument('--limit', type=int, default=None, help="Maximum number of articles to compare.")
+        parser.add_argument('--batch-size', type=int, default=64)
+
+    def handle(self, *args, **options):
+        if options['input']:
+            with open(options['input'], encoding='utf-8') as f:
+                texts = [line.strip() for line in f if line.strip()]
+        else:
+            texts = SAMPLE_ARTICLES
+        if options['limit']:
+            texts = texts[:options['limit']]
+
+        try:
+            mismatches = find_lean_mode_mismatches(texts, batch_size=options['batch_size'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        for mode in ('full', 'lean'):
+            preprocessor = TextPreprocessor(mode=mode)
+            start_time = time.perf_counter()
+            for _ in preprocessor.iter_processed_texts_for_tfidf(texts, batch_size=options['batch_size']):
+                pass
+            elapsed = time.perf_counter() - start_time
+            self.stdout.write(f"{mode}: {len(texts)} articles in {elapsed:.2f}s "
+                              f"(components: {', '.join(preprocessor._nlp.pipe_names)})")
+
+        if mismatches:
+            for mismatch in mismatches[:10]:
+                self.stderr.write(f"Article {mismatch['index']}: full={mismatch['full_tokens']} "
+                                  f"lean={mismatch['lean_tokens']}")
+            raise CommandError(f"{len(mismatches)} of {len(texts)} articles differ between full and lean mode.")
+
+        self.stdout.write(self.style.SUCCESS(f"Lean mode output is token-identical on {len(texts)} articles."))
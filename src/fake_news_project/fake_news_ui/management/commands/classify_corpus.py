@@ -0,0 +1,149 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.corpus import CorpusFormatError, detect_format, iter_chunks, iter_corpus_rows
+
+OUTPUT_FIELDS = ('row', 'id', 'classification_result', 'confidence', 'message', 'model_version')
+
+_worker_facade = None
+
+
+def _init_worker():
+    global _worker_facade
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    from classification_logic.facade import NewsClassifierFacade
+    _worker_facade = NewsClassifierFacade.get_instance()
+    # Offline scoring neither reads nor logs classifications in the database; a pool worker's writer thread would
+    # also lose its queued records when the pool exits.
+    _worker_facade.result_store = None
+
+
+def _classify_chunk(task):
+    rows, batch_size = task
+    if _worker_facade is None:
+        _init_worker()
+    results = _worker_facade.classify_batch([text for _, _, text in rows], batch_size=batch_size)
+    return [
+        {
+            'row': row_number,
+            'id': row_id,
+            'classification_result': result.get('classification_result'),
+            'confidence': float(result['confidence']) if result.get('confidence') is not None else None,
+            'message': result.get('message'),
+            'model_version': _worker_facade.model_version,
+        }
+        for (row_number, row_id, _), result in zip(rows, results)
+    ]
+
+
+def iter_input_rows(path: str, input_format: str, text_field: str, id_field: str = None):
+    try:
+        yield from iter_corpus_rows(path, input_format, text_field, id_field)
+    except CorpusFormatError as e:
+        raise CommandError(str(e))
+
+
+class Command(BaseCommand):
+    help = ("Streams a CSV or JSONL corpus through the classifier on several processes, writing results "
+            "incrementally and checkpointing progress so an interrupted run can be resumed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Input corpus (.csv or .jsonl).")
+        parser.add_argument('output', help="Output file (.csv or .jsonl).")
+        parser.add_argument('--input-format', choices=('csv', 'jsonl'), help="Defaults to the input extension.")
+        parser.add_argument('--text-field', default='content', help="Column or key holding the article text.")
+        parser.add_argument('--id-field', help="Column or key copied to the output to identify each article.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=256, help="Articles sent to a worker per task.")
+        parser.add_argument('--batch-size', type=int, default=64, help="spaCy/SVM batch size inside a worker.")
+        parser.add_argument('--resume', action='store_true', help="Continue from the output's checkpoint file.")
+
+    def handle(self, *args, **options):
+        input_path, output_path = options['input'], options['output']
+        input_format = options['input_format'] or detect_format(input_path)
+        output_format = detect_format(output_path)
+        checkpoint_path = output_path + '.checkpoint'
+
+        if not os.path.exists(input_path):
+            raise CommandError(f"Input file {input_path} does not exist.")
+
+        from classification_logic.facade import NewsClassifierFacade
+        model_version = NewsClassifierFacade.get_instance().model_version
+
+        rows_done, output_offset = 0, 0
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint['model_version'] != model_version:
+                raise CommandError(f"Checkpoint was written by model {checkpoint['model_version']}, "
+                                   f"the current model is {model_version}. Start a fresh run instead.")
+            rows_done, output_offset = checkpoint['rows_done'], checkpoint['output_offset']
+            self.stdout.write(f"Resuming after {rows_done} rows.")
+        elif os.path.exists(output_path) and options['resume']:
+            raise CommandError(f"{output_path} exists but has no checkpoint at {checkpoint_path} to resume from. "
+                               f"Move it away or choose another output file.")
+        elif os.path.exists(output_path):
+            raise CommandError(f"{output_path} already exists. Use --resume or choose another output file.")
+
+        rows = iter_input_rows(input_path, input_format, options['text_field'], options['id_field'])
+        tasks = ((chunk, options['batch_size']) for chunk in iter_chunks(islice(rows, rows_done, None),
+                                                                         options['chunk_size']))
+
+        with open(output_path, 'a+', encoding='utf-8', newline='') as output:
+            output.seek(output_offset)
+            output.truncate()
+            writer = csv.DictWriter(output, fieldnames=OUTPUT_FIELDS) if output_format == 'csv' else None
+            if writer and output_offset == 0:
+                writer.writeheader()
+
+            start_time = time.perf_counter()
+            processed = 0
+            for chunk_results in self.iter_results(tasks, options['workers']):
+                scored_by = {result['model_version'] for result in chunk_results}
+                if scored_by != {model_version}:
+                    raise CommandError(f"Rows {chunk_results[0]['row']}-{chunk_results[-1]['row']} were scored by "
+                                       f"model {', '.join(sorted(scored_by))} instead of {model_version}. The model "
+                                       f"changed during the run; the checkpoint covers the rows scored before it.")
+                for result in chunk_results:
+                    if writer:
+                        writer.writerow(result)
+                    else:
+                        output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                output.flush()
+                os.fsync(output.fileno())
+
+                processed += len(chunk_results)
+                rows_done += len(chunk_results)
+                self.write_checkpoint(checkpoint_path, rows_done, output.tell(), model_version)
+
+                elapsed = time.perf_counter() - start_time
+                self.stdout.write(f"{rows_done} rows scored, {processed / elapsed:.1f} docs/sec")
+
+        elapsed = time.perf_counter() - start_time
+        rate = processed / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(f"Scored {processed} documents in {elapsed:.1f}s ({rate:.1f} docs/sec) "
+                                             f"with model {model_version}. Results in {output_path}."))
+
+    def iter_results(self, tasks, workers: int):
+        if workers <= 1:
+            yield from map(_classify_chunk, tasks)
+            return
+        with Pool(processes=workers, initializer=_init_worker) as pool:
+            yield from pool.imap(_classify_chunk, tasks)
+
+    @staticmethod
+    def write_checkpoint(checkpoint_path: str, rows_done: int, output_offset: int, model_version: str):
+        temporary_path = checkpoint_path + '.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump({'rows_done': rows_done, 'output_offset': output_offset, 'model_version': model_version}, f)
+        os.replace(temporary_path, checkpoint_path)
@@ -0,0 +1,46 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.corpus import CorpusStore, convert_csv
+
+
+class Command(BaseCommand):
+    help = ("Converts a preprocessed corpus CSV, whose list columns hold Python literals, into the columnar corpus "
+            "format read by classification_logic.corpus.CorpusStore. Run it once per CSV.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Preprocessed corpus CSV (e.g. data/processed/final_NEW.csv).")
+        parser.add_argument('--output', default=None,
+                            help="Corpus directory. Defaults to the CSV path with a .corpus extension.")
+        parser.add_argument('--list-column', action='append', dest='list_columns', default=None,
+                            help="Column holding list literals. Defaults to every column whose values all "
+                                 "start with '['.")
+        parser.add_argument('--chunk-rows', type=int, default=2048)
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['input']):
+            raise CommandError(f"Corpus CSV not found at {options['input']}.")
+        output = options['output'] or f"{os.path.splitext(options['input'])[0]}.corpus"
+
+        start_time = time.perf_counter()
+        try:
+            store = convert_csv(options['input'], output, list_columns=options['list_columns'],
+                                chunk_rows=options['chunk_rows'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"Converted {len(store)} rows in {time.perf_counter() - start_time:.1f}s: "
+                          f"{os.path.getsize(options['input']) / (1024 * 1024):.1f} MB CSV -> "
+                          f"{store.nbytes() / (1024 * 1024):.1f} MB in {output}")
+
+        for name, column in store.manifest['columns'].items():
+            details = (f", {column['tokens']} tokens, {column['vocabulary_size']} distinct"
+                       if column['kind'] == 'list' else '')
+            self.stdout.write(f"  {name}: {column['kind']}{details}")
+
+        start_time = time.perf_counter()
+        reopened = CorpusStore(output)
+        for name in reopened.columns:
+            reopened.read([name])
+        self.stdout.write(f"Reading every column back took {time.perf_counter() - start_time:.2f}s.")
@@ -0,0 +1,83 @@
+import time
+from itertools import islice
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from scipy import sparse
+
+from classification_logic.corpus import CorpusFormatError, detect_format, iter_corpus_rows
+from classification_logic.inference import DistilledLinearEngine, measure_agreement
+from classification_logic.model_loaders import TfidfSvmSingleton, DISTILLED_ENGINE_DIR
+from classification_logic.preprocessors import TextPreprocessor
+
+
+class Command(BaseCommand):
+    help = ("Trains a linear student model on the production SVC's predictions over a corpus, measures how often "
+            "it agrees with the SVC on held-out documents and saves it for CLASSIFIER_INFERENCE_ENGINE = "
+            "'distilled'.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', help="CSV or JSONL corpus used as distillation data.")
+        parser.add_argument('--text-field', default='content')
+        parser.add_argument('--limit', type=int, default=None, help="Maximum number of documents to use.")
+        parser.add_argument('--holdout', type=float, default=0.2, help="Fraction of documents kept for evaluation.")
+        parser.add_argument('--C', type=float, default=10.0, help="Inverse regularization of the student model.")
+        parser.add_argument('--batch-size', type=int, default=64)
+        parser.add_argument('--min-agreement', type=float, default=None,
+                            help="Refuse to save the student if held-out label agreement is below this rate.")
+        parser.add_argument('--output-dir', default=DISTILLED_ENGINE_DIR)
+
+    def handle(self, *args, **options):
+        model_singleton = TfidfSvmSingleton.get_instance()
+        vectorizer, svm_model = model_singleton.get_vectorizer(), model_singleton.get_svm_model()
+        if vectorizer is None or svm_model is None:
+            raise CommandError("The TF-IDF vectorizer and SVM model must be available to distill them.")
+
+        rows = iter_corpus_rows(options['corpus'], detect_format(options['corpus']), options['text_field'])
+        texts = (text for _, _, text in islice(rows, options['limit']))
+        try:
+            processed_texts = [text for text in TextPreprocessor.get_instance().iter_processed_texts_for_tfidf(
+                texts, batch_size=options['batch_size']) if text]
+        except CorpusFormatError as e:
+            raise CommandError(str(e))
+        if len(processed_texts) < 10:
+            raise CommandError(f"Only {len(processed_texts)} usable documents; distillation needs more data.")
+
+        X = vectorizer.transform(processed_texts)
+        teacher_probabilities = svm_model.predict_proba(X)
+
+        order = np.random.default_rng(42).permutation(X.shape[0])
+        n_holdout = max(1, int(len(order) * options['holdout']))
+        holdout_rows, train_rows = order[:n_holdout], order[n_holdout:]
+
+        try:
+            engine = DistilledLinearEngine.fit(X[train_rows], teacher_probabilities[train_rows], C=options['C'],
+                                               teacher_model_version=model_singleton.get_model_version())
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        X_holdout = sparse.csr_matrix(X[holdout_rows])
+        start_time = time.perf_counter()
+        teacher_holdout = svm_model.predict_proba(X_holdout)
+        teacher_seconds = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        student_holdout = engine.predict_proba(X_holdout)
+        student_seconds = time.perf_counter() - start_time
+
+        engine.metrics = measure_agreement(teacher_holdout, student_holdout)
+        engine.metrics['train_documents'] = int(len(train_rows))
+        engine.metrics['speedup'] = teacher_seconds / student_seconds if student_seconds else None
+
+        self.stdout.write(f"Held-out documents: {engine.metrics['documents']}, "
+                          f"label agreement {engine.metrics['label_agreement']:.2%}, "
+                          f"confidence band agreement {engine.metrics['band_agreement']:.2%}, "
+                          f"mean |dp| {engine.metrics['mean_abs_probability_difference']:.4f}")
+        self.stdout.write(f"predict_proba: SVC {teacher_seconds * 1000:.1f} ms, "
+                          f"distilled {student_seconds * 1000:.1f} ms")
+
+        if options['min_agreement'] is not None and engine.metrics['label_agreement'] < options['min_agreement']:
+            raise CommandError(f"Label agreement {engine.metrics['label_agreement']:.2%} is below the required "
+                               f"{options['min_agreement']:.2%}; the student model was not saved.")
+
+        engine.save(options['output_dir'])
+        self.stdout.write(self.style.SUCCESS(f"Saved the distilled linear model to {options['output_dir']}."))
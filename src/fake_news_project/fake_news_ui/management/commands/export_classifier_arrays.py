@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.artifacts import load_estimators
+from classification_logic.model_loaders import (TfidfSvmSingleton, TFIDF_SVM_ARRAYS_DIR, VECTORIZER_PATH,
+                                                SVM_MODEL_PATH)
+from .export_word2vec_vectors import read_rss_kb
+
+
+class Command(BaseCommand):
+    help = ("Exports the pickled TF-IDF vectorizer and SVM model as memory-mappable .npy arrays plus a JSON "
+            "manifest, then checks that the exported model reproduces predict_proba exactly.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=TFIDF_SVM_ARRAYS_DIR)
+        parser.add_argument('--check-documents', type=int, default=200,
+                            help="Number of synthetic documents used to compare predict_proba.")
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        try:
+            TfidfSvmSingleton.export_arrays(output_dir)
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
+
+        start_time = time.perf_counter()
+        vectorizer = TfidfSvmSingleton._read_pickle(VECTORIZER_PATH, 'TF-IDF vectorizer')
+        svm_model = TfidfSvmSingleton._read_pickle(SVM_MODEL_PATH, 'SVM model')
+        pickle_seconds = time.perf_counter() - start_time
+
+        rss_before = read_rss_kb()
+        start_time = time.perf_counter()
+        estimators, _ = load_estimators(output_dir, mmap_mode='r')
+        arrays_seconds = time.perf_counter() - start_time
+        rss_after = read_rss_kb()
+
+        documents = self.build_check_documents(vectorizer, options['check_documents'])
+        expected = svm_model.predict_proba(vectorizer.transform(documents))
+        actual = estimators['svm_model'].predict_proba(estimators['vectorizer'].transform(documents))
+        if not np.array_equal(expected, actual):
+            raise CommandError(f"Exported model differs from the pickles: max probability difference "
+                               f"{np.abs(expected - actual).max():.3g}.")
+
+        self.stdout.write(f"Load time: pickle {pickle_seconds:.2f}s, arrays {arrays_seconds:.2f}s")
+        if rss_before and rss_after:
+            self.stdout.write(f"Arrays load: private RSS {(rss_after['RssAnon'] - rss_before['RssAnon']) / 1024:.1f} MB, "
+                              f"shared page-cache RSS {(rss_after['RssFile'] - rss_before['RssFile']) / 1024:.1f} MB")
+        self.stdout.write(self.style.SUCCESS(f"predict_proba is identical on {len(documents)} documents. "
+                                             f"Set CLASSIFIER_ARTIFACT_FORMAT = 'arrays' (or 'auto') to serve them."))
+
+    @staticmethod
+    def build_check_documents(vectorizer, count: int) -> list:
+        terms = [term for term in vectorizer.vocabulary_ if ' ' not in term]
+        rng = np.random.default_rng(42)
+        return [' '.join(rng.choice(terms, size=min(len(terms), 120))) for _ in range(count)] if terms else ['']
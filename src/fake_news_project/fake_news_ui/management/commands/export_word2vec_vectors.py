@@ -0,0 +1,78 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from gensim.models import Word2Vec, KeyedVectors
+
+from classification_logic.model_loaders import Word2VecManagerSingleton
+
+
+def read_rss_kb() -> dict:
+    rss = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(('RssAnon:', 'RssFile:')):
+                    name, value = line.split(':', 1)
+                    rss[name] = int(value.split()[0])
+    except OSError:
+        pass
+    return rss
+
+
+class Command(BaseCommand):
+    help = ("Exports the KeyedVectors of each Word2Vec model next to its .model file so workers can "
+            "memory-map them (WORD2VEC_SERVING_MODE = 'mmap') and share them through the OS page cache. Also writes "
+            "the unit-normalized vectors that WORD2VEC_NEIGHBOUR_BACKEND = 'exact' maps read-only.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dimension', action='append', choices=list(Word2VecManagerSingleton.MODEL_CONFIG),
+                            help="Model dimension to export. Defaults to every configured model.")
+        parser.add_argument('--skip-measurement', action='store_true',
+                            help="Do not report load time and resident memory for the exported vectors.")
+
+    def handle(self, *args, **options):
+        manager = Word2VecManagerSingleton.get_instance()
+        dimensions = options['dimension'] or list(Word2VecManagerSingleton.MODEL_CONFIG)
+
+        for dimension_key in dimensions:
+            try:
+                vectors_path = manager.export_vectors(dimension_key)
+                normed_index = manager.export_normalized_vectors(dimension_key)
+            except (ValueError, FileNotFoundError) as e:
+                raise CommandError(str(e))
+
+            size_mb = os.path.getsize(vectors_path + '.vectors.npy') / (1024 * 1024)
+            self.stdout.write(f"{dimension_key}D: exported to {vectors_path} ({size_mb:.1f} MB of vectors, "
+                              f"{normed_index.normed_vectors.nbytes / (1024 * 1024):.1f} MB normalized)")
+
+            if not options['skip_measurement']:
+                self.report_footprint(dimension_key, vectors_path)
+
+    def report_footprint(self, dimension_key: str, vectors_path: str):
+        probe_word = None
+
+        rss_before = read_rss_kb()
+        start_time = time.perf_counter()
+        vectors = KeyedVectors.load(vectors_path, mmap='r')
+        if vectors.index_to_key:
+            probe_word = vectors.index_to_key[0]
+            vectors.most_similar(probe_word, topn=10)
+        mmap_seconds = time.perf_counter() - start_time
+        rss_after = read_rss_kb()
+        del vectors
+
+        start_time = time.perf_counter()
+        model = Word2Vec.load(Word2VecManagerSingleton.MODEL_CONFIG[dimension_key]['path'])
+        if probe_word:
+            model.wv.most_similar(probe_word, topn=10)
+        full_seconds = time.perf_counter() - start_time
+        del model
+
+        self.stdout.write(f"{dimension_key}D: full model load + query {full_seconds:.2f}s, "
+                          f"mmap vectors load + query {mmap_seconds:.2f}s")
+        if rss_before and rss_after:
+            private_mb = (rss_after['RssAnon'] - rss_before['RssAnon']) / 1024
+            shared_mb = (rss_after['RssFile'] - rss_before['RssFile']) / 1024
+            self.stdout.write(f"{dimension_key}D: per-worker private RSS {private_mb:.1f} MB, "
+                              f"shared page-cache RSS {shared_mb:.1f} MB")
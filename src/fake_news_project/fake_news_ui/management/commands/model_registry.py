@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.model_loaders import CLASSIFIERS_DIR
+from classification_logic.registry import ModelRegistry
+
+
+class Command(BaseCommand):
+    help = ("Publishes TF-IDF + SVM artifacts as a new registry version and chooses the active and shadow versions. "
+            "Running workers pick up the change within MODEL_REGISTRY['POLL_SECONDS'] without a restart.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--publish', nargs='?', const=CLASSIFIERS_DIR, default=None, metavar='SOURCE_DIR',
+                            help="Copy the pickles or array artifacts in SOURCE_DIR into a new version.")
+        parser.add_argument('--name', default=None, help="Version name for --publish (default: content hash).")
+        parser.add_argument('--notes', default=None)
+        parser.add_argument('--activate', default=None, metavar='VERSION',
+                            help="Serve VERSION. Use 'published' for the version created by --publish.")
+        parser.add_argument('--shadow', default=None, metavar='VERSION',
+                            help="Shadow-score VERSION against the active model. Use 'published' as for "
+                                 "--activate.")
+        parser.add_argument('--clear-shadow', action='store_true')
+
+    def handle(self, *args, **options):
+        registry = ModelRegistry.get_instance()
+        published = None
+        try:
+            if options['publish']:
+                published = registry.publish(options['publish'], version=options['name'], notes=options['notes'])
+                self.stdout.write(f"Published version {published}.")
+            if options['activate']:
+                registry.set_active(self.resolve(options['activate'], published))
+            if options['shadow']:
+                registry.set_shadow(self.resolve(options['shadow'], published))
+            elif options['clear_shadow']:
+                registry.set_shadow(None)
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
+
+        manifest = registry.read_manifest()
+        for version, entry in sorted(manifest['versions'].items(), key=lambda item: item[1]['published_at']):
+            markers = [role for role in ('active', 'shadow') if manifest[role] == version]
+            self.stdout.write(f"{version}  {entry['published_at']}  {entry['format']:<7}"
+                              f"{'  [' + ', '.join(markers) + ']' if markers else ''}"
+                              f"{'  ' + entry['notes'] if entry.get('notes') else ''}")
+        if not manifest['versions']:
+            self.stdout.write(f"No model versions registered in {registry.directory}.")
+
+    @staticmethod
+    def resolve(version: str, published: str) -> str:
+        if version == 'published':
+            if not published:
+                raise CommandError("'published' can only be used together with --publish.")
+            return published
+        return version
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.model_loaders import Word2VecManagerSingleton
+from classification_logic.similarity import ExactNeighbourIndex, QUANTIZATION_DTYPES, top_n_overlap
+
+PROBE_WORDS = (
+    'guvern', 'președinte', 'parlament', 'lege', 'alegere', 'partid', 'politică', 'ministru', 'vaccin', 'pandemie',
+    'medic', 'spital', 'sănătate', 'virus', 'economie', 'bani', 'preț', 'taxă', 'bancă', 'război', 'armată',
+    'rusia', 'ucraina', 'america', 'europa', 'românia', 'biserică', 'școală', 'copil', 'familie', 'presă',
+    'jurnalist', 'adevăr', 'minciună', 'știre', 'televiziune', 'internet', 'poliție', 'justiție', 'corupție',
+)
+
+
+class Command(BaseCommand):
+    help = ("Quantizes the vectors of each Word2Vec model to float16 or int8 with one scale per row, saves them "
+            "next to the .model file for WORD2VEC_SERVING_MODE = 'quantized' and reports the size and the top-N "
+            "overlap with float32 search on a fixed list of probe words.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dimension', action='append', choices=list(Word2VecManagerSingleton.MODEL_CONFIG),
+                            help="Model dimension to quantize. Defaults to every configured model.")
+        parser.add_argument('--dtype', choices=sorted(QUANTIZATION_DTYPES), default='int8')
+        parser.add_argument('--probe-word', action='append', dest='probe_words', default=None,
+                            help="Probe word for the overlap report. Defaults to a fixed list of news lemmas.")
+        parser.add_argument('--frequent-probe-words', type=int, default=100,
+                            help="Also probe this many of the most frequent words.")
+        parser.add_argument('--top-n', type=int, default=10)
+
+    def handle(self, *args, **options):
+        manager = Word2VecManagerSingleton.get_instance()
+        dimensions = options['dimension'] or list(Word2VecManagerSingleton.MODEL_CONFIG)
+
+        for dimension_key in dimensions:
+            start_time = time.perf_counter()
+            try:
+                index = manager.export_quantized_vectors(dimension_key, dtype=options['dtype'])
+            except (ValueError, FileNotFoundError) as e:
+                raise CommandError(str(e))
+
+            vectors = manager.get_vectors(dimension_key)
+            float32_mb = vectors.vectors.shape[0] * vectors.vectors.shape[1] * 4 / (1024 * 1024)
+            quantized_mb = index.nbytes / (1024 * 1024)
+            self.stdout.write(f"{dimension_key}D: quantized {len(index.index_to_key)} words to {index.dtype} in "
+                              f"{time.perf_counter() - start_time:.1f}s ({float32_mb:.1f} MB float32 -> "
+                              f"{quantized_mb:.1f} MB, {float32_mb / max(quantized_mb, 1e-9):.1f}x smaller)")
+
+            probe_words = list(options['probe_words'] or PROBE_WORDS)
+            probe_words += vectors.index_to_key[:options['frequent_probe_words']]
+            self.report_overlap(dimension_key, ExactNeighbourIndex.from_keyed_vectors(vectors), index,
+                                list(dict.fromkeys(probe_words)), options['top_n'])
+
+    def report_overlap(self, dimension_key, exact_index, quantized_index, probe_words, top_n):
+        overlap = top_n_overlap(exact_index, quantized_index, probe_words, topn=top_n)
+        if not overlap['probe_words']:
+            self.stdout.write(f"{dimension_key}D: none of the probe words are in the vocabulary.")
+            return
+
+        known_words = [word for word in probe_words if word in quantized_index.key_to_index]
+        timings = {}
+        for name, index in (('float32', exact_index), (quantized_index.dtype, quantized_index)):
+            start_time = time.perf_counter()
+            for word in known_words:
+                index.most_similar(word, topn=top_n)
+            timings[name] = (time.perf_counter() - start_time) * 1000 / len(known_words)
+
+        self.stdout.write(f"{dimension_key}D: top-{top_n} overlap with float32 over {overlap['probe_words']} probe "
+                          f"words: mean {overlap['mean_overlap']:.3f}, min {overlap['min_overlap']:.3f}")
+        self.stdout.write(f"{dimension_key}D: " + ", ".join(f"{name} {milliseconds:.3f} ms/query"
+                                                             for name, milliseconds in timings.items()))
@@ -0,0 +1,108 @@
+import os
+import json
+import tempfile
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.benchmarking import (BENCHMARK_LENGTHS, BenchmarkRunner, StandInArtifacts,
+                                               benchmark_metadata, build_synthetic_corpus, compare_results,
+                                               isolated_model_singletons, real_artifacts_available, sample_corpus,
+                                               save_results)
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks preprocessing, classification, batch throughput, most_similar latency and the cold-start "
+            "load of each model singleton on fixed corpora, writes the results to JSON and optionally fails when "
+            "they regress against a baseline file.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Results file (default: benchmarks/<timestamp>.json).")
+        parser.add_argument('--baseline', help="Previous results file to compare against.")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Allowed relative slowdown before a measurement counts as a regression.")
+        parser.add_argument('--artifacts', choices=('auto', 'real', 'stand-in'), default='auto',
+                            help="Benchmark the deployed models or small locally generated stand-ins.")
+        parser.add_argument('--corpus', help="CSV or JSONL article file to sample an extra 'sampled' corpus from.")
+        parser.add_argument('--text-field', default='content')
+        parser.add_argument('--documents', type=int, default=20, help="Documents per corpus.")
+        parser.add_argument('--lengths', default=','.join(BENCHMARK_LENGTHS),
+                            help=f"Synthetic corpus lengths to run, from {tuple(BENCHMARK_LENGTHS)}.")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--quick', action='store_true', help="Few documents, one repeat: a smoke run.")
+
+    def handle(self, *args, **options):
+        if options['quick']:
+            options['documents'], options['repeat'] = min(options['documents'], 5), 1
+
+        lengths = [length.strip() for length in options['lengths'].split(',') if length.strip()]
+        unknown = [length for length in lengths if length not in BENCHMARK_LENGTHS]
+        if unknown:
+            raise CommandError(f"Unknown lengths {unknown}. Choose from {tuple(BENCHMARK_LENGTHS)}.")
+
+        corpora = {length: build_synthetic_corpus(options['documents'], BENCHMARK_LENGTHS[length], seed=options['seed'])
+                   for length in lengths}
+        if options['corpus']:
+            if not os.path.exists(options['corpus']):
+                raise CommandError(f"Corpus file {options['corpus']} does not exist.")
+            corpora['sampled'] = sample_corpus(options['corpus'], options['documents'], seed=options['seed'],
+                                               text_field=options['text_field'])
+
+        artifacts = options['artifacts']
+        if artifacts == 'auto':
+            artifacts = 'real' if real_artifacts_available() else 'stand-in'
+        elif artifacts == 'real' and not real_artifacts_available():
+            raise CommandError("The spaCy model, TF-IDF/SVM pickles or Word2Vec models are missing.")
+
+        runner = BenchmarkRunner(corpora, repeat=options['repeat'], seed=options['seed'], log=self.stdout.write)
+        with ExitStack() as stack:
+            if artifacts == 'stand-in':
+                self.stdout.write("Real model artifacts not used; building stand-in models...")
+                directory = stack.enter_context(tempfile.TemporaryDirectory(prefix='benchmark-models-'))
+                stack.enter_context(StandInArtifacts(directory, seed=options['seed']).build().activate())
+            else:
+                stack.enter_context(isolated_model_singletons())
+            results = runner.run()
+
+        output = options['output'] or os.path.join(settings.BASE_DIR, 'benchmarks',
+                                                   f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+        metadata = benchmark_metadata(artifacts, corpora, options['seed'])
+        save_results(output, metadata, results)
+        self.write_table(results)
+        self.stdout.write(f"Results written to {output}")
+
+        if options['baseline']:
+            self.check_baseline(options['baseline'], {'meta': metadata, 'results': results}, options['threshold'])
+
+    def write_table(self, results: dict):
+        for name, result in sorted(results.items()):
+            if result['unit'] == 's':
+                self.stdout.write(f"  {name:<32} p50 {result['p50'] * 1000:9.2f} ms  p95 {result['p95'] * 1000:9.2f} ms"
+                                  f"  ({result['samples']} samples)")
+            else:
+                self.stdout.write(f"  {name:<32} {result['value']:9.1f} {result['unit']}")
+
+    def check_baseline(self, path: str, current: dict, threshold: float):
+        try:
+            with open(path) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read baseline {path}: {e}")
+
+        if baseline.get('meta', {}).get('artifacts') != current['meta']['artifacts']:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was measured with {baseline.get('meta', {}).get('artifacts')} artifacts, this run with "
+                f"{current['meta']['artifacts']}; the comparison is only indicative."))
+
+        comparisons = compare_results(baseline, current, threshold)
+        regressions = [comparison for comparison in comparisons if comparison['regression']]
+        for comparison in comparisons:
+            line = f"  {comparison['name']:<32} {comparison['slowdown']:+7.1%}"
+            self.stdout.write(self.style.ERROR(line) if comparison['regression'] else line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}: "
+                               f"{', '.join(comparison['name'] for comparison in regressions)}.")
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {threshold:.0%} against {path}."))
@@ -0,0 +1,82 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.registry import ModelRegistry
+from classification_logic.training import (ClassifierTrainer, FOLD_CACHE_DIR, TRAINING_RUNS_DIR, SELECTION_METRIC,
+                                           load_training_data)
+
+
+class Command(BaseCommand):
+    help = ("Retrains the TF-IDF + SVM classifier: parallel grid search with stratified k-fold cross-validation, "
+            "a final refit of the best candidate on the whole corpus, and a versioned run directory holding the "
+            "serving pickles and metrics.json. Optionally publishes the run to the model registry.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', help="Columnar corpus directory (see convert_corpus) or preprocessed CSV.")
+        parser.add_argument('--text-column', default='lemmas_filtered')
+        parser.add_argument('--label-column', default='tag')
+        parser.add_argument('--grid', default=None, metavar='JSON_FILE',
+                            help="JSON object with 'tfidf' and/or 'svm' parameter grids (a dict or a list of "
+                                 "dicts of value lists). Defaults to the grids used in the experiments notebook.")
+        parser.add_argument('--folds', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--jobs', type=int, default=-1, help="Parallel workers; -1 uses every core.")
+        parser.add_argument('--output-dir', default=None,
+                            help="Run directory. Defaults to a timestamped directory under the training runs dir.")
+        parser.add_argument('--cache-dir', default=FOLD_CACHE_DIR, help="Where per-fold TF-IDF matrices are cached.")
+        parser.add_argument('--publish', action='store_true', help="Publish the run as a model registry version.")
+        parser.add_argument('--name', default=None, help="Registry version name (default: content hash).")
+        parser.add_argument('--activate', action='store_true', help="Serve the published version.")
+        parser.add_argument('--shadow', action='store_true', help="Shadow-score the published version.")
+
+    def handle(self, *args, **options):
+        if (options['activate'] or options['shadow']) and not options['publish']:
+            raise CommandError("--activate and --shadow require --publish.")
+        if not os.path.exists(options['corpus']):
+            raise CommandError(f"Corpus not found at {options['corpus']}.")
+
+        grid = {}
+        if options['grid']:
+            with open(options['grid'], 'r', encoding='utf-8') as f:
+                grid = json.load(f)
+
+        try:
+            documents, labels = load_training_data(options['corpus'], options['text_column'], options['label_column'])
+            self.stdout.write(f"Loaded {len(documents)} documents from {options['corpus']}.")
+
+            trainer = ClassifierTrainer(tfidf_grid=grid.get('tfidf'), svm_grid=grid.get('svm'),
+                                        n_splits=options['folds'], seed=options['seed'], n_jobs=options['jobs'],
+                                        cache_dir=options['cache_dir'])
+            output_dir = options['output_dir'] or os.path.join(TRAINING_RUNS_DIR, time.strftime('%Y%m%d-%H%M%S'))
+            metrics = trainer.train(documents, labels, output_dir, source=options['corpus'])
+        except (KeyError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for candidate in metrics['candidates']:
+            self.stdout.write(f"  {SELECTION_METRIC} {candidate[f'mean_{SELECTION_METRIC}']:.4f} "
+                              f"+/- {candidate[f'std_{SELECTION_METRIC}']:.4f}  "
+                              f"tfidf={candidate['tfidf_params']} svm={candidate['svm_params']}")
+        best = metrics['best']
+        self.stdout.write(f"Best: tfidf={best['tfidf_params']} svm={best['svm_params']}, "
+                          f"accuracy {best['mean_accuracy']:.4f}, {SELECTION_METRIC} "
+                          f"{best[f'mean_{SELECTION_METRIC}']:.4f} over {metrics['n_splits']} folds.")
+        self.stdout.write(f"Search {metrics['timings']['search_seconds']:.1f}s, "
+                          f"final fit {metrics['timings']['final_fit_seconds']:.1f}s.")
+        self.stdout.write(self.style.SUCCESS(f"Saved model {metrics['model_version']} to {output_dir}."))
+
+        if options['publish']:
+            registry = ModelRegistry.get_instance()
+            try:
+                version = registry.publish(output_dir, version=options['name'],
+                                           notes=f"train_classifier {os.path.basename(output_dir)}: "
+                                                 f"{SELECTION_METRIC} {best[f'mean_{SELECTION_METRIC}']:.4f}")
+                if options['activate']:
+                    registry.set_active(version)
+                if options['shadow']:
+                    registry.set_shadow(version)
+            except (FileNotFoundError, ValueError) as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"Published version {version}.")
@@ -0,0 +1,61 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classification_logic.hybrid import HybridClassifier
+from classification_logic.inference import EngineUnavailableError
+from classification_logic.model_loaders import DOC2VEC_MODEL_PATH, HYBRID_MODEL_DIR
+from classification_logic.training import (DEFAULT_HYBRID_SVM_PARAMS, HYBRID_CLUSTERS, SELECTION_METRIC,
+                                           HybridTrainer, load_training_data)
+
+
+def svm_gamma(value: str):
+    return value if value in ('scale', 'auto') else float(value)
+
+
+class Command(BaseCommand):
+    help = ("Fits the hybrid classifier served by CLASSIFIER_INFERENCE_ENGINE = 'hybrid' (experiment B of the "
+            "classification notebook): a feature scaler, k-means over the inferred Doc2Vec vectors and an SVM "
+            "with probability estimates, written to the hybrid model directory with metrics.json. Needs the "
+            f"Doc2Vec model at {DOC2VEC_MODEL_PATH} and the full spaCy pipeline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', help="Columnar corpus directory (see convert_corpus) or CSV with raw texts.")
+        parser.add_argument('--text-column', default='content',
+                            help="Raw article text; the features need spaCy's POS tags and entities.")
+        parser.add_argument('--label-column', default='tag')
+        parser.add_argument('--clusters', type=int, default=HYBRID_CLUSTERS)
+        parser.add_argument('--kernel', default=DEFAULT_HYBRID_SVM_PARAMS['kernel'], choices=['rbf', 'linear'])
+        parser.add_argument('--C', type=float, default=DEFAULT_HYBRID_SVM_PARAMS['C'], dest='svm_c')
+        parser.add_argument('--gamma', type=svm_gamma, default=DEFAULT_HYBRID_SVM_PARAMS['gamma'])
+        parser.add_argument('--folds', type=int, default=5, help="Cross-validation folds; 0 skips evaluation.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output-dir', default=HYBRID_MODEL_DIR,
+                            help="Where the pickles are written. Defaults to the directory the server loads.")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['corpus']):
+            raise CommandError(f"Corpus not found at {options['corpus']}.")
+
+        svm_params = {'kernel': options['kernel'], 'C': options['svm_c']}
+        if options['kernel'] == 'rbf':
+            svm_params['gamma'] = options['gamma']
+
+        try:
+            texts, labels = load_training_data(options['corpus'], options['text_column'], options['label_column'])
+            self.stdout.write(f"Loaded {len(texts)} documents from {options['corpus']}.")
+            trainer = HybridTrainer(HybridClassifier.feature_extractor(), n_clusters=options['clusters'],
+                                    svm_params=svm_params, n_splits=options['folds'], seed=options['seed'])
+            metrics = trainer.train(texts, labels, options['output_dir'], source=options['corpus'])
+        except (EngineUnavailableError, KeyError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if metrics['folds']:
+            self.stdout.write(f"svm={metrics['svm_params']}, clusters={metrics['n_clusters']}: accuracy "
+                              f"{metrics['mean_accuracy']:.4f}, {SELECTION_METRIC} "
+                              f"{metrics[f'mean_{SELECTION_METRIC}']:.4f} +/- {metrics[f'std_{SELECTION_METRIC}']:.4f} "
+                              f"over {metrics['n_splits']} folds.")
+        timings = metrics['timings']
+        self.stdout.write(f"Features {timings['feature_seconds']:.1f}s, cross-validation "
+                          f"{timings['cross_validation_seconds']:.1f}s, final fit {timings['final_fit_seconds']:.1f}s.")
+        self.stdout.write(self.style.SUCCESS(f"Saved the hybrid classifier to {options['output_dir']}."))
@@ -0,0 +1,38 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from classification_logic.profiling import SamplingProfiler, profile_output_path
+
+
+class SlowRequestProfilerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = getattr(settings, 'SLOW_REQUEST_PROFILER', {})
+        if not self.config.get('ENABLED', False):
+            raise MiddlewareNotUsed
+        self.threshold = self.config.get('THRESHOLD_SECONDS', 1.0)
+        self.interval = self.config.get('INTERVAL_SECONDS', 0.005)
+        self.sample_rate = self.config.get('SAMPLE_RATE', 1.0)
+        self.all_threads = self.config.get('ALL_THREADS', False)
+        self.output_dir = str(self.config.get('OUTPUT_DIR', settings.BASE_DIR / 'profiles'))
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        thread_ids = None if self.all_threads else [threading.get_ident()]
+        profiler = SamplingProfiler(thread_ids=thread_ids, interval=self.interval).start()
+        start_time = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start_time
+            profiler.stop()
+            if duration >= self.threshold and profiler.samples:
+                path = profiler.write_collapsed(profile_output_path(self.output_dir, request.path, duration))
+                print(f"SlowRequestProfiler: {request.method} {request.path} took {duration:.2f}s, "
+                      f"flame graph data written to {path}")
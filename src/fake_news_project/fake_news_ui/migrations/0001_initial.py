@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassificationRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('model_version', models.CharField(max_length=64)),
+                ('label', models.CharField(max_length=32)),
+                ('confidence', models.FloatField()),
+                ('probabilities', models.JSONField(default=list)),
+                ('stage_timings', models.JSONField(default=dict)),
+                ('text_length', models.PositiveIntegerField(default=0)),
+                ('batch_size', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_hash', 'model_version', '-created_at'], name='classification_seen_idx'), models.Index(fields=['label', 'created_at'], name='classification_label_idx'), models.Index(fields=['created_at'], name='classification_created_idx')],
+            },
+        ),
+    ]
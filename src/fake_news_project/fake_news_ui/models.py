@@ -1,2 +1,45 @@
 from django.db import models
+from django.db.models import Avg, Count
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
 
+AGGREGATE_BUCKETS = {'hour': TruncHour, 'day': TruncDay}
+
+
+class ClassificationRecordQuerySet(models.QuerySet):
+    def seen(self, content_hash: str, model_version: str = None):
+        records = self.filter(content_hash=content_hash)
+        if model_version is not None:
+            records = records.filter(model_version=model_version)
+        return records.order_by('-created_at')
+
+    def label_counts(self, since=None, bucket: str = 'day'):
+        records = self.filter(created_at__gte=since) if since is not None else self
+        return (records.annotate(period=AGGREGATE_BUCKETS[bucket]('created_at'))
+                .values('period', 'label')
+                .annotate(count=Count('id'), mean_confidence=Avg('confidence'))
+                .order_by('period', 'label'))
+
+
+class ClassificationRecord(models.Model):
+    content_hash = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=64)
+    label = models.CharField(max_length=32)
+    confidence = models.FloatField()
+    probabilities = models.JSONField(default=list)
+    stage_timings = models.JSONField(default=dict)
+    text_length = models.PositiveIntegerField(default=0)
+    batch_size = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = ClassificationRecordQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_hash', 'model_version', '-created_at'], name='classification_seen_idx'),
+            models.Index(fields=['label', 'created_at'], name='classification_label_idx'),
+            models.Index(fields=['created_at'], name='classification_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.label} ({self.confidence:.2f}) {self.content_hash[:12]} @ {self.model_version}"
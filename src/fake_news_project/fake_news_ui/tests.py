@@ -1,8 +1,20 @@
-from django.test import TestCase, Client
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command, CommandError
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from unittest.mock import patch, MagicMock
 
+from classification_logic.preprocessors import TextPreprocessor
+from classification_logic.similarity import ExactNeighbourIndex, normalize_rows
+from classification_logic.store import ClassificationStore
 from .forms import NewsArticleForm, WordSimilarityForm
+from .models import ClassificationRecord
 
 
 class FormTests(TestCase):
@@ -32,6 +44,7 @@ class FormTests(TestCase):
         self.assertFalse(form.is_valid())
         self.assertIn('model_dimension', form.errors)
 
+@override_settings(WORD2VEC_SERVING_MODE='full', WORD2VEC_NEIGHBOUR_BACKEND='gensim')
 class ViewTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -133,3 +146,325 @@ class ViewTests(TestCase):
         self.assertIn("The word 'mere' was not found in the vocabulary.",
                       response.context['error_message'])
 
+    @override_settings(WORD2VEC_SERVING_MODE='mmap', WORD2VEC_NEIGHBOUR_BACKEND='gensim')
+    @patch('fake_news_ui.views.word2vec_manager.get_model')
+    @patch('fake_news_ui.views.word2vec_manager._get_mmap_vectors')
+    def test_word_similarity_view_uses_mmap_vectors(self, mock_get_mmap_vectors, mock_get_model):
+        mock_vectors = MagicMock()
+        mock_vectors.most_similar.return_value = [('neighbor1', 0.9)]
+        mock_vectors.key_to_index = {'test': 0, 'neighbor1': 1}
+        mock_get_mmap_vectors.return_value = mock_vectors
+
+        form_data = {'target_word': 'test', 'model_dimension': '150', 'top_n': 1}
+        response = self.client.post(self.similarity_url, form_data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['similar_words'], [('neighbor1', 0.9)])
+        self.assertEqual(response.context['vocabulary_size'], 2)
+        mock_get_mmap_vectors.assert_called_once_with('150')
+        mock_get_model.assert_not_called()
+
+    @patch('fake_news_ui.views.loading_manager.get')
+    def test_word_similarity_batch_api_queries_every_model(self, mock_get):
+        indexes = {}
+        for dimension, seed in (('150', 1), ('300', 2)):
+            vectors = np.random.default_rng(seed).normal(size=(50, 8))
+            indexes[f'word2vec_{dimension}'] = ExactNeighbourIndex([f'cuvant{i}' for i in range(50)],
+                                                                   normalize_rows(vectors))
+        mock_get.side_effect = indexes.get
+
+        response = self.client.post(reverse('fake_news_ui:api_word_similarity'), json.dumps({
+            'words': ['Cuvant1', 'inexistent'],
+            'analogies': [{'positive': ['cuvant2', 'cuvant3'], 'negative': ['cuvant4']}],
+            'dimensions': ['150', '300'], 'top_n': 3,
+        }), content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload['queries'][0], {'index': 0, 'word': 'cuvant1'})
+        for dimension in ('150', '300'):
+            results = payload['models'][dimension]['results']
+            expected = indexes[f'word2vec_{dimension}'].most_similar('cuvant1', topn=3)
+            self.assertEqual([word for word, _ in results[0]['similar_words']], [word for word, _ in expected])
+            self.assertIn('inexistent', results[1]['error'])
+            self.assertEqual(len(results[2]['similar_words']), 3)
+        self.assertEqual(self.client.post(reverse('fake_news_ui:api_word_similarity'), json.dumps({'words': []}),
+                                          content_type='application/json').status_code, 400)
+
+    def test_readiness_view_reports_components(self):
+        response = self.client.get(reverse('fake_news_ui:readiness'))
+
+        self.assertIn(response.status_code, (200, 503))
+        payload = response.json()
+        self.assertIn('policy', payload)
+        self.assertIn('classifier', payload['components'])
+        self.assertIn('word2vec_300', payload['components'])
+
+
+class ClassifyApiTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.api_url = reverse('fake_news_ui:api_classify')
+
+    def post_json(self, payload, **extra):
+        return self.client.post(self.api_url, data=json.dumps(payload), content_type='application/json', **extra)
+
+    @patch('fake_news_ui.views.classifier_facade.classify')
+    def test_single_article(self, mock_classify):
+        mock_classify.return_value = {'classification_result': 'REAL', 'confidence': 0.91,
+                                      'all_predictions': [('REAL', 0.91), ('FAKE', 0.09)]}
+
+        response = self.post_json({'text': 'Un articol'})
+
+        self.assertEqual(response.status_code, 200)
+        mock_classify.assert_called_once_with('Un articol')
+        self.assertEqual(response.json()['result']['classification_result'], 'REAL')
+        self.assertEqual(response.json()['result']['all_predictions'][0], ['REAL', 0.91])
+
+    @patch('fake_news_ui.views.classifier_facade.iter_classify_batch')
+    def test_batch_returns_results_in_order_with_ids(self, mock_iter_batch):
+        mock_iter_batch.return_value = iter([{'classification_result': 'FAKE', 'confidence': 0.9},
+                                             {'classification_result': 'REAL', 'confidence': 0.85}])
+
+        response = self.post_json({'articles': [{'id': 'a1', 'text': 'primul'}, 'al doilea']})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_iter_batch.call_args[0][0], ['primul', 'al doilea'])
+        results = response.json()['results']
+        self.assertEqual([result['index'] for result in results], [0, 1])
+        self.assertEqual(results[0]['id'], 'a1')
+        self.assertNotIn('id', results[1])
+        self.assertEqual(results[1]['classification_result'], 'REAL')
+
+    @override_settings(CLASSIFIER_API_STREAM_THRESHOLD=1)
+    @patch('fake_news_ui.views.classifier_facade.iter_classify_batch')
+    def test_large_batch_streams_ndjson(self, mock_iter_batch):
+        mock_iter_batch.return_value = iter([{'classification_result': 'FAKE', 'confidence': 0.9},
+                                             {'classification_result': 'SATIRE', 'confidence': 0.7}])
+
+        response = self.post_json({'texts': ['unu', 'doi']})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['classification_result'] for line in lines], ['FAKE', 'SATIRE'])
+
+    @override_settings(CLASSIFIER_API_MAX_BATCH=2)
+    def test_rejects_oversized_and_malformed_requests(self):
+        self.assertEqual(self.post_json({'texts': ['a', 'b', 'c']}).status_code, 400)
+        self.assertEqual(self.post_json({'texts': []}).status_code, 400)
+        self.assertEqual(self.post_json({'texts': [1]}).status_code, 400)
+        self.assertEqual(self.client.post(self.api_url, data='not json', content_type='application/json').status_code,
+                         400)
+        self.assertEqual(self.client.get(self.api_url).status_code, 405)
+
+
+class AsyncClassifyTests(TestCase):
+    @patch('fake_news_ui.views.classifier_facade.classify_batch')
+    async def test_async_form_view_uses_micro_batcher(self, mock_classify_batch):
+        mock_classify_batch.side_effect = lambda texts: [{'classification_result': 'FAKE', 'confidence': 0.92}
+                                                         for _ in texts]
+
+        response = await self.async_client.post(reverse('fake_news_ui:classify_article_async'),
+                                                {'news_content': 'Some fake news'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'fake_news_ui/result.html')
+        mock_classify_batch.assert_called_once_with(['Some fake news'])
+
+    @patch('fake_news_ui.views.classifier_facade.classify_batch')
+    async def test_async_api_and_batching_stats(self, mock_classify_batch):
+        mock_classify_batch.side_effect = lambda texts: [{'classification_result': 'REAL', 'confidence': 0.88}
+                                                         for _ in texts]
+
+        response = await self.async_client.post(reverse('fake_news_ui:api_classify_async'),
+                                                data=json.dumps({'text': 'Un articol'}),
+                                                content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result']['classification_result'], 'REAL')
+
+        stats = (await self.async_client.get(reverse('fake_news_ui:batching_stats'))).json()
+        self.assertIn('queue_depth', stats)
+        self.assertGreaterEqual(stats['batches'], 1)
+
+
+class ClassifyCorpusCommandTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.directory.name, 'corpus.jsonl')
+        self.output_path = os.path.join(self.directory.name, 'scored.jsonl')
+        with open(self.input_path, 'w', encoding='utf-8') as f:
+            for index in range(5):
+                f.write(json.dumps({'id': f'doc-{index}', 'content': f'articolul {index}'}) + '\n')
+
+        self.addCleanup(self.directory.cleanup)
+
+        mock_facade_class = patch('classification_logic.facade.NewsClassifierFacade').start()
+        patch('fake_news_ui.management.commands.classify_corpus._worker_facade', None).start()
+        self.addCleanup(patch.stopall)
+        self.mock_facade = mock_facade_class.get_instance.return_value
+        self.mock_facade.model_version = 'v1'
+        self.mock_classify_batch = self.mock_facade.classify_batch
+        self.mock_classify_batch.side_effect = lambda texts, **kwargs: [
+            {'classification_result': 'REAL', 'confidence': 0.9} for _ in texts]
+
+    def read_output(self):
+        with open(self.output_path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_scores_corpus_in_chunks(self):
+        call_command('classify_corpus', self.input_path, self.output_path, '--id-field', 'id',
+                     '--workers', '1', '--chunk-size', '2', stdout=StringIO())
+
+        rows = self.read_output()
+        self.assertEqual([row['id'] for row in rows], [f'doc-{index}' for index in range(5)])
+        self.assertEqual({row['model_version'] for row in rows}, {'v1'})
+        self.assertEqual(self.mock_classify_batch.call_count, 3)
+        self.assertIsNone(self.mock_facade.result_store)
+        with open(self.output_path + '.checkpoint') as f:
+            self.assertEqual(json.load(f), {'rows_done': 5, 'output_offset': os.path.getsize(self.output_path),
+                                            'model_version': 'v1'})
+
+    def test_resume_rejects_checkpoint_of_another_model(self):
+        call_command('classify_corpus', self.input_path, self.output_path, '--workers', '1', '--chunk-size', '2',
+                     stdout=StringIO())
+        self.mock_facade.model_version = 'v2'
+
+        with self.assertRaisesMessage(CommandError, "the current model is v2"):
+            call_command('classify_corpus', self.input_path, self.output_path, '--workers', '1', '--resume',
+                         stdout=StringIO())
+
+    def test_resume_without_checkpoint_keeps_existing_output(self):
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            f.write('{"row": 0, "id": "doc-0"}\n')
+
+        with self.assertRaisesMessage(CommandError, "has no checkpoint"):
+            call_command('classify_corpus', self.input_path, self.output_path, '--workers', '1', '--resume',
+                         stdout=StringIO())
+
+        self.assertEqual(self.read_output(), [{'row': 0, 'id': 'doc-0'}])
+        self.mock_classify_batch.assert_not_called()
+
+    def test_resume_continues_after_checkpoint(self):
+        call_command('classify_corpus', self.input_path, self.output_path, '--workers', '1', '--chunk-size', '2',
+                     stdout=StringIO())
+        with open(self.output_path, 'rb') as f:
+            first_two_rows = b''.join(f.readlines()[:2])
+        with open(self.output_path, 'wb') as f:
+            f.write(first_two_rows + b'{"row": 2, "partial')
+        with open(self.output_path + '.checkpoint') as f:
+            checkpoint = json.load(f)
+        checkpoint.update(rows_done=2, output_offset=len(first_two_rows))
+        with open(self.output_path + '.checkpoint', 'w') as f:
+            json.dump(checkpoint, f)
+        self.mock_classify_batch.reset_mock()
+
+        call_command('classify_corpus', self.input_path, self.output_path, '--workers', '1', '--chunk-size', '2',
+                     '--resume', stdout=StringIO())
+
+        self.assertEqual([row['row'] for row in self.read_output()], [0, 1, 2, 3, 4])
+        self.assertEqual(self.mock_classify_batch.call_args_list[0][0][0], ['articolul 2', 'articolul 3'])
+
+
+class MetricsTests(TestCase):
+    @patch('fake_news_ui.views.classifier_facade.classify')
+    def test_metrics_endpoint_exports_prometheus_text(self, mock_classify):
+        mock_classify.return_value = {'classification_result': 'FAKE', 'confidence': 0.92}
+        self.client.post(reverse('fake_news_ui:classify_article'), {'news_content': 'Some fake news'})
+
+        response = self.client.get(reverse('fake_news_ui:metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        content = response.content.decode()
+        self.assertIn('# TYPE classification_stage_seconds histogram', content)
+        self.assertIn('classifier_batcher_queue_depth', content)
+
+    def test_metrics_endpoint_is_local_only(self):
+        response = self.client.get(reverse('fake_news_ui:metrics'), REMOTE_ADDR='203.0.113.7')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_slow_requests_are_profiled(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            profiler_settings = {'ENABLED': True, 'THRESHOLD_SECONDS': 0.0, 'INTERVAL_SECONDS': 0.001,
+                                 'OUTPUT_DIR': output_dir}
+            slow_status = lambda: time.sleep(0.05) or {'policy': 'lazy', 'ready': True, 'components': {}}
+            with override_settings(SLOW_REQUEST_PROFILER=profiler_settings), \
+                    patch('fake_news_ui.views.loading_manager.status', side_effect=slow_status):
+                response = Client().get(reverse('fake_news_ui:readiness'))
+
+            self.assertEqual(response.status_code, 200)
+            profiles = os.listdir(output_dir)
+            self.assertEqual(len(profiles), 1)
+            self.assertTrue(profiles[0].endswith('.folded'))
+
+
+class ClassificationStoreTests(TestCase):
+    @patch.object(ClassificationStore, '_ensure_writer')
+    def test_records_are_bulk_written_and_read_back(self, _):
+        store = ClassificationStore(normalizer=lambda text: text.lower())
+        store.record("Vaccinul modifica ADN-ul", 'v1', {'classification_result': 'FAKE', 'confidence': 0.9},
+                     [0.9, 0.05, 0.05, 0.0, 0.0], stage_timings={'tfidf': 0.001, 'inference': 0.002})
+        store.record("Guvernul anunta masuri", 'v1', {'classification_result': 'REAL', 'confidence': 0.7},
+                     [0.1, 0.1, 0.1, 0.7, 0.0], batch_size=2)
+
+        self.assertEqual(ClassificationRecord.objects.count(), 0)
+        with self.assertNumQueries(1):
+            self.assertEqual(store.flush(), 2)
+
+        self.assertEqual(store.lookup_many(["vaccinul modifica adn-ul", "alt articol"], 'v1'),
+                         [[0.9, 0.05, 0.05, 0.0, 0.0], None])
+        self.assertEqual(store.lookup_many(["vaccinul modifica adn-ul"], 'v2'), [None])
+        record = ClassificationRecord.objects.seen(store.content_hash("VACCINUL modifica ADN-ul")).get()
+        self.assertEqual(record.stage_timings, {'tfidf': 0.001, 'inference': 0.002})
+        self.assertEqual(store.stats()['written'], 2)
+
+    def test_close_stops_the_writer_and_writes_what_is_queued(self):
+        store = ClassificationStore(flush_interval=0.01)
+        written = []
+        result = {'classification_result': 'FAKE', 'confidence': 0.9}
+        with patch.object(store, '_write', side_effect=lambda pending: written.extend(pending) or len(pending)):
+            store.record("Primul articol", 'v1', result, [0.9, 0.1, 0.0, 0.0, 0.0])
+            writer = store._writer
+            store.close(timeout=5)
+            store.record("Al doilea articol", 'v1', result, [0.9, 0.1, 0.0, 0.0, 0.0])
+
+        self.assertFalse(writer.is_alive())
+        self.assertIsNone(store._writer)
+        self.assertEqual(len(written), 2)
+        self.assertEqual(store.stats()['recorded'], 2)
+
+    def test_log_endpoint_reports_seen_articles_and_label_counts(self):
+        store = ClassificationStore(normalizer=TextPreprocessor.clean_text)
+        for label in ('FAKE', 'FAKE', 'REAL'):
+            ClassificationRecord.objects.create(content_hash=store.content_hash(f"Articol {label}"), model_version='v1',
+                                                label=label, confidence=0.9)
+
+        seen = self.client.get(reverse('fake_news_ui:classification_log'), {'text': "articol  FAKE!"}).json()
+        unseen = self.client.get(reverse('fake_news_ui:classification_log'), {'text': "altceva"}).json()
+        counts = self.client.get(reverse('fake_news_ui:classification_log'), {'days': 1}).json()
+
+        self.assertTrue(seen['seen'])
+        self.assertEqual([record['label'] for record in seen['records']], ['FAKE', 'FAKE'])
+        self.assertFalse(unseen['seen'])
+        self.assertEqual({row['label']: row['count'] for row in counts['counts']}, {'FAKE': 2, 'REAL': 1})
+
+
+class ServingProcessTests(TestCase):
+    def test_registry_watcher_runs_only_in_serving_processes(self):
+        from .apps import is_serving_process
+
+        with patch.dict(os.environ, {}, clear=True):
+            with patch('sys.argv', ['manage.py', 'classify_corpus', 'in.csv', 'out.csv']):
+                self.assertFalse(is_serving_process())
+            with patch('sys.argv', ['manage.py', 'runserver']):
+                self.assertFalse(is_serving_process())
+            with patch('sys.argv', ['manage.py', 'runserver', '--noreload']):
+                self.assertTrue(is_serving_process())
+        with patch.dict(os.environ, {'RUN_MAIN': 'true'}), patch('sys.argv', ['manage.py', 'runserver']):
+            self.assertTrue(is_serving_process())
+        with patch.dict(os.environ, {'FAKE_NEWS_SERVING': '1'}):
+            self.assertTrue(is_serving_process())
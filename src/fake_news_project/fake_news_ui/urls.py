@@ -8,5 +8,23 @@ urlpatterns = [
 
     path('classify/', views.IndexView.as_view(), name='classify_article'),
 
+    path('classify/async/', views.AsyncClassifyView.as_view(), name='classify_article_async'),
+
     path('word-similarity/', views.WordSimilarityView.as_view(), name='word_similarity'),
+
+    path('api/word-similarity/', views.WordSimilarityBatchApiView.as_view(), name='api_word_similarity'),
+
+    path('api/classify/', views.ClassifyApiView.as_view(), name='api_classify'),
+
+    path('api/classify/async/', views.AsyncClassifyApiView.as_view(), name='api_classify_async'),
+
+    path('api/classifications/', views.ClassificationLogView.as_view(), name='classification_log'),
+
+    path('batching/', views.BatchingStatsView.as_view(), name='batching_stats'),
+
+    path('models/', views.ModelRegistryView.as_view(), name='model_registry'),
+
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
+
+    path('ready/', views.ReadinessView.as_view(), name='readiness'),
 ]
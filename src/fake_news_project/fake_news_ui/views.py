@@ -1,15 +1,114 @@
+import asyncio
+import json
+import queue
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import FormView
 from django.urls import reverse_lazy
 
-from classification_logic.facade import NewsClassifierFacade
+from classification_logic.batching import MicroBatcher
+from classification_logic.loading import ModelLoadingManager
+from classification_logic.metrics import registry, word_similarity_stage_seconds
+from classification_logic.preprocessors import TextPreprocessor
+from classification_logic.registry import ModelRegistry
+from classification_logic.store import ClassificationStore
 from .forms import NewsArticleForm, WordSimilarityForm
+from .models import ClassificationRecord, AGGREGATE_BUCKETS
 from classification_logic.model_loaders import Word2VecManagerSingleton
+from classification_logic.near_duplicates import NearDuplicateIndex
+
+loading_manager = ModelLoadingManager.get_instance()
+model_registry = ModelRegistry.get_instance()
+
+
+class LazyClassifierFacade:
+    def classify(self, text: str) -> dict:
+        return loading_manager.get('classifier').classify(text)
+
+    def classify_batch(self, texts, **kwargs) -> list:
+        return loading_manager.get('classifier').classify_batch(texts, **kwargs)
 
-classifier_facade = NewsClassifierFacade()
+    def iter_classify_batch(self, texts, **kwargs):
+        return loading_manager.get('classifier').iter_classify_batch(texts, **kwargs)
+
+
+classifier_facade = LazyClassifierFacade()
+classification_batcher = MicroBatcher.from_settings(lambda texts: classifier_facade.classify_batch(texts))
 word2vec_manager = Word2VecManagerSingleton.get_instance()
 
 
+
+def result_cache_lookups():
+    if loading_manager.status()['components'].get('classifier', {}).get('state') != 'loaded':
+        return None
+    result_cache = loading_manager.get('classifier').result_cache
+    if result_cache is None:
+        return None
+    stats = result_cache.stats()
+    return {(('outcome', 'hit'),): stats['hits'], (('outcome', 'miss'),): stats['misses']}
+
+
+def classification_store_records():
+    if loading_manager.status()['components'].get('classifier', {}).get('state') != 'loaded':
+        return None
+    result_store = loading_manager.get('classifier').result_store
+    if result_store is None:
+        return None
+    stats = result_store.stats()
+    return {(('outcome', 'written'),): stats['written'], (('outcome', 'dropped'),): stats['dropped'],
+            (('outcome', 'error'),): stats['write_errors']}
+
+
+def near_duplicate_lookups():
+    index = NearDuplicateIndex._instance
+    if index is None:
+        return None
+    return {(('outcome', 'hit'),): index.hits, (('outcome', 'miss'),): index.misses}
+
+
+def shadow_comparisons():
+    shadow_scorer = model_registry.shadow_scorer
+    if shadow_scorer is None:
+        return None
+    stats = shadow_scorer.stats()
+    return {(('candidate', stats['version']), ('outcome', 'agree')): stats['agreed'],
+            (('candidate', stats['version']), ('outcome', 'disagree')): stats['compared'] - stats['agreed']}
+
+
+registry.register_collector('classifier_result_cache_lookups_total', "Classification result cache lookups.",
+                            result_cache_lookups, metric_type='counter')
+registry.register_collector('classification_store_records_total', "Classification records sent to the database.",
+                            classification_store_records, metric_type='counter')
+registry.register_collector('near_duplicate_lookups_total', "Near-duplicate index lookups before the classifier.",
+                            near_duplicate_lookups, metric_type='counter')
+registry.register_collector('near_duplicate_index_entries', "Articles stored in the near-duplicate index.",
+                            lambda: None if NearDuplicateIndex._instance is None else len(NearDuplicateIndex._instance))
+registry.register_collector('classifier_batcher_queue_depth', "Classification requests waiting for a micro-batch.",
+                            lambda: classification_batcher.stats()['queue_depth'])
+registry.register_collector('classifier_batcher_batches_total', "Micro-batches sent to the classifier.",
+                            lambda: classification_batcher.stats()['batches'], metric_type='counter')
+registry.register_collector('classifier_batcher_rejected_total', "Requests rejected because the queue was full.",
+                            lambda: classification_batcher.stats()['rejected'], metric_type='counter')
+registry.register_collector('classifier_batcher_batch_size_total', "Micro-batches sent, by batch size.",
+                            lambda: {(('size', size),): count
+                                     for size, count in classification_batcher.stats()['batch_size_counts'].items()},
+                            metric_type='counter')
+registry.register_collector('classifier_model_swaps_total', "Model versions swapped in without a restart.",
+                            lambda: model_registry.swaps, metric_type='counter')
+registry.register_collector('classifier_shadow_comparisons_total', "Shadow model predictions compared, by outcome.",
+                            shadow_comparisons, metric_type='counter')
+registry.register_collector('model_component_loaded', "Whether each model component has finished loading.",
+                            lambda: {(('component', name),): int(component['state'] == 'loaded')
+                                     for name, component in loading_manager.status()['components'].items()})
+
+
 class IndexView(FormView):
     template_name = 'fake_news_ui/index.html'
     form_class = NewsArticleForm
@@ -25,6 +124,33 @@ class IndexView(FormView):
         return render(self.request, 'fake_news_ui/result.html', context)
 
 
+class AsyncClassifyView(View):
+    template_name = 'fake_news_ui/index.html'
+    form_action = reverse_lazy('fake_news_ui:classify_article_async')
+
+    async def get(self, request, *args, **kwargs):
+        return render(request, self.template_name, {'form': NewsArticleForm(), 'form_action': self.form_action})
+
+    async def post(self, request, *args, **kwargs):
+        form = NewsArticleForm(request.POST)
+        if not form.is_valid():
+            return render(request, self.template_name, {'form': form, 'form_action': self.form_action})
+
+        news_content = form.cleaned_data['news_content']
+        try:
+            result_data = await asyncio.wrap_future(classification_batcher.submit(news_content))
+        except queue.Full:
+            return render(request, self.template_name,
+                          {'form': form, 'form_action': self.form_action,
+                           'error': "The classifier is busy. Please try again shortly."},
+                          status=503)
+
+        context = {'submitted_content': news_content}
+        context.update(result_data)
+
+        return render(request, 'fake_news_ui/result.html', context)
+
+
 class WordSimilarityView(FormView):
     template_name = 'fake_news_ui/word_similarity.html'
     form_class = WordSimilarityForm
@@ -42,13 +168,15 @@ class WordSimilarityView(FormView):
         context['submitted_word'] = target_word
         context['selected_dimension'] = f"{model_dim_key}D"
 
-        w2v_model = word2vec_manager.get_model(model_dim_key)
+        with word_similarity_stage_seconds.time(stage='load', dimension=model_dim_key):
+            w2v_vectors = loading_manager.get(f'word2vec_{model_dim_key}')
 
-        if w2v_model:
+        if w2v_vectors:
             try:
-                similar_words = w2v_model.wv.most_similar(target_word, topn=top_n)
+                with word_similarity_stage_seconds.time(stage='query', dimension=model_dim_key):
+                    similar_words = w2v_vectors.most_similar(target_word, topn=top_n)
                 context['similar_words'] = similar_words
-                context['vocabulary_size'] = len(w2v_model.wv.key_to_index)
+                context['vocabulary_size'] = len(w2v_vectors.key_to_index)
             except KeyError:
                 context['error_message'] = f"The word '{target_word}' was not found in the vocabulary."
             except Exception as e:
@@ -56,4 +184,235 @@ class WordSimilarityView(FormView):
         else:
             context['error_message'] = f"The Word2Vec {model_dim_key}D model could not be loaded."
 
-        return self.render_to_response(context)
\ No newline at end of file
+        return self.render_to_response(context)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class WordSimilarityBatchApiView(View):
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse({'error': "Request body must be valid JSON."}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({'error': "Request body must be a JSON object."}, status=400)
+
+        queries, error = self._parse_queries(payload)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+
+        max_queries = getattr(settings, 'WORD_SIMILARITY_API_MAX_QUERIES', 1000)
+        if len(queries) > max_queries:
+            return JsonResponse({'error': f"At most {max_queries} queries can be submitted per request."},
+                                status=400)
+
+        top_n = payload.get('top_n', 10)
+        max_top_n = WordSimilarityForm.base_fields['top_n'].max_value
+        if not isinstance(top_n, int) or isinstance(top_n, bool) or not 1 <= top_n <= max_top_n:
+            return JsonResponse({'error': f"'top_n' must be an integer between 1 and {max_top_n}."}, status=400)
+
+        dimensions = payload.get('dimensions', list(Word2VecManagerSingleton.MODEL_CONFIG))
+        if (not isinstance(dimensions, list) or not dimensions
+                or any(str(dimension) not in Word2VecManagerSingleton.MODEL_CONFIG for dimension in dimensions)):
+            return JsonResponse({'error': f"'dimensions' must be a non-empty list of "
+                                          f"{sorted(Word2VecManagerSingleton.MODEL_CONFIG)}."}, status=400)
+
+        models = {}
+        for dimension in dict.fromkeys(str(dimension) for dimension in dimensions):
+            models[dimension] = self._query_model(dimension, queries, top_n)
+        return JsonResponse({'top_n': top_n,
+                             'queries': [self._describe(index, positive, negative)
+                                         for index, (positive, negative) in enumerate(queries)],
+                             'models': models})
+
+    @staticmethod
+    def _parse_queries(payload: dict):
+        words = payload.get('words', [])
+        analogies = payload.get('analogies', [])
+        if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+            return None, "'words' must be a list of strings."
+        if not isinstance(analogies, list):
+            return None, "'analogies' must be a list of objects with 'positive' and 'negative' word lists."
+
+        queries = [([word.lower().strip()], []) for word in words]
+        for analogy in analogies:
+            if not isinstance(analogy, dict):
+                return None, "Each analogy must be an object with 'positive' and 'negative' word lists."
+            sides = [analogy.get('positive', []), analogy.get('negative', [])]
+            if not all(isinstance(side, list) and all(isinstance(word, str) for word in side) for side in sides):
+                return None, "Analogy 'positive' and 'negative' must be lists of strings."
+            if not sides[0] and not sides[1]:
+                return None, "Each analogy needs at least one positive or negative word."
+            queries.append(tuple([word.lower().strip() for word in side] for side in sides))
+
+        if not queries:
+            return None, "Provide a non-empty 'words' or 'analogies' list."
+        return queries, None
+
+    @staticmethod
+    def _describe(index: int, positive: list, negative: list) -> dict:
+        if not negative and len(positive) == 1:
+            return {'index': index, 'word': positive[0]}
+        return {'index': index, 'positive': positive, 'negative': negative}
+
+    @staticmethod
+    def _query_model(dimension: str, queries: list, top_n: int) -> dict:
+        with word_similarity_stage_seconds.time(stage='load', dimension=dimension):
+            index = loading_manager.get(f'word2vec_{dimension}')
+            if index is not None and not hasattr(index, 'most_similar_batch'):
+                index = word2vec_manager.get_batch_index(dimension)
+        if index is None:
+            return {'error': f"The Word2Vec {dimension}D model could not be loaded."}
+
+        with word_similarity_stage_seconds.time(stage='batch_query', dimension=dimension):
+            neighbours = index.most_similar_batch(queries, topn=top_n)
+
+        results = []
+        for number, ((positive, negative), similar_words) in enumerate(zip(queries, neighbours)):
+            if similar_words is None:
+                missing = [word for word in positive + negative if word not in index.key_to_index]
+                results.append({'index': number, 'error': f"Not in the vocabulary: {', '.join(missing)}."})
+            else:
+                results.append({'index': number, 'similar_words': [[word, round(float(score), 6)]
+                                                                    for word, score in similar_words]})
+        return {'vocabulary_size': len(index.key_to_index), 'results': results}
+
+
+class ReadinessView(View):
+    def get(self, request, *args, **kwargs):
+        status = loading_manager.status()
+        return JsonResponse(status, status=200 if status['ready'] else 503)
+
+
+class MetricsView(View):
+    def get(self, request, *args, **kwargs):
+        allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+        if allowed_ips is not None and request.META.get('REMOTE_ADDR') not in allowed_ips:
+            return HttpResponseForbidden("Metrics are only available locally.")
+        return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ClassificationLogView(View):
+    def get(self, request, *args, **kwargs):
+        content_hash = request.GET.get('content_hash')
+        if 'text' in request.GET:
+            content_hash = ClassificationStore(normalizer=TextPreprocessor.clean_text).content_hash(request.GET['text'])
+        if content_hash:
+            records = ClassificationRecord.objects.seen(content_hash, request.GET.get('model_version'))[:20]
+            return JsonResponse({'content_hash': content_hash, 'seen': bool(records),
+                                 'records': [{'label': record.label, 'confidence': record.confidence,
+                                              'model_version': record.model_version,
+                                              'created_at': record.created_at.isoformat()} for record in records]})
+
+        bucket = request.GET.get('bucket', 'day')
+        try:
+            days = int(request.GET.get('days', 7))
+        except ValueError:
+            return JsonResponse({'error': "'days' must be an integer."}, status=400)
+        if bucket not in AGGREGATE_BUCKETS:
+            return JsonResponse({'error': f"'bucket' must be one of {sorted(AGGREGATE_BUCKETS)}."}, status=400)
+
+        counts = ClassificationRecord.objects.label_counts(since=timezone.now() - timedelta(days=days), bucket=bucket)
+        return JsonResponse({'bucket': bucket, 'days': days,
+                             'counts': [dict(row, period=row['period'].isoformat()) for row in counts]})
+
+
+class ModelRegistryView(View):
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(model_registry.status())
+
+
+class BatchingStatsView(View):
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(classification_batcher.stats())
+
+
+def serialize_result(result: dict) -> dict:
+    serialized = dict(result)
+    if 'confidence' in serialized:
+        serialized['confidence'] = float(serialized['confidence'])
+    if 'all_predictions' in serialized:
+        serialized['all_predictions'] = [[label, float(probability)]
+                                         for label, probability in serialized['all_predictions']]
+    return serialized
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ClassifyApiView(View):
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse({'error': "Request body must be valid JSON."}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({'error': "Request body must be a JSON object."}, status=400)
+
+        if 'text' in payload:
+            if not isinstance(payload['text'], str):
+                return JsonResponse({'error': "'text' must be a string."}, status=400)
+            return JsonResponse({'result': serialize_result(classifier_facade.classify(payload['text']))})
+
+        articles = payload.get('articles', payload.get('texts'))
+        if not isinstance(articles, list) or not articles:
+            return JsonResponse({'error': "Provide 'text' or a non-empty 'articles' list."}, status=400)
+
+        max_batch = getattr(settings, 'CLASSIFIER_API_MAX_BATCH', 1000)
+        if len(articles) > max_batch:
+            return JsonResponse({'error': f"At most {max_batch} articles can be submitted per request."},
+                                status=400)
+
+        ids, texts = [], []
+        for article in articles:
+            if isinstance(article, dict):
+                ids.append(article.get('id'))
+                article = article.get('text')
+            else:
+                ids.append(None)
+            if not isinstance(article, str):
+                return JsonResponse({'error': "Each article must be a string or an object with a 'text' string."},
+                                    status=400)
+            texts.append(article)
+
+        batch_size = getattr(settings, 'CLASSIFIER_API_BATCH_SIZE', 64)
+        results = classifier_facade.iter_classify_batch(texts, batch_size=batch_size)
+
+        stream_threshold = getattr(settings, 'CLASSIFIER_API_STREAM_THRESHOLD', 100)
+        wants_stream = payload.get('stream', 'application/x-ndjson' in request.headers.get('Accept', ''))
+        if wants_stream or len(texts) > stream_threshold:
+            lines = (json.dumps(self._with_ids(index, article_id, result)) + '\n'
+                     for index, (article_id, result) in enumerate(zip(ids, results)))
+            return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+        return JsonResponse({'results': [self._with_ids(index, article_id, result)
+                                         for index, (article_id, result) in enumerate(zip(ids, results))]})
+
+    @staticmethod
+    def _with_ids(index: int, article_id, result: dict) -> dict:
+        serialized = {'index': index}
+        if article_id is not None:
+            serialized['id'] = article_id
+        serialized.update(serialize_result(result))
+        return serialized
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncClassifyApiView(View):
+    http_method_names = ['post']
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse({'error': "Request body must be valid JSON."}, status=400)
+        if not isinstance(payload, dict) or not isinstance(payload.get('text'), str):
+            return JsonResponse({'error': "Provide 'text' as a string."}, status=400)
+
+        try:
+            result = await asyncio.wrap_future(classification_batcher.submit(payload['text']))
+        except queue.Full:
+            return JsonResponse({'error': "The classifier queue is full."}, status=503)
+        return JsonResponse({'result': serialize_result(result)})